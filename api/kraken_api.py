@@ -1,12 +1,68 @@
 # api/kraken_api.py
 
 import krakenex as k
+import json
 import os
 import pandas as pd
 import numpy as np
 from utils.symbol_mapping import ohlc_mapping  # Importar el diccionario de mapeo de símbolos
 import dotenv
 
+try:
+    import orjson  # Decodificador JSON más rápido, opcional
+except ImportError:
+    orjson = None
+
+# Columnas de cada vela en la respuesta OHLC de Kraken
+COLUMNAS_OHLC = ['date', 'open', 'high', 'low', 'close', 'vwap', 'volume', 'count']
+
+
+def decodificar_json(contenido):
+    ''' Decodifica una respuesta JSON (bytes o str) con orjson si está instalado, o con el módulo json '''
+    if orjson is not None:
+        return orjson.loads(contenido)
+    return json.loads(contenido)
+
+
+def ohlc_a_arrays(filas):
+    '''
+    Convierte las velas de una respuesta OHLC de Kraken (listas [time, open, high, low, close, vwap, volume, count]
+    con los precios como texto) en arrays tipados, sin pasar por un DataFrame de objetos:
+    'date' en segundos epoch (int64), precios en float64 y 'count' en int64.
+    '''
+    n = len(filas)
+    columnas = list(zip(*filas)) if n else [()] * len(COLUMNAS_OHLC)
+
+    arrays = {'date': np.array(columnas[0], dtype=np.int64)}
+    precios = np.empty((6, n), dtype=np.float64)  # Bloque preasignado, una fila contigua por campo de precio
+    for j, columna in enumerate(COLUMNAS_OHLC[1:7]):
+        precios[j] = columnas[j + 1]  # NumPy convierte el texto a float64 al asignarlo
+        arrays[columna] = precios[j]
+    arrays['count'] = np.array(columnas[7], dtype=np.int64)
+    return arrays
+
+
+def trades_a_arrays(filas):
+    '''
+    Convierte las operaciones de una respuesta Trades de Kraken (listas [price, volume, time, side, type, misc, ...])
+    en arrays tipados (precios, volúmenes, tiempos en segundos epoch con decimales), todos float64.
+    '''
+    if not filas:
+        return np.empty(0), np.empty(0), np.empty(0)
+    columnas = list(zip(*filas))
+    precios = np.empty((3, len(filas)), dtype=np.float64)  # Bloque preasignado: precio, volumen y tiempo
+    for j in range(3):
+        precios[j] = columnas[j]
+    return precios[0], precios[1], precios[2]
+
+
+def ohlc_a_dataframe(filas):
+    ''' Convierte las velas de una respuesta OHLC de Kraken (listas de valores) en un DataFrame con columnas tipadas '''
+    arrays = ohlc_a_arrays(filas)
+    # Convertir los segundos epoch a fecha y sumar una hora para corregir el desfase horario
+    arrays['date'] = arrays['date'].astype('datetime64[s]').astype('datetime64[ns]') + np.timedelta64(1, 'h')
+    return pd.DataFrame(arrays, columns=COLUMNAS_OHLC)
+
 
 class Kraken_API:
 
@@ -14,6 +70,8 @@ class Kraken_API:
     
     def __init__(self):
         ''' Constructor de la clase para autenticación con Kraken API '''       
+        self.last = {}  # Cursor 'last' de la última consulta OHLC de cada par, para pedir solo las velas nuevas
+        self.last_trades = {}  # Cursor 'last' de la última consulta Trades de cada par
         for i in range(3):
             try:
                 dotenv.load_dotenv()
@@ -24,31 +82,108 @@ class Kraken_API:
             except Exception as e:
                 print(f'Error al conectarse a Kraken API, reintentándolo... Intento {i+1}: {e}')
 
-    def get_OHCL_data(self):
-        ''' Método para obtener datos OHLC de Kraken '''
+    def __consultar_ohlc(self, pair, since=None):
+        '''
+        Consulta OHLC de Kraken para un par. Devuelve las velas de la respuesta (listas de valores) y guarda el cursor
+        'last' en self.last[pair]; None si la consulta falla.
+        '''
         # pair = self.get_Kraken_map(pair) Disponible en la versión v2 
-        pair = 'XBTUSD'
         interval = 1  # Intervalo de tiempo en minutos para los datos OHLC en segundos
         print(f"Obteniendo datos OHLC para el par {pair}...")
-        query = self.api.query_public('OHLC', {'pair': pair, 'interval': interval})
+        parametros = {'pair': pair, 'interval': interval}
+        if since is not None:
+            parametros['since'] = since
+        query = self.api.query_public('OHLC', parametros)
         
         # Manejo de posibles errores en la consulta
         if 'error' in query and query['error']:
             print("Errores en la consulta a Kraken API:", query['error'])
-            return pd.DataFrame()  # Retornar DataFrame vacío en caso de error
+            return None
 
         pair_mapped = ohlc_mapping.get(pair, pair) 
         if pair_mapped not in query['result']:
             print(f"Par {pair_mapped} no encontrado en la respuesta de Kraken API.")
-            return pd.DataFrame()
+            return None
+
+        self.last[pair] = query['result'].get('last')
+        return query['result'][pair_mapped]
+
+    def get_OHCL_data(self, pair='XBTUSD', since=None):
+        '''
+        Método para obtener datos OHLC de Kraken para un par (clave de ohlc_mapping, p. ej. 'XBTUSD').
+        Con `since` (el cursor 'last' de una consulta anterior) solo se descargan las velas posteriores.
+        '''
+        filas = self.__consultar_ohlc(pair, since)
+        if filas is None:
+            return pd.DataFrame(), pair  # Retornar DataFrame vacío en caso de error
+        return ohlc_a_dataframe(filas), pair
+
+    def get_OHCL_data_incremental(self, pair, almacen):
+        '''
+        Método para obtener el histórico de un par descargando solo las velas nuevas desde la consulta anterior.
+        - almacen: AlmacenVelas donde se guarda el histórico y el cursor de cada par.
+        Devuelve (histórico actualizado, par). Si la consulta falla, devuelve el histórico que ya había.
+        '''
+        df, pair = self.get_OHCL_data(pair, since=almacen.cursor(pair))
+        if df.empty:
+            return almacen.cargar(pair), pair
+        return almacen.fusionar(pair, df, self.last[pair]), pair
+
+    def get_OHCL_data_anillo(self, pair, anillo):
+        '''
+        Método para el modo residente: descarga solo las velas nuevas desde la consulta anterior y las escribe en un
+        AnilloVelas, sin construir un DataFrame intermedio.
+        Devuelve (DataFrame sobre las vistas del anillo, par). Si la consulta falla, el anillo queda como estaba.
+        '''
+        filas = self.__consultar_ohlc(pair, since=self.last.get(pair) if len(anillo) else None)
+        if filas is not None:
+            anillo.extender(ohlc_a_arrays(filas))
+        return anillo.dataframe(), pair
+
+    def get_OHCL_data_pares(self, pairs):
+        ''' Método para obtener los datos OHLC de varios pares. Devuelve {par: DataFrame}, sin los pares que fallan '''
+        frames = {}
+        for pair in pairs:
+            df, _ = self.get_OHCL_data(pair)
+            if not df.empty:
+                frames[pair] = df
+        return frames
+
+    def get_trades(self, pair='XBTUSD', since=None):
+        '''
+        Método para obtener las operaciones recientes de un par (endpoint Trades).
+        Con `since` (el cursor 'last' de una consulta anterior) solo se descargan las operaciones posteriores.
+        Devuelve (precios, volúmenes, tiempos) como arrays float64; vacíos si la consulta falla.
+        '''
+        parametros = {'pair': pair}
+        if since is not None:
+            parametros['since'] = since
+        query = self.api.query_public('Trades', parametros)
+
+        # Manejo de posibles errores en la consulta
+        if 'error' in query and query['error']:
+            print("Errores en la consulta a Kraken API:", query['error'])
+            return trades_a_arrays([])
+
+        pair_mapped = ohlc_mapping.get(pair, pair)
+        if pair_mapped not in query['result']:
+            print(f"Par {pair_mapped} no encontrado en la respuesta de Kraken API.")
+            return trades_a_arrays([])
 
-        df = pd.DataFrame(query['result'][pair_mapped], columns=[
-            'date', 'open', 'high', 'low', 'close', 'vwap', 'volume', 'count'
-        ])  # Crear un DataFrame con los datos OHLC
-        df['date'] = pd.to_datetime(df['date'], unit='s')  # Convertir la columna timestamp a formato datetime
-        df['date'] = df['date'] + pd.Timedelta(hours=1)  # Sumar una hora a cada fila para corregir el desfase horario
+        self.last_trades[pair] = query['result'].get('last')
+        return trades_a_arrays(query['result'][pair_mapped])
 
-        return df , pair
+    def get_OHCL_data_trades(self, pair, agregadores):
+        '''
+        Método para construir velas de uno o varios intervalos a partir de las operaciones del par, descargando solo
+        las operaciones nuevas desde la consulta anterior.
+        - agregadores: Lista de AgregadorTrades (uno por intervalo); todos reciben las mismas operaciones.
+        Devuelve {intervalo en segundos: DataFrame de velas cerradas}, con las columnas de get_OHCL_data().
+        '''
+        precios, volumenes, tiempos = self.get_trades(pair, since=self.last_trades.get(pair))
+        for agregador in agregadores:
+            agregador.procesar(precios, volumenes, tiempos)
+        return {agregador.segundos: agregador.velas() for agregador in agregadores}
 
     def get_coins(self):
         
@@ -0,0 +1,109 @@
+# api/kraken_async.py
+
+import asyncio
+import httpx
+import pandas as pd
+from api.kraken_api import decodificar_json, ohlc_a_dataframe
+from utils.symbol_mapping import ohlc_mapping  # Importar el diccionario de mapeo de símbolos
+
+
+class Kraken_Async:
+
+    ''' Cliente asíncrono de la API pública de Kraken para descargar datos OHLC de muchos pares a la vez '''
+
+    def __init__(self, base_url='https://api.kraken.com', max_concurrentes=5, timeout=10.0, reintentos=3,
+                 transport=None):
+        '''
+        Constructor de la clase.
+        - base_url: URL base de la API (se puede apuntar a un servidor local con respuestas grabadas).
+        - max_concurrentes: Máximo de peticiones en vuelo a la vez, para respetar el límite de la API pública.
+        - timeout: Tiempo máximo de cada petición, en segundos.
+        - reintentos: Intentos por par cuando Kraken responde que se ha superado el límite de peticiones (al menos 1).
+        - transport: Transporte de httpx opcional, p. ej. un httpx.MockTransport que responde sin salir a la red.
+        '''
+        if reintentos < 1:
+            raise ValueError("Kraken_Async necesita al menos un intento por par (reintentos >= 1)")
+        self.base_url = base_url
+        self.max_concurrentes = max_concurrentes
+        self.timeout = timeout
+        self.reintentos = reintentos
+        self.transport = transport
+        self.client = None
+        self.last = {}  # Cursor 'last' de la última consulta OHLC de cada par, para pedir solo las velas nuevas
+
+    async def __aenter__(self):
+        ''' Abre el cliente HTTP, que reutiliza las conexiones entre peticiones mientras está abierto '''
+        self.client = httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout, transport=self.transport,
+                                        limits=httpx.Limits(max_connections=self.max_concurrentes))
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.client.aclose()
+        self.client = None
+
+    async def get_OHCL_data(self, pair='XBTUSD', interval=1, semaforo=None, since=None):
+        '''
+        Método para obtener los datos OHLC de un par. Devuelve un DataFrame vacío si la consulta falla.
+        Con `since` (el cursor 'last' de una consulta anterior) solo se descargan las velas posteriores.
+        '''
+        semaforo = semaforo or asyncio.Semaphore(self.max_concurrentes)
+        parametros = {'pair': pair, 'interval': interval}
+        if since is not None:
+            parametros['since'] = since
+        for i in range(self.reintentos):
+            try:
+                async with semaforo:
+                    respuesta = await self.client.get('/0/public/OHLC', params=parametros)
+                respuesta.raise_for_status()
+                query = decodificar_json(respuesta.content)
+            except (httpx.HTTPError, ValueError) as e:
+                print(f"Error al obtener los datos OHLC de {pair}: {e}")
+                return pd.DataFrame()
+
+            # Manejo de posibles errores en la consulta
+            if query.get('error'):
+                if any('Rate limit' in error for error in query['error']) and i + 1 < self.reintentos:
+                    await asyncio.sleep(2 ** i)  # Esperar antes de reintentar
+                    continue
+                print(f"Errores en la consulta a Kraken API para {pair}:", query['error'])
+                return pd.DataFrame()
+            break
+
+        pair_mapped = ohlc_mapping.get(pair, pair)
+        if pair_mapped not in query['result']:
+            print(f"Par {pair_mapped} no encontrado en la respuesta de Kraken API.")
+            return pd.DataFrame()
+
+        self.last[pair] = query['result'].get('last')
+        return ohlc_a_dataframe(query['result'][pair_mapped])
+
+    async def get_OHCL_data_pares(self, pairs, interval=1):
+        ''' Método para obtener los datos OHLC de varios pares en paralelo. Devuelve {par: DataFrame}, sin los que fallan '''
+        if self.client is None:
+            async with self:
+                return await self.get_OHCL_data_pares(pairs, interval)
+
+        semaforo = asyncio.Semaphore(self.max_concurrentes)
+        frames = await asyncio.gather(*(self.get_OHCL_data(pair, interval, semaforo) for pair in pairs))
+        return {pair: df for pair, df in zip(pairs, frames) if not df.empty}
+
+    async def get_OHCL_data_incremental_pares(self, pairs, almacen):
+        '''
+        Método para actualizar el histórico de varios pares descargando solo las velas nuevas de cada uno.
+        - almacen: AlmacenVelas donde se guarda el histórico y el cursor de cada par (mismo intervalo).
+        Devuelve {par: histórico actualizado}; los pares cuya consulta falla conservan el histórico que ya había.
+        '''
+        if self.client is None:
+            async with self:
+                return await self.get_OHCL_data_incremental_pares(pairs, almacen)
+
+        semaforo = asyncio.Semaphore(self.max_concurrentes)
+        frames = await asyncio.gather(*(self.get_OHCL_data(pair, almacen.interval, semaforo, almacen.cursor(pair))
+                                        for pair in pairs))
+        return {pair: almacen.fusionar(pair, df, self.last[pair]) if not df.empty else almacen.cargar(pair)
+                for pair, df in zip(pairs, frames)}
+
+
+def obtener_ohlc_pares(pairs, interval=1, **kwargs):
+    ''' Versión síncrona de Kraken_Async.get_OHCL_data_pares para usar fuera de un bucle de asyncio '''
+    return asyncio.run(Kraken_Async(**kwargs).get_OHCL_data_pares(pairs, interval))
@@ -1,4 +1,5 @@
 import tweepy as tw
+import io
 import os
 
 class X_Conect:
@@ -48,20 +49,24 @@ class X_Conect:
             return " ".join(palabras[:max_tokens]) + "..."
         return comentario
 
-    def post_tweet(self, comentario):
+    def post_tweet(self, comentario, imagen='grafico.png'):
         ''' Método para publicar un tweet usando solo la API v1.1 '''
         
         comentario_truncado = str(self.truncar_comentario(comentario, max_tokens=200))
-        imagen = 'grafico.png'  # Asegúrate de que este archivo existe y es accesible
+        # imagen: bytes PNG del gráfico (Grafico.png_bytes) o ruta de un fichero existente y accesible
+        en_memoria = isinstance(imagen, (bytes, bytearray))
 
         # Verificar si el archivo existe antes de intentar subirlo
-        if not os.path.isfile(imagen):
+        if not en_memoria and not os.path.isfile(imagen):
             print("Error: El archivo de imagen no existe.")
             return
 
         # Subir la imagen
         try:
-            media = self.api.media_upload(imagen)
+            if en_memoria:
+                media = self.api.media_upload(filename='grafico.png', file=io.BytesIO(imagen))
+            else:
+                media = self.api.media_upload(imagen)
             media_id = media.media_id_string
             print("Imagen subida exitosamente.")
         except Exception as e:
@@ -72,7 +77,8 @@ class X_Conect:
         try:
             self.api.update_status(status=comentario_truncado, media_ids=[media_id])
             print("Tweet publicado exitosamente.")
-            os.remove("grafico.png")  # Eliminar la imagen después de publicar el tweet
+            if not en_memoria:
+                os.remove(imagen)  # Eliminar la imagen después de publicar el tweet
         except Exception as e:
             print(f"Error al publicar el tweet: {e}")
 
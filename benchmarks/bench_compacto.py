@@ -0,0 +1,79 @@
+# benchmarks/bench_compacto.py
+"""
+Compara Dataset.get_metrics() en modo normal (float64) y compacto (float32, fechas en minutos int32) sobre velas
+sintéticas de varios pares: memoria de las métricas apiladas y error relativo máximo de cada columna respecto a
+float64, que debe quedar por debajo de COTA_ERROR_COMPACTO. Termina con error si alguna columna la supera.
+
+Uso, desde la raíz del repositorio:
+    python -m benchmarks.bench_compacto [--pares 5] [--velas 100000]
+"""
+import argparse
+import contextlib
+import io
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.bench_graficos import velas_sinteticas
+from models.dataset import COTA_ERROR_COMPACTO, Dataset, minutos_a_fechas
+from models.memoria import apilar_pares, resumen_memoria
+
+
+def metricas(df, compacto):
+    with contextlib.redirect_stdout(io.StringIO()):  # get_metrics() imprime el resultado
+        return Dataset(df, compacto=compacto).get_metrics(filas=None)
+
+
+def error_relativo(compacto, normal):
+    """Error relativo máximo por columna numérica, sin contar las posiciones NaN/inf (que deben coincidir)."""
+    errores = {}
+    for columna in normal.columns:
+        if columna == 'date':
+            continue
+        a = compacto[columna].to_numpy(np.float64)
+        b = normal[columna].to_numpy(np.float64)
+        finitos = np.isfinite(b)
+        if not np.array_equal(finitos, np.isfinite(a)):
+            errores[columna] = np.inf
+            continue
+        diferencia = np.abs(a[finitos] - b[finitos])
+        errores[columna] = float(np.max(diferencia / np.maximum(np.abs(b[finitos]), np.finfo(np.float64).tiny),
+                                        initial=0.0))
+    return errores
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pares', type=int, default=5)
+    parser.add_argument('--velas', type=int, default=100000)
+    args = parser.parse_args()
+
+    normales, compactos, peor = {}, {}, {}
+    tiempos = {False: 0.0, True: 0.0}
+    for i in range(args.pares):
+        df = velas_sinteticas(args.velas, semilla=i)
+        pair = f'PAR{i}USD'
+        for compacto, destino in ((False, normales), (True, compactos)):
+            inicio = time.perf_counter()
+            destino[pair] = metricas(df, compacto)
+            tiempos[compacto] += time.perf_counter() - inicio
+
+        assert (minutos_a_fechas(compactos[pair]['date']) == normales[pair]['date'].to_numpy()).all()
+        for columna, error in error_relativo(compactos[pair], normales[pair]).items():
+            peor[columna] = max(peor.get(columna, 0.0), error)
+
+    print(f'float64:  {resumen_memoria(apilar_pares(normales))}, {tiempos[False]:.1f} s')
+    print(f'compacto: {resumen_memoria(apilar_pares(compactos))}, {tiempos[True]:.1f} s')
+
+    print(f'\nError relativo máximo (cota {COTA_ERROR_COMPACTO:.2e}):')
+    for columna, error in sorted(peor.items(), key=lambda item: -item[1])[:10]:
+        print(f'  {columna:<18} {error:.2e}')
+    fuera = [columna for columna, error in peor.items() if error > COTA_ERROR_COMPACTO]
+    if fuera:
+        print(f'Columnas fuera de la cota: {fuera}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+# benchmarks/bench_graficos.py
+"""
+Compara el gráfico de velas clásico (Grafico.candlestick_with_volume: figura nueva, vlines y seaborn) con el
+renderizador persistente (Grafico.png_bytes: PolyCollection/LineCollection y Axes.plot sobre un lienzo Agg).
+Las velas son sintéticas, así que no hace falta conexión con Kraken.
+
+Uso, desde la raíz del repositorio:
+    python -m benchmarks.bench_graficos [--velas 720 10000] [--repeticiones 3]
+"""
+import argparse
+import contextlib
+import io
+import time
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+from models.dataset import Dataset
+from models.graph import Grafico
+
+
+def velas_sinteticas(n, semilla=0):
+    """Genera n velas de 1 minuto con un paseo aleatorio, con las columnas de Kraken_API.get_OHCL_data()."""
+    rng = np.random.default_rng(semilla)
+    cierre = 60000 + np.cumsum(rng.normal(0, 15, n))
+    apertura = np.r_[cierre[0], cierre[:-1]]
+    amplitud = np.abs(rng.normal(0, 10, n))
+    return pd.DataFrame({
+        'date': pd.date_range('2024-01-01', periods=n, freq='min'),
+        'open': apertura,
+        'high': np.maximum(apertura, cierre) + amplitud,
+        'low': np.minimum(apertura, cierre) - amplitud,
+        'close': cierre,
+        'vwap': (apertura + cierre) / 2,
+        'volume': rng.exponential(2, n),
+        'count': rng.integers(1, 100, n),
+    })
+
+
+def metricas(n):
+    """DataFrame de métricas con todas las velas (get_metrics() solo devuelve las últimas 60)."""
+    df = velas_sinteticas(n + 200)
+    sma = df['close'].rolling(20).mean()
+    std = df['close'].rolling(20).std()
+    df['SMA'] = sma
+    df['Banda_Superior'] = sma + 2 * std
+    df['Banda_Inferior'] = sma - 2 * std
+    df['Volume_SMA'] = df['volume'].rolling(20).mean()
+    return df.tail(n).reset_index(drop=True)
+
+
+def medir(funcion, repeticiones):
+    """Devuelve (primera llamada, mediana de las siguientes) en milisegundos."""
+    tiempos = []
+    for _ in range(repeticiones + 1):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return tiempos[0], float(np.median(tiempos[1:]))
+
+
+def clasico(df):
+    fig = Grafico(df, 'XBTUSD').candlestick_with_volume(io.BytesIO())
+    plt.close(fig)
+
+
+def rapido(df):
+    Grafico(df, 'XBTUSD').png_bytes()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--velas', type=int, nargs='+', default=[720, 10000])
+    parser.add_argument('--repeticiones', type=int, default=3)
+    args = parser.parse_args()
+
+    # Comprobación de que el renderizador acepta la salida real de Dataset
+    with contextlib.redirect_stdout(io.StringIO()):
+        Grafico(Dataset(velas_sinteticas(720)).get_metrics(indicators=Grafico.INDICADORES), 'XBTUSD').png_bytes()
+
+    print(f"{'velas':>7} {'camino':>8} {'primera (ms)':>13} {'mediana (ms)':>13}")
+    for n in args.velas:
+        df = metricas(n)
+        for nombre, funcion in (('clasico', clasico), ('rapido', rapido)):
+            primera, mediana = medir(lambda: funcion(df), args.repeticiones)
+            print(f'{n:>7} {nombre:>8} {primera:>13.1f} {mediana:>13.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,32 +1,133 @@
 # main.py
 
+import sys
+import time
+import matplotlib.pyplot as plt
 from api.kraken_api import Kraken_API
+from models.anillo import AnilloVelas
 from models.dataset import Dataset
 from models.graph import Grafico
 from api.twitter_client import X_Conect
-from models.openai import generar_comentario_openai
+from models.openai import CacheComentarios, generar_comentario_openai, INDICADORES_COMENTARIO
+from utils.pipeline import EnProceso, Etapa, Pipeline
+from utils.programador import Cronometro, Programador
 
 
-def main():
-    # Inicializar la API de Kraken
-    api = Kraken_API()
-    df , pair = api.get_OHCL_data()
-    
+def ciclo(api, cronometro, almacen=None, pair='XBTUSD', anillo=None, cache=None, comentarios=None):
+    '''
+    Ejecuta un ciclo completo del bot: descarga de velas, métricas, gráfico y comentario.
+    - almacen: Si se indica, solo se descargan las velas nuevas y se fusionan con su histórico.
+    - anillo: Si se indica (AnilloVelas), solo se descargan las velas nuevas y se escriben en el anillo; las métricas
+      se calculan sobre sus vistas, sin copiar el histórico.
+    - cache: CacheMetricas opcional; si las velas no han cambiado desde un ciclo anterior (o una ejecución anterior,
+      con nivel en disco), las métricas no se recalculan.
+    - comentarios: CacheComentarios opcional; si el estado del mercado no ha cambiado, se reutiliza el comentario.
+    El cronómetro recibe la duración de cada etapa.
+    '''
+    with cronometro.etapa('descarga'):
+        if anillo is not None:
+            df , pair = api.get_OHCL_data_anillo(pair, anillo)
+        elif almacen is not None:
+            df , pair = api.get_OHCL_data_incremental(pair, almacen)
+        else:
+            df , pair = api.get_OHCL_data(pair)
+
     if df.empty:
         print("No se pudieron obtener datos OHLC de Kraken API.")
         return
-    else : 
-        # Procesar los datos con Dataset
+
+    # Procesar los datos con Dataset
+    with cronometro.etapa('metricas'):
         data = Dataset(df)  # Crear un objeto Dataset con el DataFrame
-        df_metrics = data.get_metrics()  # Calcular las métricas clave
+        # Calcular solo las métricas clave que usan el gráfico y el comentario
+        df_metrics = data.get_metrics(indicators=Grafico.INDICADORES + INDICADORES_COMENTARIO, cache=cache)
+
+    with cronometro.etapa('grafico'):
         grafico = Grafico(df_metrics, pair)
-        grafico.candlestick_with_volume()
-        
-        comentario = generar_comentario_openai(df_metrics)
-        print(f"{comentario}")
+        grafico.candlestick_rapido()  # Reutiliza la figura del proceso en cada ciclo
+
+    with cronometro.etapa('comentario'):
+        comentario = generar_comentario_openai(df_metrics, cache=comentarios, pair=pair)
+    print(f"{comentario}")
+    if comentarios is not None:
+        print(comentarios.resumen())
+
+
+# Funciones de etapa del pipeline multipar. Cada una recibe lo que produce la anterior; las de CPU están a nivel de
+# módulo para poder ejecutarse en el pool de procesos.
+
+def calcular_metricas(descarga):
+    df, pair = descarga
+    return Dataset(df).get_metrics(indicators=Grafico.INDICADORES + INDICADORES_COMENTARIO), pair
+
+
+def renderizar(metricas):
+    df_metrics, pair = metricas
+    return pair, Grafico(df_metrics, pair).png_bytes()  # Cada proceso del pool conserva su propia figura
+
+
+def comentar(metricas, comentarios=None):
+    df_metrics, pair = metricas
+    return generar_comentario_openai(df_metrics, cache=comentarios, pair=pair)
+
+
+def ciclo_pares(api, pares, twitter=None, comentarios=None):
+    '''
+    Ejecuta el ciclo del bot para varios pares como pipeline: mientras un par se publica, el siguiente ya se está
+    descargando, y el gráfico (en el pool de procesos) y el comentario de OpenAI se generan a la vez.
+    - twitter: Cliente X_Conect para publicar cada par; si no se indica, solo se imprime el comentario.
+    - comentarios: CacheComentarios opcional, compartida por todos los pares.
+    Devuelve el Pipeline, con los tiempos de cada etapa.
+    '''
+    def publicar(resultado):
+        (pair, imagen), comentario = resultado
+        if twitter is not None:
+            twitter.post_tweet(comentario, imagen=imagen)
+        else:
+            print(f"{pair}: {comentario}")
+        return pair
+
+    pipeline = Pipeline([
+        Etapa('descarga', api.get_OHCL_data, hilos=2),
+        Etapa('metricas', EnProceso(calcular_metricas)),
+        Etapa('grafico_comentario', EnProceso(renderizar), lambda metricas: comentar(metricas, comentarios)),
+        Etapa('publicacion', publicar),
+    ])
+    pipeline.ejecutar(pares)
+    return pipeline
+
+
+def main():
+    # Inicializar la API de Kraken
+    api = Kraken_API()
+    cronometro = Cronometro()
+    ciclo(api, cronometro)
+    print(cronometro.resumen())
+
+
+def daemon(intervalo=60):
+    '''
+    Modo residente: los módulos, el cliente de Kraken y el anillo de velas se crean una sola vez y el ciclo se
+    repite en cada cierre de vela, descargando solo las velas nuevas y escribiéndolas en el anillo.
+    No se usa CacheMetricas: cada ciclo trae una vela nueva, así que las velas nunca se repiten entre ciclos.
+    '''
+    plt.switch_backend('Agg')  # Sin ventanas: las figuras solo se guardan en disco
+    api = Kraken_API()
+    anillo = AnilloVelas(capacidad=720)
+    comentarios = CacheComentarios(ttl=900)
+    programador = Programador(intervalo)
+    programador.ejecutar(lambda cronometro: ciclo(api, cronometro, anillo=anillo, comentarios=comentarios))
 
 
 
-   
 if __name__ == "__main__":
-    main()
+    if '--daemon' in sys.argv[1:]:
+        daemon()
+    elif '--pares' in sys.argv[1:]:
+        # python main.py --pares XBTUSD ETHUSD ...
+        pares = sys.argv[sys.argv.index('--pares') + 1:]
+        inicio = time.perf_counter()
+        pipeline = ciclo_pares(Kraken_API(), pares)
+        print(f"{len(pares)} pares en {time.perf_counter() - inicio:.2f} s ({pipeline.resumen()})")
+    else:
+        main()
@@ -0,0 +1,153 @@
+# models/agregador.py
+"""
+Construcción de velas OHLCV a partir de operaciones individuales (endpoint público Trades de Kraken).
+Permite intervalos que el endpoint OHLC no ofrece (1s, 15s...) y obtener varios intervalos de un único flujo de
+operaciones, sin una consulta OHLC por intervalo.
+"""
+import numpy as np
+import pandas as pd
+
+from api.kraken_api import COLUMNAS_OHLC
+
+
+class AgregadorTrades:
+    """
+    Acumula operaciones (precio, volumen, instante) en velas de un intervalo fijo.
+    Cada lote de operaciones se agrupa de forma vectorizada; la última vela queda abierta (acumuladores en curso) y
+    se cierra cuando llega una operación de un intervalo posterior o se llama a cerrar_hasta().
+    Las velas tienen las mismas columnas que las de Kraken_API.get_OHCL_data().
+    """
+
+    def __init__(self, intervalo='1m', max_velas=None):
+        """
+        Constructor de la clase AgregadorTrades.
+        - intervalo: Duración de cada vela, en segundos o como texto de pandas ('1s', '15s', '1min', '5min'...).
+        - max_velas: Número máximo de velas cerradas que se conservan (por defecto, todas).
+        """
+        segundos = pd.Timedelta(intervalo).total_seconds() if isinstance(intervalo, str) else float(intervalo)
+        if segundos <= 0 or segundos != int(segundos):
+            raise ValueError(f"Intervalo no válido: {intervalo}")
+        self.segundos = int(segundos)
+        self.max_velas = max_velas
+
+        self.__cerradas = []  # Lotes de velas cerradas: dicts de arrays con las columnas de COLUMNAS_OHLC
+        self.__actual = None  # Acumuladores de la vela abierta: [inicio, open, high, low, close, volumen, precio*volumen, count]
+
+    def procesar(self, precios, volumenes, tiempos):
+        """
+        Añade un lote de operaciones ordenadas por tiempo.
+        - precios, volumenes: Precio y volumen de cada operación.
+        - tiempos: Instante de cada operación en segundos epoch (pueden tener decimales).
+        Las operaciones anteriores a la vela abierta (repetidas o atrasadas) se descartan.
+        """
+        precios = np.asarray(precios, dtype=np.float64)
+        volumenes = np.asarray(volumenes, dtype=np.float64)
+        cubos = (np.asarray(tiempos, dtype=np.float64) // self.segundos).astype(np.int64) * self.segundos
+
+        if self.__actual is not None:
+            validas = cubos >= self.__actual[0]
+            precios, volumenes, cubos = precios[validas], volumenes[validas], cubos[validas]
+        n = len(precios)
+        if n == 0:
+            return
+
+        # Una vela por cada tramo de operaciones con el mismo intervalo
+        inicios = np.flatnonzero(np.r_[True, cubos[1:] != cubos[:-1]])
+        finales = np.r_[inicios[1:], n]
+        velas = {
+            'date': cubos[inicios],
+            'open': precios[inicios],
+            'high': np.maximum.reduceat(precios, inicios),
+            'low': np.minimum.reduceat(precios, inicios),
+            'close': precios[finales - 1],
+            'volume': np.add.reduceat(volumenes, inicios),
+            'pv': np.add.reduceat(precios * volumenes, inicios),
+            'count': finales - inicios,
+        }
+
+        # La primera vela del lote puede continuar la vela abierta
+        if self.__actual is not None:
+            inicio, apertura, maximo, minimo, _, volumen, pv, count = self.__actual
+            if velas['date'][0] == inicio:
+                velas['open'][0] = apertura
+                velas['high'][0] = max(maximo, velas['high'][0])
+                velas['low'][0] = min(minimo, velas['low'][0])
+                velas['volume'][0] += volumen
+                velas['pv'][0] += pv
+                velas['count'][0] += count
+            else:
+                self.__cerrar_actual()
+
+        ultima = len(inicios) - 1
+        self.__actual = [velas[columna][ultima] for columna in
+                         ('date', 'open', 'high', 'low', 'close', 'volume', 'pv', 'count')]
+        if ultima > 0:
+            self.__añadir_cerradas({columna: valores[:ultima] for columna, valores in velas.items()})
+
+    def cerrar_hasta(self, ahora):
+        """
+        Cierra la vela abierta si su intervalo ya terminó en el instante `ahora` (segundos epoch), aunque no hayan
+        llegado operaciones posteriores.
+        """
+        if self.__actual is not None and ahora >= self.__actual[0] + self.segundos:
+            self.__cerrar_actual()
+
+    def __cerrar_actual(self):
+        self.__añadir_cerradas({columna: np.array([valor]) for columna, valor in
+                                zip(('date', 'open', 'high', 'low', 'close', 'volume', 'pv', 'count'), self.__actual)})
+        self.__actual = None
+
+    def __añadir_cerradas(self, velas):
+        self.__cerradas.append(velas)
+        if self.max_velas is not None and len(self.__cerradas) > 1:
+            total = sum(len(lote['date']) for lote in self.__cerradas)
+            if total > 2 * self.max_velas:  # Se compacta de vez en cuando, no en cada lote
+                self.__cerradas = [{columna: np.concatenate([lote[columna] for lote in self.__cerradas])[-self.max_velas:]
+                                    for columna in velas}]
+
+    def velas(self, incluir_actual=False):
+        """
+        Devuelve las velas como DataFrame con las columnas de Kraken_API.get_OHCL_data().
+        Los intervalos sin operaciones se rellenan con una vela plana al cierre anterior, con volumen 0 y count 0.
+        - incluir_actual: Si es True, se incluye también la vela abierta (todavía incompleta) al final.
+        """
+        lotes = list(self.__cerradas)
+        if incluir_actual and self.__actual is not None:
+            lotes.append({columna: np.array([valor]) for columna, valor in
+                          zip(('date', 'open', 'high', 'low', 'close', 'volume', 'pv', 'count'), self.__actual)})
+        if not lotes:
+            return pd.DataFrame({columna: pd.Series(dtype=tipo) for columna, tipo in
+                                 zip(COLUMNAS_OHLC, ['datetime64[ns]'] + ['float64'] * 6 + ['int64'])})
+
+        velas = {columna: np.concatenate([lote[columna] for lote in lotes]) for columna in lotes[0]}
+        if self.max_velas is not None:
+            velas = {columna: valores[-self.max_velas:] for columna, valores in velas.items()}
+
+        # Rejilla completa de intervalos entre la primera y la última vela. Los intervalos vacíos entre la última vela
+        # cerrada y la abierta también están cerrados, aunque no se incluya la abierta
+        fin = velas['date'][-1] + self.segundos
+        if not incluir_actual and self.__actual is not None:
+            fin = max(fin, self.__actual[0])
+        rejilla = np.arange(velas['date'][0], fin, self.segundos)
+        posiciones = (velas['date'] - velas['date'][0]) // self.segundos
+        con_datos = np.zeros(len(rejilla), dtype=bool)
+        con_datos[posiciones] = True
+        previa = np.maximum.accumulate(np.where(con_datos, np.arange(len(rejilla)), 0))  # Última vela con datos
+        cierre_previo = np.empty(len(rejilla))
+        cierre_previo[posiciones] = velas['close']
+        cierre_previo = cierre_previo[previa]
+
+        df = {'date': rejilla}
+        for columna in ('open', 'high', 'low', 'close'):
+            df[columna] = cierre_previo.copy()
+            df[columna][posiciones] = velas[columna]
+        df['volume'] = np.zeros(len(rejilla))
+        df['volume'][posiciones] = velas['volume']
+        df['vwap'] = cierre_previo.copy()
+        df['vwap'][posiciones] = velas['pv'] / velas['volume']
+        df['count'] = np.zeros(len(rejilla), dtype=np.int64)
+        df['count'][posiciones] = velas['count']
+
+        # Misma conversión de fechas que ohlc_a_dataframe: segundos epoch + 1 hora de desfase horario
+        df['date'] = df['date'].astype('datetime64[s]').astype('datetime64[ns]') + np.timedelta64(1, 'h')
+        return pd.DataFrame(df, columns=COLUMNAS_OHLC)
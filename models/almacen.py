@@ -0,0 +1,109 @@
+# models/almacen.py
+"""
+Almacén local de velas OHLC, persistido en un CSV por par.
+Permite descargar de Kraken solo las velas nuevas (parámetro `since` con el cursor `last` de la consulta anterior)
+y fusionarlas con el histórico, que así puede crecer más allá de las 720 velas que devuelve cada consulta.
+"""
+import json
+import os
+
+import pandas as pd
+
+COLUMNAS_VELA = ['date', 'open', 'high', 'low', 'close', 'vwap', 'volume', 'count']
+COLUMNAS_NUMERICAS = ['open', 'high', 'low', 'close', 'vwap', 'volume']
+
+
+class AlmacenVelas:
+    """
+    Histórico de velas por par. En disco solo se guardan velas cerradas, añadiéndolas al final del CSV; la última vela
+    de cada consulta de Kraken todavía se está formando, así que se mantiene en memoria y se sustituye en la siguiente
+    fusión. Los cursores `last` de Kraken se guardan en cursores.json para poder continuar tras reiniciar el proceso.
+    """
+
+    def __init__(self, directorio='datos', interval=1, max_velas=None):
+        """
+        Constructor de la clase AlmacenVelas.
+        - directorio: Carpeta donde se guardan los CSV y los cursores.
+        - interval: Intervalo de las velas en minutos (forma parte del nombre de los ficheros).
+        - max_velas: Número máximo de velas que se devuelven y se mantienen en memoria (por defecto, todas).
+          En disco se conserva siempre el histórico completo.
+        """
+        self.directorio = directorio
+        self.interval = interval
+        self.max_velas = max_velas
+        os.makedirs(directorio, exist_ok=True)
+
+        self.__velas = {}  # par -> DataFrame con las velas cerradas y la que se está formando
+        self.__guardadas = {}  # par -> fecha de la última vela escrita en disco
+
+        self.__ruta_cursores = os.path.join(directorio, f'cursores_{interval}m.json')
+        self.__cursores = {}
+        if os.path.exists(self.__ruta_cursores):
+            with open(self.__ruta_cursores) as f:
+                self.__cursores = json.load(f)
+
+    def __ruta(self, pair):
+        return os.path.join(self.directorio, f'{pair}_{self.interval}m.csv')
+
+    def cursor(self, pair):
+        """
+        Devuelve el cursor `last` de la última consulta del par (para usarlo como `since`), o None si no hay histórico.
+        """
+        if pair not in self.__cursores or not os.path.exists(self.__ruta(pair)):
+            return None
+        return self.__cursores[pair]
+
+    def cargar(self, pair):
+        """
+        Devuelve el histórico del par (vacío si no hay ninguno).
+        """
+        if pair not in self.__velas:
+            ruta = self.__ruta(pair)
+            if os.path.exists(ruta):
+                velas = pd.read_csv(ruta, parse_dates=['date'])
+            else:
+                velas = pd.DataFrame({columna: pd.Series(dtype=float) for columna in COLUMNAS_VELA})
+                velas['date'] = pd.Series(dtype='datetime64[ns]')
+            self.__velas[pair] = velas
+            self.__guardadas[pair] = velas['date'].iloc[-1] if len(velas) else None
+        velas = self.__velas[pair]
+        return velas if self.max_velas is None else velas.tail(self.max_velas).reset_index(drop=True)
+
+    def fusionar(self, pair, nuevas, last=None):
+        """
+        Añade al histórico del par las velas de una consulta a Kraken y devuelve el histórico actualizado.
+        Las velas con la misma fecha que una ya guardada la sustituyen (caso de la vela que se estaba formando).
+        - nuevas: DataFrame de velas (ohlc_a_dataframe).
+        - last: Cursor `last` devuelto por Kraken en la misma consulta.
+        """
+        self.cargar(pair)
+        nuevas = nuevas[COLUMNAS_VELA].astype({columna: float for columna in COLUMNAS_NUMERICAS})
+        nuevas = nuevas.astype({'count': 'int64'})
+
+        velas = self.__velas[pair]
+        if len(nuevas):
+            velas = pd.concat([velas[velas['date'] < nuevas['date'].iloc[0]], nuevas], ignore_index=True)
+            velas = velas.drop_duplicates(subset='date', keep='last')
+            if not velas['date'].is_monotonic_increasing:
+                velas = velas.sort_values('date')
+            velas = velas.reset_index(drop=True)
+
+        # Las velas cerradas (todas menos la última) que aún no están en disco se añaden al CSV
+        guardada = self.__guardadas.get(pair)
+        cerradas = velas.iloc[:-1]
+        pendientes = cerradas if guardada is None else cerradas[cerradas['date'] > guardada]
+        if len(pendientes):
+            ruta = self.__ruta(pair)
+            pendientes.to_csv(ruta, mode='a', header=not os.path.exists(ruta), index=False)
+            self.__guardadas[pair] = pendientes['date'].iloc[-1]
+
+        if self.max_velas is not None:
+            velas = velas.tail(self.max_velas).reset_index(drop=True)
+        self.__velas[pair] = velas
+
+        if last is not None:
+            self.__cursores[pair] = last
+            with open(self.__ruta_cursores, 'w') as f:
+                json.dump(self.__cursores, f)
+
+        return velas
@@ -0,0 +1,119 @@
+# models/anillo.py
+"""
+Anillo de velas de capacidad fija para el modo residente.
+En lugar de reconstruir un DataFrame con todo el histórico en cada ciclo, las velas se guardan en arrays de NumPy
+preasignados (uno por columna) y cada vela nueva se escribe en su sitio en O(1). Cada posición se escribe dos veces,
+en i y en i + capacidad, de modo que las últimas n velas siempre forman un tramo contiguo del array: se pueden leer
+como vistas, sin copiar ni reordenar.
+"""
+import numpy as np
+import pandas as pd
+
+from api.kraken_api import COLUMNAS_OHLC
+
+# Columnas de precios, en el orden de las filas del bloque float64
+COLUMNAS_PRECIOS = COLUMNAS_OHLC[1:7]
+
+# Desfase que Kraken_API.get_OHCL_data() suma a las fechas de Kraken
+DESFASE = np.timedelta64(1, 'h')
+
+
+class AnilloVelas:
+    """
+    Últimas `capacidad` velas de un par como struct-of-arrays: fechas (datetime64[ns]), precios (un bloque float64
+    con una fila contigua por columna) y número de operaciones (int64).
+    Las vistas que devuelven vistas() y dataframe() comparten memoria con el anillo: son válidas hasta la siguiente
+    escritura, que puede sobrescribir la vela más antigua.
+    """
+
+    def __init__(self, capacidad=720):
+        """
+        Constructor de la clase AnilloVelas.
+        - capacidad: Número de velas que se conservan. Debe cubrir el calentamiento de los indicadores que se piden
+          (200 velas para SMA_200) más las filas que se muestran; por defecto, las 720 que devuelve cada consulta de
+          Kraken, con lo que las métricas coinciden con las de get_OHCL_data().
+        """
+        if capacidad < 1:
+            raise ValueError("La capacidad del anillo debe ser al menos 1")
+        self.capacidad = capacidad
+        self.__fechas = np.zeros(2 * capacidad, dtype='datetime64[ns]')
+        self.__precios = np.zeros((len(COLUMNAS_PRECIOS), 2 * capacidad), dtype=np.float64)
+        self.__count = np.zeros(2 * capacidad, dtype=np.int64)
+        self.__posicion = 0  # Posición (0 .. capacidad - 1) donde se escribe la siguiente vela
+        self.__n = 0  # Velas guardadas (como mucho, la capacidad)
+
+    def __len__(self):
+        return self.__n
+
+    def ultima_fecha(self):
+        """Devuelve la fecha de la última vela (con el desfase de get_OHCL_data), o None si el anillo está vacío."""
+        return self.__fechas[self.__posicion - 1 + self.capacidad] if self.__n else None
+
+    def __escribir(self, posicion, fecha, precios, count):
+        for i in (posicion, posicion + self.capacidad):
+            self.__fechas[i] = fecha
+            self.__precios[:, i] = precios
+            self.__count[i] = count
+
+    def agregar(self, tiempo, open_, high, low, close, vwap, volume, count):
+        """
+        Añade una vela (tiempo en segundos epoch, como lo da Kraken). Si tiene la misma fecha que la última, la
+        sustituye: es la vela que seguía abierta en la consulta anterior. Las velas anteriores a la última se ignoran.
+        """
+        fecha = np.datetime64(int(tiempo), 's') + DESFASE
+        ultima = self.ultima_fecha()
+        if ultima is not None and fecha < ultima:
+            return
+        if ultima is not None and fecha == ultima:
+            posicion = self.__posicion - 1
+        else:
+            posicion = self.__posicion
+            self.__posicion = (self.__posicion + 1) % self.capacidad
+            self.__n = min(self.__n + 1, self.capacidad)
+        self.__escribir(posicion % self.capacidad, fecha, (open_, high, low, close, vwap, volume), count)
+
+    def extender(self, arrays):
+        """
+        Añade varias velas de golpe a partir de los arrays de ohlc_a_arrays() (fechas en segundos epoch).
+        Igual que agregar(): la primera puede sustituir a la última del anillo y las anteriores se ignoran.
+        """
+        fechas = arrays['date'].astype('datetime64[s]').astype('datetime64[ns]') + DESFASE
+        ultima = self.ultima_fecha()
+        desde = 0 if ultima is None else int(np.searchsorted(fechas, ultima))
+        if desde == len(fechas):
+            return
+        if ultima is not None and fechas[desde] == ultima:
+            # La vela abierta de la consulta anterior se reescribe en su sitio
+            self.__posicion = (self.__posicion - 1) % self.capacidad
+            self.__n -= 1
+        desde = max(desde, len(fechas) - self.capacidad)  # Solo caben las últimas `capacidad`
+
+        k = len(fechas) - desde
+        posiciones = (self.__posicion + np.arange(k)) % self.capacidad
+        for destino in (posiciones, posiciones + self.capacidad):
+            self.__fechas[destino] = fechas[desde:]
+            for j, columna in enumerate(COLUMNAS_PRECIOS):
+                self.__precios[j, destino] = arrays[columna][desde:]
+            self.__count[destino] = arrays['count'][desde:]
+        self.__posicion = (self.__posicion + k) % self.capacidad
+        self.__n = min(self.__n + k, self.capacidad)
+
+    def vistas(self, n=None):
+        """
+        Devuelve las últimas n velas (por defecto, todas) como {columna: array}, vistas contiguas sin copia, con las
+        columnas de Kraken_API.get_OHCL_data().
+        """
+        n = self.__n if n is None else min(n, self.__n)
+        fin = self.__posicion + self.capacidad
+        tramo = slice(fin - n, fin)
+        vistas = {'date': self.__fechas[tramo]}
+        vistas.update((columna, self.__precios[j, tramo]) for j, columna in enumerate(COLUMNAS_PRECIOS))
+        vistas['count'] = self.__count[tramo]
+        return vistas
+
+    def dataframe(self, n=None):
+        """
+        Devuelve las últimas n velas como DataFrame de get_OHCL_data() construido sobre las vistas, sin copiar las
+        columnas. Dataset no lo modifica (astype con copy=False no copia columnas que ya son float64).
+        """
+        return pd.DataFrame(self.vistas(n), columns=COLUMNAS_OHLC, copy=False)
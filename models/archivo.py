@@ -0,0 +1,106 @@
+# models/archivo.py
+"""
+Archivo histórico de velas en Parquet, particionado por par y día (pair=XBTUSD/dia=2024-01-31/velas.parquet).
+Está pensado para backtests largos: las lecturas se hacen con memoria mapeada y filtrando por rango de fechas, de modo
+que solo se abren los días pedidos y, dentro de ellos, solo los grupos de filas que caen en el rango.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.fs
+import pyarrow.parquet as pq
+
+# Esquema de las velas en disco: precios en float64 y fechas con resolución de segundos, como en Kraken
+ESQUEMA = pa.schema([
+    ('date', pa.timestamp('s')),
+    ('open', pa.float64()),
+    ('high', pa.float64()),
+    ('low', pa.float64()),
+    ('close', pa.float64()),
+    ('vwap', pa.float64()),
+    ('volume', pa.float64()),
+    ('count', pa.int64()),
+])
+
+
+class ArchivoVelas:
+    """
+    Archivo de velas particionado por par y día. Cada partición es un único fichero Parquet con las velas del día
+    ordenadas por fecha; al añadir velas de un día ya guardado se fusionan (la vela nueva sustituye a la que tenga la
+    misma fecha) y se reescribe solo ese día.
+    """
+
+    def __init__(self, directorio='archivo'):
+        """
+        Constructor de la clase ArchivoVelas.
+        - directorio: Carpeta raíz del archivo.
+        """
+        self.directorio = directorio
+        os.makedirs(directorio, exist_ok=True)
+        self.__fs = pyarrow.fs.LocalFileSystem(use_mmap=True)
+
+    def __ruta(self, pair, dia):
+        return os.path.join(self.directorio, f'pair={pair}', f'dia={dia}', 'velas.parquet')
+
+    @staticmethod
+    def __a_tabla(df):
+        df = df[ESQUEMA.names].astype({columna: np.float64 for columna in ESQUEMA.names[1:-1]})
+        df = df.astype({'count': np.int64, 'date': 'datetime64[s]'})
+        return pa.Table.from_pandas(df, schema=ESQUEMA, preserve_index=False)
+
+    def guardar(self, pair, df):
+        """
+        Añade al archivo las velas de un DataFrame (como los de Kraken_API.get_OHCL_data).
+        """
+        if df.empty:
+            return
+        df = df.assign(date=pd.to_datetime(df['date']))
+        for dia, velas in df.groupby(df['date'].dt.strftime('%Y-%m-%d'), sort=False):
+            ruta = self.__ruta(pair, dia)
+            if os.path.exists(ruta):
+                previas = pq.read_table(ruta, memory_map=True).to_pandas()
+                velas = pd.concat([previas, velas], ignore_index=True)
+            velas = velas.drop_duplicates(subset='date', keep='last').sort_values('date')
+
+            os.makedirs(os.path.dirname(ruta), exist_ok=True)
+            temporal = ruta + '.tmp'
+            pq.write_table(self.__a_tabla(velas), temporal, row_group_size=360)  # Un grupo de filas cada 6 horas de velas de 1 minuto
+            os.replace(temporal, ruta)
+
+    def pares(self):
+        """
+        Devuelve los pares que tienen velas en el archivo.
+        """
+        return sorted(nombre.split('=', 1)[1] for nombre in os.listdir(self.directorio) if nombre.startswith('pair='))
+
+    def cargar(self, pair, desde=None, hasta=None):
+        """
+        Devuelve las velas del par con fecha en [desde, hasta] (ambos opcionales), ordenadas por fecha, con las
+        columnas que espera Dataset.
+        """
+        carpeta = os.path.join(self.directorio, f'pair={pair}')
+        if not os.path.isdir(carpeta):
+            return pd.DataFrame({columna: pd.Series(dtype=tipo.to_pandas_dtype())
+                                 for columna, tipo in zip(ESQUEMA.names, ESQUEMA.types)})
+
+        # Se descartan primero los días fuera del rango (por el nombre de la partición) y luego las filas
+        filtro = None
+        if desde is not None:
+            desde = pd.Timestamp(desde)
+            filtro = (ds.field('dia') >= desde.strftime('%Y-%m-%d')) & (ds.field('date') >= desde.to_datetime64())
+        if hasta is not None:
+            hasta = pd.Timestamp(hasta)
+            condicion = (ds.field('dia') <= hasta.strftime('%Y-%m-%d')) & (ds.field('date') <= hasta.to_datetime64())
+            filtro = condicion if filtro is None else filtro & condicion
+
+        particiones = ds.partitioning(pa.schema([('dia', pa.string())]), flavor='hive')
+        dataset = ds.dataset(carpeta, schema=ESQUEMA.append(pa.field('dia', pa.string())), format='parquet',
+                             partitioning=particiones, filesystem=self.__fs)
+        tabla = dataset.to_table(columns=ESQUEMA.names, filter=filtro)
+
+        df = tabla.to_pandas()
+        df['date'] = df['date'].astype('datetime64[ns]')
+        return df.sort_values('date', ignore_index=True)
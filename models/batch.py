@@ -0,0 +1,99 @@
+# models/batch.py
+"""
+Cálculo de Dataset.get_metrics() para muchos pares a la vez en un pool de procesos.
+Los precios de todos los pares se copian una sola vez a un bloque de memoria compartida; cada proceso recibe solo
+el nombre del bloque y la posición de su par, de modo que los DataFrames de entrada no se serializan.
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from models.dataset import Dataset
+
+# Columnas numéricas que se copian a la memoria compartida, en este orden
+COLUMNAS_COMPARTIDAS = ('open', 'high', 'low', 'close', 'vwap', 'volume', 'count')
+
+
+def _empaquetar(frames):
+    """
+    Copia los precios de todos los pares a un bloque de memoria compartida con dos regiones contiguas:
+    las fechas en nanosegundos (int64, filas) y los precios (float64, filas x columnas).
+    Devuelve el bloque y, por par, la posición (inicio, fin) de sus filas.
+    """
+    total = sum(len(df) for df in frames.values())
+    ancho = len(COLUMNAS_COMPARTIDAS)
+    memoria = shared_memory.SharedMemory(create=True, size=max(total * 8 * (ancho + 1), 1))
+
+    fechas = np.ndarray((total,), dtype=np.int64, buffer=memoria.buf)
+    precios = np.ndarray((total, ancho), dtype=np.float64, buffer=memoria.buf, offset=total * 8)
+
+    posiciones = {}
+    inicio = 0
+    for pair, df in frames.items():
+        fin = inicio + len(df)
+        fechas[inicio:fin] = pd.to_datetime(df['date']).to_numpy(dtype='datetime64[ns]').view(np.int64)
+        for j, columna in enumerate(COLUMNAS_COMPARTIDAS):
+            precios[inicio:fin, j] = pd.to_numeric(df[columna]).to_numpy(dtype=np.float64)
+        posiciones[pair] = (inicio, fin)
+        inicio = fin
+    return memoria, total, posiciones
+
+
+def _metricas_par(nombre, total, inicio, fin, indicators):
+    """
+    Proceso de trabajo: reconstruye el DataFrame del par a partir de la memoria compartida, calcula sus métricas
+    y devuelve (DataFrame de métricas, segundos de cálculo).
+    """
+    memoria = shared_memory.SharedMemory(name=nombre)
+    try:
+        fechas = np.ndarray((total,), dtype=np.int64, buffer=memoria.buf)
+        precios = np.ndarray((total, len(COLUMNAS_COMPARTIDAS)), dtype=np.float64, buffer=memoria.buf, offset=total * 8)
+
+        # Copia de las filas del par: el DataFrame no puede seguir apuntando a la memoria compartida al cerrarla
+        df = pd.DataFrame(precios[inicio:fin].copy(), columns=list(COLUMNAS_COMPARTIDAS))
+        df.insert(0, 'date', pd.to_datetime(fechas[inicio:fin].copy()))
+        df['count'] = df['count'].astype(np.int64)
+    finally:
+        memoria.close()
+
+    t0 = time.perf_counter()
+    df_metrics = Dataset(df).get_metrics(indicators=indicators)
+    return df_metrics, time.perf_counter() - t0
+
+
+def calcular_metricas_pares(frames, indicators=None, max_workers=None):
+    """
+    Calcula Dataset.get_metrics() para varios pares en paralelo.
+    - frames: {par: DataFrame OHLC} tal como los devuelve Kraken_API.get_OHCL_data().
+    - indicators: Indicadores a calcular (ver Dataset.get_metrics). Por defecto, todos.
+    - max_workers: Número de procesos. Por defecto, el número de núcleos.
+    Devuelve ({par: DataFrame de métricas}, {par: segundos de cálculo}). Los pares cuyo cálculo falla se informan por
+    consola y no aparecen en el resultado.
+    """
+    frames = {pair: df for pair, df in frames.items() if not df.empty}
+    if not frames:
+        return {}, {}
+
+    max_workers = min(max_workers or os.cpu_count() or 1, len(frames))
+    memoria, total, posiciones = _empaquetar(frames)
+    metricas, tiempos = {}, {}
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futuros = {pair: pool.submit(_metricas_par, memoria.name, total, inicio, fin, indicators)
+                       for pair, (inicio, fin) in posiciones.items()}
+            for pair, futuro in futuros.items():
+                try:
+                    metricas[pair], tiempos[pair] = futuro.result()
+                except Exception as e:
+                    print(f"Error al calcular las métricas de {pair}: {e}")
+    finally:
+        memoria.close()
+        memoria.unlink()
+
+    for pair, segundos in tiempos.items():
+        print(f"{pair}: métricas calculadas en {segundos * 1000:.1f} ms")
+    return metricas, tiempos
@@ -0,0 +1,136 @@
+# models/cache_metricas.py
+"""
+Caché de resultados de Dataset.get_metrics() direccionada por contenido.
+La clave es una huella (BLAKE2b) de las columnas de precios que se usan en el cálculo más la configuración de
+indicadores, así que dos llamadas con las mismas velas y los mismos indicadores comparten el resultado aunque vengan de
+DataFrames distintos o de otra ejecución. Solo se reutilizan ventanas idénticas byte a byte: con una vela nueva (o una
+ventana que empieza en otra vela) cambia la huella y se recalcula todo, también el tramo histórico que no ha cambiado. Hay un nivel en memoria (LRU) y otro opcional en disco (un fichero Arrow IPC
+sin comprimir por entrada, que se lee con memoria mapeada en unos pocos milisegundos, bastante menos que Parquet para
+resultados de pocas filas); los dos se limitan por tamaño y descartan primero las entradas menos usadas.
+"""
+import hashlib
+import os
+from collections import OrderedDict
+
+import numpy as np
+import pyarrow.feather as feather
+
+# Cambia la huella de todas las entradas: hay que incrementarlo si cambia el cálculo de algún indicador
+VERSION = 2
+
+
+def huella(precios, configuracion):
+    """
+    Huella hexadecimal de las columnas de precios de un DataFrame (nombre, tipo y bytes de cada una) y de una
+    configuración representable con repr() (indicadores, filas...).
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr((VERSION, configuracion)).encode())
+    for columna in precios.columns:
+        valores = np.ascontiguousarray(precios[columna].to_numpy())
+        if valores.dtype == object:  # Precios como texto: se recorren como valores de Python
+            valores = np.asarray([str(v) for v in valores])
+        h.update(f'{columna}:{valores.dtype.str}:{len(valores)}'.encode())
+        h.update(valores.view(np.uint8))
+    return h.hexdigest()
+
+
+class CacheMetricas:
+    """
+    Resultados de get_metrics() por huella, en una LRU en memoria y, si se indica un directorio, también en disco para
+    conservarlos entre ejecuciones. Los resultados se devuelven como copias: modificarlos no altera la caché.
+    """
+
+    def __init__(self, max_bytes=256 * 2**20, directorio=None, max_bytes_disco=2**30):
+        """
+        Constructor de la clase CacheMetricas.
+        - max_bytes: Tamaño máximo de los DataFrames guardados en memoria.
+        - directorio: Carpeta del nivel en disco; sin ella, la caché solo vive en memoria.
+        - max_bytes_disco: Tamaño máximo de los ficheros del nivel en disco.
+        """
+        self.max_bytes = max_bytes
+        self.directorio = directorio
+        self.max_bytes_disco = max_bytes_disco
+        self.aciertos_memoria = 0
+        self.aciertos_disco = 0
+        self.fallos = 0
+
+        self.__memoria = OrderedDict()  # huella -> (DataFrame, bytes)
+        self.__bytes = 0
+        self.__bytes_disco = 0
+        if directorio is not None:
+            os.makedirs(directorio, exist_ok=True)
+            self.__bytes_disco = sum(os.path.getsize(ruta) for ruta in self.__ficheros())
+
+    def __ruta(self, clave):
+        return os.path.join(self.directorio, f'{clave}.arrow')
+
+    def __ficheros(self):
+        return [entrada.path for entrada in os.scandir(self.directorio) if entrada.name.endswith('.arrow')]
+
+    def __guardar_memoria(self, clave, df):
+        tamano = int(df.memory_usage(deep=True).sum())
+        if tamano > self.max_bytes:
+            return
+        if clave in self.__memoria:
+            self.__bytes -= self.__memoria.pop(clave)[1]
+        self.__memoria[clave] = (df, tamano)
+        self.__bytes += tamano
+        while self.__bytes > self.max_bytes:
+            self.__bytes -= self.__memoria.popitem(last=False)[1][1]
+
+    def __expulsar_disco(self):
+        """Borra los ficheros usados hace más tiempo (por fecha de modificación) hasta caber en max_bytes_disco."""
+        if self.__bytes_disco <= self.max_bytes_disco:
+            return
+        for ruta in sorted(self.__ficheros(), key=os.path.getmtime):
+            if self.__bytes_disco <= self.max_bytes_disco:
+                break
+            try:
+                tamano = os.path.getsize(ruta)
+                os.remove(ruta)
+                self.__bytes_disco -= tamano
+            except OSError:
+                pass
+
+    def get(self, clave):
+        """Devuelve una copia del resultado guardado con la huella, o None si no está en ningún nivel."""
+        if clave in self.__memoria:
+            self.__memoria.move_to_end(clave)
+            self.aciertos_memoria += 1
+            return self.__memoria[clave][0].copy()
+
+        if self.directorio is not None and os.path.exists(self.__ruta(clave)):
+            try:
+                df = feather.read_table(self.__ruta(clave), memory_map=True).to_pandas()
+            except (OSError, ValueError):  # Fichero a medio escribir o dañado: se trata como un fallo
+                df = None
+            if df is not None:
+                os.utime(self.__ruta(clave))  # La fecha de modificación hace de marca de uso para la expulsión
+                self.__guardar_memoria(clave, df)
+                self.aciertos_disco += 1
+                return df.copy()
+
+        self.fallos += 1
+        return None
+
+    def guardar(self, clave, df):
+        """Guarda una copia del resultado con la huella en memoria y, si hay directorio, en disco."""
+        df = df.copy()
+        self.__guardar_memoria(clave, df)
+        if self.directorio is None:
+            return
+        ruta = self.__ruta(clave)
+        temporal = f'{ruta}.{os.getpid()}.tmp'
+        feather.write_feather(df, temporal, compression='uncompressed')
+        if os.path.exists(ruta):
+            self.__bytes_disco -= os.path.getsize(ruta)
+        os.replace(temporal, ruta)  # Otro proceso nunca ve un fichero a medio escribir
+        self.__bytes_disco += os.path.getsize(ruta)
+        self.__expulsar_disco()
+
+    def resumen(self):
+        """Devuelve los aciertos por nivel, los fallos y lo que ocupa cada nivel, como texto."""
+        return (f'aciertos: {self.aciertos_memoria} en memoria, {self.aciertos_disco} en disco; fallos: {self.fallos}; '
+                f'{len(self.__memoria)} entradas, {self.__bytes / 1e6:.1f} MB en memoria, '
+                f'{self.__bytes_disco / 1e6:.1f} MB en disco')
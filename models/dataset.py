@@ -1,5 +1,60 @@
 import pandas as pd
 import numpy as np
+from models import formulas
+from models.cache_metricas import huella
+from models.streaming import IndicadoresIncrementales, VentanaFilas
+
+# Columnas de precios del DataFrame de entrada (las que devuelve Kraken_API.get_OHCL_data)
+COLUMNAS_PRECIOS = ('date', 'open', 'high', 'low', 'close', 'vwap', 'volume', 'count')
+
+# Cota del error relativo del modo compacto (float32): cada columna se calcula en float64 y se redondea una sola vez
+# a float32, con error relativo <= 2^-24. Las Bandas de Bollinger y los Canales de Keltner suman además la SMA o el ATR
+# ya guardados en float32, así que su cota es 2^-23 (ver Dataset.__init__)
+COTA_ERROR_COMPACTO = 2.0 ** -23
+
+# Peso máximo que puede conservar el valor inicial de una EWM para darla por convergida (ver Dataset.calentamiento)
+TOLERANCIA_EWM = 1e-6
+
+
+def velas_convergencia_ewm(span, tolerancia=TOLERANCIA_EWM):
+    """
+    Número de velas tras las que una EWM (adjust=False) con el span dado pesa menos de `tolerancia` su valor inicial:
+    el menor n con (1 - alpha)^n <= tolerancia, con alpha = 2 / (span + 1).
+    """
+    return int(np.ceil(np.log(tolerancia) / np.log(1 - 2 / (span + 1))))
+
+def compactar_precios(precios):
+    """
+    Devuelve las columnas de precios con los tipos del modo compacto: precios y volumen en float32, 'count' en int32 y
+    'date' como minutos epoch en int32 (ver minutos_a_fechas). Las demás columnas se dejan como están.
+    """
+    tipos = {columna: np.float32 for columna in ('open', 'high', 'low', 'close', 'vwap', 'volume') if columna in precios}
+    if 'count' in precios:
+        tipos['count'] = np.int32
+    compactos = precios.astype(tipos)
+    if 'date' in compactos and np.issubdtype(compactos['date'].dtype, np.datetime64):
+        minutos = compactos['date'].to_numpy(dtype='datetime64[ns]').astype('datetime64[m]').astype(np.int64)
+        compactos['date'] = minutos.astype(np.int32)
+    return compactos
+
+
+def _compactar_fila(fila):
+    """
+    Versión de compactar_precios para una fila ({columna: valor}) de update(): floats a float32, 'count' a int32 y
+    'date' a minutos epoch.
+    """
+    compacta = {columna: np.float32(valor) if isinstance(valor, float) else valor for columna, valor in fila.items()}
+    if 'count' in compacta:
+        compacta['count'] = np.int32(compacta['count'])
+    if isinstance(compacta.get('date'), (pd.Timestamp, np.datetime64)):
+        compacta['date'] = np.int32(np.datetime64(compacta['date'], 'm').astype(np.int64))
+    return compacta
+
+
+def minutos_a_fechas(minutos):
+    """Convierte la columna 'date' del modo compacto (minutos epoch) en fechas datetime64[ns]."""
+    return np.asarray(minutos, dtype=np.int64).astype('datetime64[m]').astype('datetime64[ns]')
+
 
 class Dataset:
     """
@@ -7,58 +62,177 @@ class Dataset:
     Proporciona métodos para calcular indicadores técnicos como SMA, MACD, Bandas de Bollinger, RSI, ADX,
     Estocástico, Momentum, CCI, ROC, Williams %R, Vortex Indicator, Retrocesos de Fibonacci, Pivot Points,
     Canales de Donchian, Heikin-Ashi, Parabolic SAR y el Precio Promedio.
-    
-    Los indicadores técnicos se calculan sobre el DataFrame proporcionado y se añaden como columnas.
+
+    Los indicadores técnicos se calculan en un bloque columnar (una matriz preasignada, float64 o float32 en modo
+    compacto, una columna por indicador) y el DataFrame de salida se construye una sola vez al final de get_metrics().
     """
 
-    def __init__(self, df):
+    # Grafo de intermedios compartidos entre indicadores: nombre -> (dependencias, función).
+    # Las dependencias son columnas de precios u otros intermedios. Los parámetros extra (p. ej. el periodo)
+    # se pasan a la función después de las dependencias y forman parte de la clave de memoización.
+    INTERMEDIOS = {
+        'close_prev': (('close',), lambda close: close.shift(1)),
+        'high_prev': (('high',), lambda high: high.shift(1)),
+        'low_prev': (('low',), lambda low: low.shift(1)),
+        'TR': (('high', 'low', 'close_prev'),
+               lambda high, low, close_prev: np.maximum(np.maximum(high - low, np.abs(high - close_prev)),
+                                                        np.abs(low - close_prev))),
+        'typical_price': (('high', 'low', 'close'), lambda high, low, close: (high + low + close) / 3),
+        'delta': (('close',), lambda close: close.diff()),
+        'gain': (('delta',), lambda delta: delta.where(delta > 0, 0)),
+        'loss': (('delta',), lambda delta: -delta.where(delta < 0, 0)),
+        'high_max': (('high',), lambda high, period: high.rolling(window=period).max()),
+        'low_min': (('low',), lambda low, period: low.rolling(window=period).min()),
+    }
+
+    def __init__(self, df, compacto=False):
         """
         Constructor de la clase Dataset.
         Toma un DataFrame con datos de precios históricos que debe incluir las columnas: 'open', 'high', 'low', 'close', 'volume'.
+        - compacto: Modo de memoria reducida para históricos largos. Los cálculos (sumas móviles, EWM...) se siguen
+          haciendo en float64, pero los indicadores se guardan en float32 y get_metrics() devuelve los precios en
+          float32, 'date' como minutos epoch en int32 y 'count' en int32: menos de la mitad de memoria por fila.
+          El error relativo de cada valor respecto al modo normal está acotado por COTA_ERROR_COMPACTO.
         """
-        
-        # Convertimos las columnas numéricas a tipo float para evitar errores de tipo
-        df.close = df.close.astype(float)
-        df.open = df.open.astype(float)
-        df.high = df.high.astype(float)
-        df.low = df.low.astype(float)
-        df.vwap = df.vwap.astype(float)
-        df.volume = df.volume.astype(float)
+        self.compacto = compacto
+
+        # Convertimos las columnas numéricas a tipo float para evitar errores de tipo. astype devuelve un DataFrame
+        # nuevo, así que el del llamador no se modifica; si las columnas ya son float64 no se copian
+        df = df.astype({columna: float for columna in ('close', 'open', 'high', 'low', 'vwap', 'volume')}, copy=False)
         self.data = df
 
+        # Bloque columnar de indicadores: se reserva en get_metrics()
+        self.__bloque = None
+        self.__indice = {}
+        self.__calculadas = set()
+
+        # Intermedios ya calculados en esta ejecución, por (nombre, *parámetros)
+        self.__intermedios = {}
+
+        # Histórico completo de precios y estado incremental para update()
+        self.__precios = df
+        self.__incremental = None
+        self.__ultima_fecha = None
+
+    @property
+    def data(self):
+        """
+        DataFrame de trabajo: los precios y, tras get_metrics(), las métricas. Si update() ha añadido filas, se
+        construye a partir de su ventana la primera vez que se lee.
+        """
+        if self.__data is None:
+            self.__data = self.__ventana.dataframe()
+        return self.__data
+
+    @data.setter
+    def data(self, df):
+        self.__data = df
+        self.__ventana = None  # update() parte del nuevo DataFrame
+
     def print_data(self, n=5):
         """
         Imprime los primeros n registros del DataFrame. Por defecto muestra 5 registros.
         """
         print(self.data.head(n))
 
+    def __reservar_bloque(self, columnas):
+        """
+        Reserva la matriz (filas x indicadores, float32 en modo compacto) donde se escriben los indicadores,
+        inicializada a NaN.
+        """
+        self.__indice = {columna: j for j, columna in enumerate(columnas)}
+        self.__bloque = np.full((len(self.data), len(columnas)), np.nan, dtype=np.float32 if self.compacto else np.float64)
+        self.__calculadas = set()
+        self.__intermedios = {}
+
+    def __intermedio(self, nombre, *params):
+        """
+        Devuelve un intermedio del grafo INTERMEDIOS, calculándolo (junto con sus dependencias) solo la primera vez.
+        """
+        clave = (nombre,) + params
+        if clave not in self.__intermedios:
+            dependencias, funcion = self.INTERMEDIOS[nombre]
+            argumentos = [self.__intermedio(d) if d in self.INTERMEDIOS else self.data[d] for d in dependencias]
+            self.__intermedios[clave] = funcion(*argumentos, *params)
+        return self.__intermedios[clave]
+
+    def __guardar(self, columna, valores):
+        """
+        Escribe los valores de un indicador en su columna del bloque (por posición, sin alinear índices).
+        """
+        self.__bloque[:, self.__indice[columna]] = np.asarray(valores, dtype=np.float64)
+        self.__calculadas.add(columna)
+
+    def __guardar_columnas(self, columnas):
+        """
+        Escribe en el bloque las columnas que devuelve una fórmula de models/formulas.py ({columna: valores}).
+        """
+        for columna, valores in columnas.items():
+            self.__guardar(columna, valores)
+
+    def __columna(self, columna):
+        """
+        Devuelve una columna como Serie de pandas: los indicadores ya calculados se leen del bloque sin copiarlos
+        (en modo compacto se pasan a float64 para seguir calculando en doble precisión) y el resto de columnas se leen
+        del DataFrame de precios.
+        """
+        if columna in self.__calculadas:
+            valores = self.__bloque[:, self.__indice[columna]]
+            return pd.Series(valores.astype(np.float64) if self.compacto else valores, index=self.data.index, copy=False)
+        return self.data[columna]
+
+    def __filtrar_filas(self, mascara):
+        """
+        Conserva solo las filas marcadas tanto en los precios como en el bloque de indicadores.
+        """
+        inicio = int(np.argmax(mascara))
+        if mascara[inicio:].all():
+            # Caso habitual: solo sobran filas iniciales, así que basta con una vista
+            self.data = self.data.iloc[inicio:]
+            self.__bloque = self.__bloque[inicio:]
+        else:
+            self.data = self.data[mascara]
+            self.__bloque = self.__bloque[mascara]
+
+    def __construir_dataframe(self, filas=None):
+        """
+        Construye el DataFrame de salida (precios + indicadores) una única vez a partir del bloque.
+        - filas: Si se indica, solo se construyen las últimas `filas` filas.
+        """
+        precios = self.data if filas is None else self.data.iloc[-filas:]
+        bloque = self.__bloque if filas is None else self.__bloque[-filas:]
+        if self.compacto:
+            precios = compactar_precios(precios)
+        indicadores = pd.DataFrame(bloque, columns=list(self.__indice), index=precios.index, copy=False)
+        return pd.concat([precios, indicadores], axis=1)
+
     def __calculate_sma_20(self):
         """
         Calcula la Media Móvil Simple (SMA) de 20 periodos sobre la columna 'close'.
         La SMA es un indicador de tendencia que suaviza las fluctuaciones de los precios.
         """
-        self.data.loc[:, 'SMA'] = self.data['close'].rolling(window=20).mean()
+        self.__guardar_columnas(formulas.sma(self.data['close'], 20, 'SMA'))
 
     def __calculate_sma_50(self):
         """
         Calcula la Media Móvil Simple (SMA) de 50 periodos sobre la columna 'close'.
         Ayuda a identificar tendencias intermedias en los precios.
         """
-        self.data.loc[:, 'SMA_50'] = self.data['close'].rolling(window=50).mean()
+        self.__guardar_columnas(formulas.sma(self.data['close'], 50, 'SMA_50'))
 
     def __calculate_sma_200(self):
         """
         Calcula la Media Móvil Simple (SMA) de 200 periodos sobre la columna 'close'.
         Indicador utilizado para identificar la tendencia a largo plazo.
         """
-        self.data.loc[:, 'SMA_200'] = self.data['close'].rolling(window=200).mean()
+        self.__guardar_columnas(formulas.sma(self.data['close'], 200, 'SMA_200'))
 
     def __calculate_volume_sma_20(self):
         """
         Calcula la Media Móvil Simple del volumen (Volume SMA) de 20 periodos.
         Permite evaluar la fuerza detrás de las tendencias analizando el volumen negociado.
         """
-        self.data.loc[:, 'Volume_SMA'] = self.data['volume'].rolling(window=20).mean()
+        self.__guardar_columnas(formulas.sma(self.data['volume'], 20, 'Volume_SMA'))
 
     def __calculate_macd(self, short_window=12, long_window=26, signal_window=9):
         """
@@ -68,11 +242,7 @@ class Dataset:
         - long_window: Período de la EMA larga (default 26).
         - signal_window: Período para la línea de señal (default 9).
         """
-        self.data.loc[:, 'EMA_12'] = self.data['close'].ewm(span=short_window, adjust=False).mean()
-        self.data.loc[:, 'EMA_26'] = self.data['close'].ewm(span=long_window, adjust=False).mean()
-        self.data.loc[:, 'MACD_Line'] = self.data['EMA_12'] - self.data['EMA_26']
-        self.data.loc[:, 'Signal_Line'] = self.data['MACD_Line'].ewm(span=signal_window, adjust=False).mean()
-        self.data.loc[:, 'Histograma'] = self.data['MACD_Line'] - self.data['Signal_Line']
+        self.__guardar_columnas(formulas.macd(self.data['close'], short_window, long_window, signal_window))
 
     def __calculate_bollinger_bands(self):
         """
@@ -80,49 +250,25 @@ class Dataset:
         Las Bandas de Bollinger miden la volatilidad del mercado y proporcionan niveles de soporte/resistencia dinámicos.
         Se calculan como la SMA ± 2 desviaciones estándar.
         """
-        if 'SMA' not in self.data.columns:
+        if 'SMA' not in self.__calculadas:
             self.__calculate_sma_20()
 
-        self.data.loc[:, 'Banda_Superior'] = self.data['SMA'] + 2 * self.data['close'].rolling(window=20).std()
-        self.data.loc[:, 'Banda_Inferior'] = self.data['SMA'] - 2 * self.data['close'].rolling(window=20).std()
+        self.__guardar_columnas(formulas.bollinger_bands(self.data['close'], self.__columna('SMA')))
 
     def __calculate_RSI(self, period=14):
         """
         Calcula el Índice de Fuerza Relativa (RSI) con un período dado (default 14).
         El RSI mide el momentum del precio y determina si un activo está sobrecomprado o sobrevendido.
         """
-        delta = self.data['close'].diff()
-        gain = delta.where(delta > 0, 0)
-        loss = -delta.where(delta < 0, 0)
-
-        avg_gain = gain.rolling(window=period).mean()
-        avg_loss = loss.rolling(window=period).mean()
-
-        rs = avg_gain / avg_loss
-        self.data.loc[:, 'RSI'] = 100 - (100 / (1 + rs))
+        self.__guardar_columnas(formulas.rsi(self.__intermedio('gain'), self.__intermedio('loss'), period))
 
     def __calculate_adx(self, period=14):
         """
         Calcula el Índice de Movimiento Direccional Promedio (ADX) en base a un período dado (default 14).
         El ADX mide la fuerza de una tendencia sin considerar si es alcista o bajista.
         """
-        tr = np.maximum(self.data['high'] - self.data['low'],
-                        np.abs(self.data['high'] - self.data['close'].shift(1)),
-                        np.abs(self.data['low'] - self.data['close'].shift(1)))
-        dm_plus = np.where((self.data['high'] - self.data['high'].shift(1)) > (self.data['low'].shift(1) - self.data['low']),
-                           np.maximum(self.data['high'] - self.data['high'].shift(1), 0), 0)
-        dm_minus = np.where((self.data['low'].shift(1) - self.data['low']) > (self.data['high'] - self.data['high'].shift(1)),
-                            np.maximum(self.data['low'].shift(1) - self.data['low'], 0), 0)
-
-        tr_ema = pd.Series(tr).ewm(span=period, adjust=False).mean()
-        dm_plus_ema = pd.Series(dm_plus).ewm(span=period, adjust=False).mean()
-        dm_minus_ema = pd.Series(dm_minus).ewm(span=period, adjust=False).mean()
-
-        di_plus = 100 * (dm_plus_ema / tr_ema)
-        di_minus = 100 * (dm_minus_ema / tr_ema)
-        dx = 100 * np.abs(di_plus - di_minus) / (di_plus + di_minus)
-
-        self.data.loc[:, 'ADX'] = dx.rolling(window=period).mean()
+        self.__guardar_columnas(formulas.adx(self.data['high'], self.data['low'], self.__intermedio('high_prev'),
+                                             self.__intermedio('low_prev'), self.__intermedio('TR'), period))
 
     def __calculate_stochastic(self, period=14, smooth_k=3, smooth_d=3):
         """
@@ -131,74 +277,45 @@ class Dataset:
         - smooth_k: Suavizado para la línea %K (default 3).
         - smooth_d: Suavizado para la línea %D (default 3).
         """
-        self.data.loc[:, 'low_min'] = self.data['low'].rolling(window=period).min()
-        self.data.loc[:, 'high_max'] = self.data['high'].rolling(window=period).max()
-
-        self.data.loc[:, '%K'] = 100 * ((self.data['close'] - self.data['low_min']) / (self.data['high_max'] - self.data['low_min']))
-        self.data.loc[:, '%K'] = self.data['%K'].rolling(window=smooth_k).mean()
-        self.data.loc[:, '%D'] = self.data['%K'].rolling(window=smooth_d).mean()
-
-        self.data.drop(columns=['low_min', 'high_max'], inplace=True)
+        self.__guardar_columnas(formulas.stochastic(self.data['close'], self.__intermedio('low_min', period),
+                                                    self.__intermedio('high_max', period), smooth_k, smooth_d))
 
     def __calculate_momentum(self, period=14):
         """
         Calcula el Indicador de Momentum, que mide la velocidad de cambio en los precios.
         - period: El número de períodos a utilizar en el cálculo del Momentum (default 14).
         """
-        self.data.loc[:, 'Momentum'] = self.data['close'] - self.data['close'].shift(period)
-        self.data.dropna(subset=['Momentum'], inplace=True)
+        self.__guardar_columnas(formulas.momentum(self.data['close'], period))
 
     def __calculate_cci(self, period=20):
         """
         Calcula el Commodity Channel Index (CCI) con un período dado (default 20).
         El CCI mide la desviación del precio actual respecto a su media estadística.
         """
-        self.data.loc[:, 'PT'] = (self.data['high'] + self.data['low'] + self.data['close']) / 3
-        self.data.loc[:, 'SMA_PT'] = self.data['PT'].rolling(window=period).mean()
-        self.data.loc[:, 'Mean_Deviation'] = self.data['PT'].rolling(window=period).apply(lambda x: np.mean(np.abs(x - np.mean(x))))
-
-        self.data.loc[:, 'CCI'] = (self.data['PT'] - self.data['SMA_PT']) / (0.015 * self.data['Mean_Deviation'])
-        self.data.drop(columns=['PT', 'SMA_PT', 'Mean_Deviation'], inplace=True)
+        self.__guardar_columnas(formulas.cci(self.__intermedio('typical_price'), period))
 
     def __calculate_roc(self, period=14):
         """
         Calcula el Rate of Change (ROC), que mide el porcentaje de cambio en el precio durante un período dado.
         - period: Período para el cálculo del ROC (default 14).
         """
-        self.data.loc[:, 'ROC'] = ((self.data['close'] - self.data['close'].shift(period)) / self.data['close'].shift(period)) * 100
+        self.__guardar_columnas(formulas.roc(self.data['close'], period))
 
     def __calculate_williams_r(self, period=14):
         """
         Calcula el Williams %R, que mide el nivel de sobrecompra o sobreventa en una escala de -100 a 0.
         - period: Período para el cálculo del Williams %R (default 14).
         """
-        self.data.loc[:, 'high_max'] = self.data['high'].rolling(window=period).max()
-        self.data.loc[:, 'low_min'] = self.data['low'].rolling(window=period).min()
-
-        self.data.loc[:, 'Williams_%R'] = ((self.data['high_max'] - self.data['close']) / 
-                                           (self.data['high_max'] - self.data['low_min'])) * -100
-        self.data.drop(columns=['high_max', 'low_min'], inplace=True)
+        self.__guardar_columnas(formulas.williams_r(self.data['close'], self.__intermedio('high_max', period),
+                                                    self.__intermedio('low_min', period)))
 
     def __calculate_vortex(self, period=14):
         """
         Calcula el Vortex Indicator (VI), que ayuda a identificar el comienzo de nuevas tendencias.
         - period: Período para el cálculo del Vortex Indicator (default 14).
         """
-        self.data.loc[:, 'TR'] = np.maximum(self.data['high'] - self.data['low'], 
-                                            np.abs(self.data['high'] - self.data['close'].shift(1)),
-                                            np.abs(self.data['low'] - self.data['close'].shift(1)))
-
-        self.data.loc[:, 'VM+'] = np.abs(self.data['high'] - self.data['low'].shift(1))
-        self.data.loc[:, 'VM-'] = np.abs(self.data['low'] - self.data['high'].shift(1))
-
-        tr_sum = self.data['TR'].rolling(window=period).sum()
-        vm_plus_sum = self.data['VM+'].rolling(window=period).sum()
-        vm_minus_sum = self.data['VM-'].rolling(window=period).sum()
-
-        self.data.loc[:, 'VI+'] = vm_plus_sum / tr_sum
-        self.data.loc[:, 'VI-'] = vm_minus_sum / tr_sum
-
-        self.data.drop(columns=['TR', 'VM+', 'VM-'], inplace=True)
+        self.__guardar_columnas(formulas.vortex(self.data['high'], self.data['low'], self.__intermedio('high_prev'),
+                                                self.__intermedio('low_prev'), self.__intermedio('TR'), period))
 
     def __calculate_fibonacci_retracements(self, period=None):
         """
@@ -206,64 +323,39 @@ class Dataset:
         - period: El período de tiempo en el que se calcula el rango (opcional). Si no se especifica, usaremos todo el rango de datos.
         """
         data_subset = self.data if period is None else self.data.tail(period)
-
-        high = data_subset['high'].max()
-        low = data_subset['low'].min()
-        diff = high - low
-
-        self.data.loc[:, 'Fibonacci_23.6'] = high - (0.236 * diff)
-        self.data.loc[:, 'Fibonacci_38.2'] = high - (0.382 * diff)
-        self.data.loc[:, 'Fibonacci_50.0'] = high - (0.500 * diff)
-        self.data.loc[:, 'Fibonacci_61.8'] = high - (0.618 * diff)
-        self.data.loc[:, 'Fibonacci_100.0'] = low
+        self.__guardar_columnas(formulas.fibonacci_retracements(data_subset['high'], data_subset['low']))
 
     def __calculate_pivot_points(self):
         """
         Calcula los Pivot Points extendidos, incluyendo PP, R1, S1, R2, S2, R3 y S3.
         Los Pivot Points se utilizan para identificar niveles de soporte y resistencia.
         """
-        self.data.loc[:, 'PP'] = (self.data['high'].shift(1) + self.data['low'].shift(1) + self.data['close'].shift(1)) / 3
-        self.data.loc[:, 'R1'] = (2 * self.data['PP']) - self.data['low'].shift(1)
-        self.data.loc[:, 'S1'] = (2 * self.data['PP']) - self.data['high'].shift(1)
-        self.data.loc[:, 'R2'] = self.data['PP'] + (self.data['high'].shift(1) - self.data['low'].shift(1))
-        self.data.loc[:, 'S2'] = self.data['PP'] - (self.data['high'].shift(1) - self.data['low'].shift(1))
-        self.data.loc[:, 'R3'] = self.data['high'].shift(1) + 2 * (self.data['PP'] - self.data['low'].shift(1))
-        self.data.loc[:, 'S3'] = self.data['low'].shift(1) - 2 * (self.data['high'].shift(1) - self.data['PP'])
+        self.__guardar_columnas(formulas.pivot_points(self.__intermedio('high_prev'), self.__intermedio('low_prev'),
+                                                      self.__intermedio('close_prev')))
 
     def __calculate_donchian_channels(self, period=20):
         """
         Calcula los Canales de Donchian, que identifican zonas de soporte y resistencia basadas en el máximo y mínimo de un periodo.
         - period: Período para calcular los canales (default 20).
         """
-        self.data.loc[:, 'Donchian_High'] = self.data['high'].rolling(window=period).max()
-        self.data.loc[:, 'Donchian_Low'] = self.data['low'].rolling(window=period).min()
-        self.data.loc[:, 'Donchian_Mid'] = (self.data['Donchian_High'] + self.data['Donchian_Low']) / 2
+        self.__guardar_columnas(formulas.donchian_channels(self.__intermedio('high_max', period),
+                                                           self.__intermedio('low_min', period)))
 
     def __calculate_gann_levels(self, period=20):
         """
         Calcula los niveles de Gann, que dividen el rango de precios en 8 partes, proporcionando zonas geométricas de soporte y resistencia.
         - period: El número de periodos sobre los que se calcula el rango (default 20).
         """
-        high = self.data['high'].rolling(window=period).max()
-        low = self.data['low'].rolling(window=period).min()
-        range = high - low
-
-        self.data.loc[:, 'Gann_1/8'] = low + range * 1/8
-        self.data.loc[:, 'Gann_2/8'] = low + range * 2/8
-        self.data.loc[:, 'Gann_3/8'] = low + range * 3/8
-        self.data.loc[:, 'Gann_4/8'] = low + range * 4/8
-        self.data.loc[:, 'Gann_5/8'] = low + range * 5/8
-        self.data.loc[:, 'Gann_6/8'] = low + range * 6/8
-        self.data.loc[:, 'Gann_7/8'] = low + range * 7/8
+        self.__guardar_columnas(formulas.gann_levels(self.__intermedio('high_max', period),
+                                                     self.__intermedio('low_min', period)))
 
     def __calculate_heikin_ashi(self):
         """
         Calcula las velas Heikin-Ashi, que suavizan el precio para mostrar mejor las tendencias.
         """
-        self.data.loc[:, 'HA_close'] = (self.data['open'] + self.data['high'] + self.data['low'] + self.data['close']) / 4
-        self.data.loc[:, 'HA_open'] = (self.data['open'].shift(1) + self.data['close'].shift(1)) / 2
-        self.data.loc[:, 'HA_high'] = self.data[['high', 'open', 'close']].max(axis=1)
-        self.data.loc[:, 'HA_low'] = self.data[['low', 'open', 'close']].min(axis=1)
+        self.__guardar_columnas(formulas.heikin_ashi(self.data['open'], self.data['high'], self.data['low'],
+                                                     self.data['close'], self.data['open'].shift(1),
+                                                     self.__intermedio('close_prev')))
 
     def __calculate_parabolic_sar(self, af_start=0.02, af_increment=0.02, af_max=0.2):
         """
@@ -272,58 +364,22 @@ class Dataset:
         - af_increment: Incremento del factor de aceleración (default 0.02).
         - af_max: Factor de aceleración máximo (default 0.2).
         """
-        self.data.loc[:, 'PSAR'] = self.data['close'].shift(1)
-        af = af_start
-        ep = self.data['high'].iloc[0] if self.data['close'].iloc[0] > self.data['open'].iloc[0] else self.data['low'].iloc[0]
-        trend = 1 if self.data['close'].iloc[0] > self.data['open'].iloc[0] else -1
-
-        for i in range(1, len(self.data)):
-            if trend == 1:
-                self.data.loc[self.data.index[i], 'PSAR'] = self.data.loc[self.data.index[i - 1], 'PSAR'] + af * (ep - self.data.loc[self.data.index[i - 1], 'PSAR'])
-                if self.data['low'].iloc[i] < self.data['PSAR'].iloc[i]:
-                    trend = -1
-                    self.data.loc[self.data.index[i], 'PSAR'] = ep
-                    af = af_start
-                    ep = self.data['low'].iloc[i]
-                else:
-                    if self.data['high'].iloc[i] > ep:
-                        ep = self.data['high'].iloc[i]
-                        af = min(af + af_increment, af_max)
-            else:
-                self.data.loc[self.data.index[i], 'PSAR'] = self.data.loc[self.data.index[i - 1], 'PSAR'] - af * (self.data.loc[self.data.index[i - 1], 'PSAR'] - ep)
-                if self.data['high'].iloc[i] > self.data['PSAR'].iloc[i]:
-                    trend = 1
-                    self.data.loc[self.data.index[i], 'PSAR'] = ep
-                    af = af_start
-                    ep = self.data['high'].iloc[i]
-                else:
-                    if self.data['low'].iloc[i] < ep:
-                        ep = self.data['low'].iloc[i]
-                        af = min(af + af_increment, af_max)
+        self.__guardar_columnas(formulas.parabolic_sar(self.data['open'], self.data['high'], self.data['low'],
+                                                       self.data['close'], af_start, af_increment, af_max))
 
     def __calculate_average_price(self):
         """
         Calcula el precio promedio del período, basado en los precios 'open', 'high', 'low' y 'close'.
         """
-        self.data.loc[:, 'Average_Price'] = (self.data['open'] + self.data['high'] + self.data['low'] + self.data['close']) / 4
+        self.__guardar_columnas(formulas.average_price(self.data['open'], self.data['high'], self.data['low'],
+                                                       self.data['close']))
 
     def __calculate_atr(self, period=14):
         """
         Calcula el ATR (Average True Range), que mide la volatilidad de un activo a lo largo de un período determinado.
         - period: El número de períodos sobre los que calcular el ATR (default 14).
         """
-        # Calcular el True Range (TR)
-        self.data.loc[:, 'TR'] = np.maximum(self.data['high'] - self.data['low'], 
-                                            np.abs(self.data['high'] - self.data['close'].shift(1)),
-                                            np.abs(self.data['low'] - self.data['close'].shift(1)))
-        
-        # Calcular el ATR como una media móvil del TR
-        self.data.loc[:, 'ATR'] = self.data['TR'].rolling(window=period).mean()
-
-        # Eliminar la columna temporal TR
-        self.data.drop(columns=['TR'], inplace=True)
-
-        # Asegurarse de eliminar los valores NaN
+        self.__guardar_columnas(formulas.atr(self.__intermedio('TR'), period))
 
     def __calculate_keltner_channels(self, period=20, multiplier=2):
         """
@@ -332,196 +388,252 @@ class Dataset:
         - multiplier: El multiplicador del ATR para calcular las bandas superior e inferior (default 2).
         """
         # Asegurarse de que se haya calculado el ATR
-        if 'ATR' not in self.data.columns:
+        if 'ATR' not in self.__calculadas:
             self.__calculate_atr(period)
 
-        # Calcular la EMA del precio de cierre
-        self.data.loc[:, 'EMA_Keltner'] = self.data['close'].ewm(span=period, adjust=False).mean()
-
-        # Calcular las bandas superior e inferior
-        self.data.loc[:, 'Keltner_Superior'] = self.data['EMA_Keltner'] + (multiplier * self.data['ATR'])
-        self.data.loc[:, 'Keltner_Inferior'] = self.data['EMA_Keltner'] - (multiplier * self.data['ATR'])
-
-        # Asegurarse de eliminar los valores NaN
+        self.__guardar_columnas(formulas.keltner_channels(self.data['close'], self.__columna('ATR'), period, multiplier))
 
     def __calculate_mfi(self, period=14):
         """
         Calcula el Money Flow Index (MFI), un indicador que mide la presión de compra/venta combinando precio y volumen.
         - period: El número de períodos sobre los que calcular el MFI (default 14).
         """
-        # Calcular el Precio Típico (Typical Price)
-        self.data.loc[:, 'Typical_Price'] = (self.data['high'] + self.data['low'] + self.data['close']) / 3
-
-        # Calcular el Flujo de Dinero (Money Flow)
-        self.data.loc[:, 'Money_Flow'] = self.data['Typical_Price'] * self.data['volume']
-
-        # Identificar los flujos de dinero positivo y negativo
-        self.data.loc[:, 'Positive_Flow'] = np.where(self.data['Typical_Price'] > self.data['Typical_Price'].shift(1),
-                                                     self.data['Money_Flow'], 0)
-        self.data.loc[:, 'Negative_Flow'] = np.where(self.data['Typical_Price'] < self.data['Typical_Price'].shift(1),
-                                                     self.data['Money_Flow'], 0)
-
-        # Calcular la suma de flujos de dinero positivo y negativo
-        positive_flow_sum = self.data['Positive_Flow'].rolling(window=period).sum()
-        negative_flow_sum = self.data['Negative_Flow'].rolling(window=period).sum()
-
-        # Calcular la Razón del Flujo de Dinero
-        money_flow_ratio = positive_flow_sum / negative_flow_sum
-
-        # Calcular el MFI
-        self.data.loc[:, 'MFI'] = 100 - (100 / (1 + money_flow_ratio))
-
-        # Eliminar las columnas temporales
-        self.data.drop(columns=['Typical_Price', 'Money_Flow', 'Positive_Flow', 'Negative_Flow'], inplace=True)
-
-        # Asegurarse de eliminar los valores NaN
+        self.__guardar_columnas(formulas.mfi(self.__intermedio('typical_price'), self.data['volume'], period))
 
     def __calculate_chaikin_volatility(self, period=10):
         """
         Calcula el Chaikin Volatility, que mide los cambios en el rango (high - low) de un activo durante un período determinado.
         - period: El número de períodos para la EMA del rango (default 10).
         """
-        # Calcular el rango de precios (high - low)
-        self.data.loc[:, 'Price_Range'] = self.data['high'] - self.data['low']
-
-        # Calcular la EMA del rango de precios
-        self.data.loc[:, 'EMA_Range'] = self.data['Price_Range'].ewm(span=period, adjust=False).mean()
-
-        # Calcular el cambio porcentual en la EMA del rango de precios
-        self.data.loc[:, 'Chaikin_Volatility'] = (self.data['EMA_Range'].diff(period) / self.data['EMA_Range'].shift(period)) * 100
-
-        # Eliminar las columnas temporales
-        self.data.drop(columns=['Price_Range', 'EMA_Range'], inplace=True)
-
-        # Asegurarse de eliminar los valores NaN
+        self.__guardar_columnas(formulas.chaikin_volatility(self.data['high'], self.data['low'], period))
 
     def __calculate_ad_line(self):
         """
         Calcula la línea de Acumulación/Distribución (A/D Line), que mide el flujo acumulado de dinero basado en el precio y el volumen.
         """
-        # Calcular el Multiplicador de Clímax (Money Flow Multiplier)
-        self.data.loc[:, 'Money_Flow_Multiplier'] = ((self.data['close'] - self.data['low']) - (self.data['high'] - self.data['close'])) / (self.data['high'] - self.data['low'])
-
-        # Calcular el Volumen de Flujo de Dinero (Money Flow Volume)
-        self.data.loc[:, 'Money_Flow_Volume'] = self.data['Money_Flow_Multiplier'] * self.data['volume']
-
-        # Calcular la A/D Line acumulada
-        self.data.loc[:, 'A/D_Line'] = self.data['Money_Flow_Volume'].cumsum()
-
-        # Eliminar las columnas temporales
-        self.data.drop(columns=['Money_Flow_Multiplier', 'Money_Flow_Volume'], inplace=True)
-
-        # Asegurarse de eliminar los valores NaN
+        self.__guardar_columnas(formulas.ad_line(self.data['high'], self.data['low'], self.data['close'],
+                                                 self.data['volume']))
 
     def __calculate_eom(self, period=14):
         """
         Calcula el Ease of Movement (EOM), que mide la relación entre el cambio de precios y el volumen.
         - period: Número de períodos sobre los cuales suavizar el EOM (default 14).
         """
-        # Calcular el cambio de distancia (Distance Moved)
-        self.data.loc[:, 'Distance_Moved'] = ((self.data['high'] + self.data['low']) / 2) - ((self.data['high'].shift(1) + self.data['low'].shift(1)) / 2)
+        self.__guardar_columnas(formulas.eom(self.data['high'], self.data['low'], self.__intermedio('high_prev'),
+                                             self.__intermedio('low_prev'), self.data['volume'], period))
 
-        # Calcular el Box Ratio (relación entre volumen y rango de precios)
-        self.data.loc[:, 'Box_Ratio'] = self.data['volume'] / (self.data['high'] - self.data['low'])
-
-        # Calcular el Ease of Movement (EOM)
-        self.data.loc[:, 'EOM'] = self.data['Distance_Moved'] / self.data['Box_Ratio']
-
-        # Suavizar el EOM usando una media móvil simple (SMA)
-        self.data.loc[:, 'EOM_Smoothed'] = self.data['EOM'].rolling(window=period).mean()
-
-        # Eliminar las columnas temporales
-        self.data.drop(columns=['Distance_Moved', 'Box_Ratio', 'EOM'], inplace=True)
-
-        # Asegurarse de eliminar los valores NaN
     def __calculate_connors_rsi(self, rsi_period=3, streak_rsi_period=2, lookback_period=100):
         """
-        Calcula el Connors RSI (CRSI), un oscilador que combina el RSI de 3 periodos, el RSI de la racha, 
+        Calcula el Connors RSI (CRSI), un oscilador que combina el RSI de 3 periodos, el RSI de la racha,
         y el porcentaje de retroceso en 100 días.
         - rsi_period: Período para calcular el RSI básico (default 3).
         - streak_rsi_period: Período para calcular el RSI de la longitud de la racha (default 2).
         - lookback_period: Período para calcular el retroceso de 100 días (default 100).
         """
-        # Componente 1: RSI de 3 periodos (RSI básico)
-        delta = self.data['close'].diff()
-        gain = delta.where(delta > 0, 0)
-        loss = -delta.where(delta < 0, 0)
-        avg_gain = gain.rolling(window=rsi_period).mean()
-        avg_loss = loss.rolling(window=rsi_period).mean()
-        rs = avg_gain / avg_loss
-        self.data.loc[:, 'RSI_3'] = 100 - (100 / (1 + rs))
-
-        # Componente 2: Longitud de la Racha
-        streak = np.where(self.data['close'] > self.data['close'].shift(1), 1, np.where(self.data['close'] < self.data['close'].shift(1), -1, 0))
-        
-        # Convertir streak a una Serie de pandas para usar shift y cumsum
-        streak_series = pd.Series(streak)
-        streak_cumsum = streak_series.groupby((streak_series != streak_series.shift()).cumsum()).cumsum()
-        self.data.loc[:, 'Streak'] = streak_cumsum
-
-        # Componente 3: RSI de la Racha
-        delta_streak = self.data['Streak'].diff()
-        gain_streak = delta_streak.where(delta_streak > 0, 0)
-        loss_streak = -delta_streak.where(delta_streak < 0, 0)
-        avg_gain_streak = gain_streak.rolling(window=streak_rsi_period).mean()
-        avg_loss_streak = loss_streak.rolling(window=streak_rsi_period).mean()
-        rs_streak = avg_gain_streak / avg_loss_streak
-        self.data.loc[:, 'RSI_Streak'] = 100 - (100 / (1 + rs_streak))
-
-        # Componente 4: Porcentaje de Retroceso de 100 días
-        self.data.loc[:, 'Pct_Retracement'] = 100 * ((self.data['close'] - self.data['low'].rolling(window=lookback_period).min()) / 
-                                                     (self.data['high'].rolling(window=lookback_period).max() - self.data['low'].rolling(window=lookback_period).min()))
-
-        # Calcular el Connors RSI (Promedio de los tres componentes)
-        self.data.loc[:, 'Connors_RSI'] = (self.data['RSI_3'] + self.data['RSI_Streak'] + self.data['Pct_Retracement']) / 3
-
-        # Eliminar las columnas temporales
-        self.data.drop(columns=['RSI_3', 'Streak', 'RSI_Streak', 'Pct_Retracement'], inplace=True)
-
-        # Asegurarse de eliminar los valores NaN
-
-
-
-    def __calculate_mfi(self, period=14):
-        """
-        Calcula el Money Flow Index (MFI), un indicador que mide la presión de compra/venta combinando precio y volumen.
-        - period: El número de períodos sobre los que calcular el MFI (default 14).
-        """
-        # Calcular el Precio Típico (Typical Price)
-        self.data.loc[:, 'Typical_Price'] = (self.data['high'] + self.data['low'] + self.data['close']) / 3
-
-        # Calcular el Flujo de Dinero (Money Flow)
-        self.data.loc[:, 'Money_Flow'] = self.data['Typical_Price'] * self.data['volume']
-
-        # Identificar los flujos de dinero positivo y negativo
-        self.data.loc[:, 'Positive_Flow'] = np.where(self.data['Typical_Price'] > self.data['Typical_Price'].shift(1),
-                                                     self.data['Money_Flow'], 0)
-        self.data.loc[:, 'Negative_Flow'] = np.where(self.data['Typical_Price'] < self.data['Typical_Price'].shift(1),
-                                                     self.data['Money_Flow'], 0)
-
-        # Calcular la suma de flujos de dinero positivo y negativo
-        positive_flow_sum = self.data['Positive_Flow'].rolling(window=period).sum()
-        negative_flow_sum = self.data['Negative_Flow'].rolling(window=period).sum()
-
-        # Calcular la Razón del Flujo de Dinero (Money Flow Ratio)
-        money_flow_ratio = positive_flow_sum / negative_flow_sum
-
-        # Calcular el MFI
-        self.data.loc[:, 'MFI'] = 100 - (100 / (1 + money_flow_ratio))
-
-        # Eliminar las columnas temporales
-        self.data.drop(columns=['Typical_Price', 'Money_Flow', 'Positive_Flow', 'Negative_Flow'], inplace=True)
-
-        # Asegurarse de eliminar los valores NaN
-
-
-
-
-
-
-
+        self.__guardar_columnas(formulas.connors_rsi(self.data['close'], self.__intermedio('gain'),
+                                                     self.__intermedio('loss'), self.__intermedio('delta'),
+                                                     self.__intermedio('low_min', lookback_period),
+                                                     self.__intermedio('high_max', lookback_period),
+                                                     rsi_period, streak_rsi_period))
+
+    def __iniciar_incremental(self):
+        """
+        Recorre una vez el histórico de precios para inicializar el estado incremental de update(). Si self.data aún
+        no tiene métricas (no se ha llamado a get_metrics()), devuelve las de sus filas, calculadas en el mismo
+        recorrido; si no, None.
+        """
+        self.__incremental = IndicadoresIncrementales()
+        sin_metricas = not any(columna in self.data.columns for columna in self.COLUMNAS_METRICAS)
+        desde = len(self.__precios) - len(self.data) if sin_metricas else len(self.__precios)
+
+        historicas = []
+        columnas = [self.__precios[c].to_numpy(dtype=np.float64).tolist() for c in ('open', 'high', 'low', 'close', 'volume')]
+        for i, (o, h, l, c, v) in enumerate(zip(*columnas)):
+            metricas = self.__incremental.procesar(o, h, l, c, v)
+            if i >= desde:
+                historicas.append(metricas)
+        if 'date' in self.__precios.columns and len(self.__precios):
+            self.__ultima_fecha = self.__precios['date'].iloc[-1]
+        if not sin_metricas:
+            return None
+        return pd.DataFrame(historicas, columns=list(self.COLUMNAS_METRICAS), dtype=np.float64).astype(
+            np.float32 if self.compacto else np.float64, copy=False)
+
+    def update(self, candle):
+        """
+        Añade una vela cerrada nueva y calcula sus indicadores de forma incremental, sin recalcular el histórico.
+        - candle: Mapeo (dict, fila de DataFrame...) con las columnas de precios: 'date', 'open', 'high', 'low', 'close',
+          'vwap', 'volume' y 'count'.
+        La primera llamada recorre una vez el histórico con el que se creó el Dataset para inicializar el estado de cada
+        indicador; a partir de ahí cada vela se procesa en tiempo constante. Los indicadores de la vela coinciden con la
+        última fila que devolvería get_metrics() sobre el histórico más la vela.
+        Devuelve la fila nueva como {columna: valor}. La fila también se añade al final de self.data, que conserva su
+        número de filas: se escribe en una ventana preasignada y el DataFrame solo se reconstruye al leer self.data.
+        Si se llama antes de get_metrics(), self.data pasa a tener todas las columnas de COLUMNAS_METRICAS.
+        En modo compacto la fila se guarda y se devuelve con los tipos de get_metrics() (float32 y 'date' en minutos
+        epoch); los indicadores se calculan en float64 y se redondean una sola vez.
+        Las velas deben llegar cerradas y en orden: una vela con fecha igual o anterior a la última lanza ValueError.
+        """
+        historicas = self.__iniciar_incremental() if self.__incremental is None else None
+
+        fecha = candle.get('date')
+        if fecha is not None and self.__ultima_fecha is not None and fecha <= self.__ultima_fecha:
+            raise ValueError(f"La vela de {fecha} no es posterior a la última vela procesada ({self.__ultima_fecha}).")
+
+        if self.__ventana is None:
+            plantilla = self.data
+            if historicas is not None:
+                plantilla = pd.concat([plantilla.reset_index(drop=True), historicas], axis=1)
+            if self.compacto:
+                plantilla = compactar_precios(plantilla)
+            self.__ventana = VentanaFilas(plantilla, max(len(plantilla), 1))
+
+        fila = {columna: candle[columna] for columna in self.__precios.columns if columna in candle}
+        for columna in ('open', 'high', 'low', 'close', 'vwap', 'volume'):
+            if columna in fila:
+                fila[columna] = float(fila[columna])
+        fila.update(self.__incremental.actualizar(fila))
+        if fecha is not None:
+            self.__ultima_fecha = fecha
+        if self.compacto:
+            fila = _compactar_fila(fila)
+
+        self.__ventana.agregar(fila)
+        self.__data = None
+        return fila
+
+    # Registro de indicadores de get_metrics(), en orden de cálculo: nombre -> (método, columnas, dependencias).
+    # Las dependencias son otros indicadores del registro que deben calcularse antes.
+    INDICADORES = {
+        'sma_20': (__calculate_sma_20, ('SMA',), ()),
+        'sma_50': (__calculate_sma_50, ('SMA_50',), ()),
+        'sma_200': (__calculate_sma_200, ('SMA_200',), ()),
+        'bollinger_bands': (__calculate_bollinger_bands, ('Banda_Superior', 'Banda_Inferior'), ('sma_20',)),
+        'volume_sma_20': (__calculate_volume_sma_20, ('Volume_SMA',), ()),
+        'macd': (__calculate_macd, ('EMA_12', 'EMA_26', 'MACD_Line', 'Signal_Line', 'Histograma'), ()),
+        'rsi': (__calculate_RSI, ('RSI',), ()),
+        'adx': (__calculate_adx, ('ADX',), ()),
+        'stochastic': (__calculate_stochastic, ('%K', '%D'), ()),
+        'momentum': (__calculate_momentum, ('Momentum',), ()),
+        'cci': (__calculate_cci, ('CCI',), ()),
+        'roc': (__calculate_roc, ('ROC',), ()),
+        'williams_r': (__calculate_williams_r, ('Williams_%R',), ()),
+        'vortex': (__calculate_vortex, ('VI+', 'VI-'), ()),
+        'fibonacci_retracements': (__calculate_fibonacci_retracements,
+                                   ('Fibonacci_23.6', 'Fibonacci_38.2', 'Fibonacci_50.0', 'Fibonacci_61.8', 'Fibonacci_100.0'), ()),
+        'pivot_points': (__calculate_pivot_points, ('PP', 'R1', 'S1', 'R2', 'S2', 'R3', 'S3'), ()),
+        'donchian_channels': (__calculate_donchian_channels, ('Donchian_High', 'Donchian_Low', 'Donchian_Mid'), ()),
+        'heikin_ashi': (__calculate_heikin_ashi, ('HA_close', 'HA_open', 'HA_high', 'HA_low'), ()),
+        'parabolic_sar': (__calculate_parabolic_sar, ('PSAR',), ()),
+        'average_price': (__calculate_average_price, ('Average_Price',), ()),
+        'atr': (__calculate_atr, ('ATR',), ()),
+        'keltner_channels': (__calculate_keltner_channels, ('EMA_Keltner', 'Keltner_Superior', 'Keltner_Inferior'), ('atr',)),
+        'mfi': (__calculate_mfi, ('MFI',), ()),
+        'chaikin_volatility': (__calculate_chaikin_volatility, ('Chaikin_Volatility',), ()),
+        'ad_line': (__calculate_ad_line, ('A/D_Line',), ()),
+        'eom': (__calculate_eom, ('EOM_Smoothed',), ()),
+        'connors_rsi': (__calculate_connors_rsi, ('Connors_RSI',), ()),
+        'gann_levels': (__calculate_gann_levels, ('Gann_1/8', 'Gann_2/8', 'Gann_3/8', 'Gann_4/8', 'Gann_5/8', 'Gann_6/8', 'Gann_7/8'), ()),
+    }
+
+    # Velas de histórico que necesita cada indicador antes de la primera fila que se devuelve: (velas fijas por
+    # ventanas y desplazamientos, spans de las EWM encadenadas). None si depende de todo el histórico (acumulados,
+    # rangos de todo el histórico y el Parabolic SAR, cuya recurrencia no converge).
+    CALENTAMIENTO = {
+        'sma_20': (20, ()),
+        'sma_50': (50, ()),
+        'sma_200': (200, ()),
+        'bollinger_bands': (20, ()),
+        'volume_sma_20': (20, ()),
+        'macd': (0, (26, 9)),
+        'rsi': (15, ()),
+        'adx': (15, (14,)),
+        'stochastic': (20, ()),
+        'momentum': (14, ()),
+        'cci': (20, ()),
+        'roc': (14, ()),
+        'williams_r': (14, ()),
+        'vortex': (15, ()),
+        'fibonacci_retracements': None,
+        'pivot_points': (1, ()),
+        'donchian_channels': (20, ()),
+        'heikin_ashi': (1, ()),
+        'parabolic_sar': None,
+        'average_price': (0, ()),
+        'atr': (15, ()),
+        'keltner_channels': (15, (20,)),
+        'mfi': (15, ()),
+        'chaikin_volatility': (10, (10,)),
+        'ad_line': None,
+        'eom': (15, ()),
+        'connors_rsi': (101, ()),  # La racha se cuenta desde el inicio de la ventana: rachas de más de 100 velas no caben
+        'gann_levels': (20, ()),
+    }
+
+    # Columnas que añade get_metrics() con todos los indicadores, en el orden del DataFrame de salida
+    COLUMNAS_METRICAS = tuple(columna for _, columnas, _ in INDICADORES.values() for columna in columnas)
+
+    # Indicador del registro que produce cada columna
+    PRODUCTORES = {columna: nombre for nombre, (_, columnas, _) in INDICADORES.items() for columna in columnas}
+
+    @classmethod
+    def resolver_indicadores(cls, indicators=None):
+        """
+        Devuelve, en orden de cálculo, los indicadores del registro necesarios para obtener `indicators`
+        (nombres del registro o columnas de salida), incluidas sus dependencias. Sin argumento, devuelve todos.
+        Las columnas de precios ('close', 'volume'...) se aceptan y se ignoran.
+        """
+        if indicators is None:
+            return list(cls.INDICADORES)
+
+        elegidos = set()
+        pendientes = list(indicators)
+        while pendientes:
+            nombre = pendientes.pop()
+            if nombre in COLUMNAS_PRECIOS:
+                continue
+            clave = nombre if nombre in cls.INDICADORES else cls.PRODUCTORES.get(nombre)
+            if clave is None:
+                raise ValueError(f"Indicador desconocido: {nombre}")
+            if clave not in elegidos:
+                elegidos.add(clave)
+                pendientes.extend(cls.INDICADORES[clave][2])
+        return [clave for clave in cls.INDICADORES if clave in elegidos]
+
+    @classmethod
+    def calentamiento(cls, indicators=None, tolerancia=TOLERANCIA_EWM):
+        """
+        Devuelve las velas de histórico que necesitan `indicators` (y sus dependencias) antes de la primera fila que
+        se devuelve: la ventana más larga, con las EWM contadas hasta que el valor inicial pese menos de `tolerancia`.
+        Devuelve None si alguno depende de todo el histórico.
+        """
+        velas = 0
+        for clave in cls.resolver_indicadores(indicators):
+            if cls.CALENTAMIENTO[clave] is None:
+                return None
+            fijas, spans = cls.CALENTAMIENTO[clave]
+            velas = max(velas, fijas + sum(velas_convergencia_ewm(span, tolerancia) for span in spans))
+        return velas
+
+    def __calcular(self, claves, filas):
+        """
+        Calcula los indicadores de `claves` (ya resueltos, en orden) y deja en self.data el DataFrame de salida con las
+        últimas `filas` filas.
+        """
+        self.__reservar_bloque([columna for clave in claves for columna in self.INDICADORES[clave][1]])
+
+        for clave in claves:
+            metodo = self.INDICADORES[clave][0]
+            metodo(self)
+
+        # Las filas sin Momentum (de 14 periodos) se descartan al final, para que todos los indicadores vean el mismo
+        # histórico; se descartan aunque no se haya pedido el Momentum para que la salida tenga siempre las mismas filas
+        momentum = self.data['close'] - self.data['close'].shift(14)
+        self.__filtrar_filas(momentum.notna().to_numpy())
+        self.data = self.__construir_dataframe(filas=filas)
+        self.data = self.data.reset_index(drop=True)  # Restablecer el índice para mantener el DataFrame limpio
 
-    def get_metrics(self):
+    def get_metrics(self, indicators=None, filas=60, tolerancia=TOLERANCIA_EWM, cache=None):
         """
         Calcula y devuelve las métricas clave del DataFrame:
         - Media Móvil Simple (SMA 20, SMA 50, SMA 200)
@@ -542,37 +654,40 @@ class Dataset:
         - Parabolic SAR
         - Precio Promedio
         - Niveles de Gann
-        """
-        self.__calculate_sma_20()
-        self.__calculate_sma_50()
-        self.__calculate_sma_200()
-        self.__calculate_bollinger_bands()
-        self.__calculate_volume_sma_20()
-        self.__calculate_macd()
-        self.__calculate_RSI()
-        self.__calculate_adx()
-        self.__calculate_stochastic()
-        self.__calculate_momentum()
-        self.__calculate_cci()
-        self.__calculate_roc()
-        self.__calculate_williams_r()
-        self.__calculate_vortex()
-        self.__calculate_fibonacci_retracements()
-        self.__calculate_pivot_points()
-        self.__calculate_donchian_channels()
-        self.__calculate_heikin_ashi()
-        self.__calculate_parabolic_sar()
-        self.__calculate_average_price()
-        self.__calculate_atr()
-        self.__calculate_keltner_channels
-        self.__calculate_mfi()
-        self.__calculate_chaikin_volatility()
-        self.__calculate_ad_line()
-        self.__calculate_eom()
-        self.__calculate_connors_rsi()
-        self.__calculate_mfi()
-        self.__calculate_gann_levels()
-        self.data = self.data.iloc[-60:]
-        self.data = self.data.reset_index(drop=True)  # Restablecer el índice para mantener el DataFrame limpio
+
+        - indicators: Indicadores o columnas que se necesitan (p. ej. ['SMA_50', 'RSI']). Solo se calculan esos y sus
+          dependencias (ver resolver_indicadores). Por defecto se calculan todos.
+        - filas: Número de filas (las últimas) que se devuelven; None para devolver todo el histórico.
+        - tolerancia: Peso máximo del valor inicial de las EWM en las filas devueltas (ver calentamiento).
+        - cache: CacheMetricas opcional. Si ya tiene el resultado para las mismas velas (las que entran en el cálculo)
+          y la misma configuración, se devuelve sin calcular nada. La huella cubre toda la ventana de velas, así que
+          solo acierta con ventanas idénticas (varios consumidores de las mismas velas); con una vela nueva se
+          recalcula todo.
+
+        Los indicadores solo se calculan sobre las últimas filas más su calentamiento, así que el coste no crece con el
+        histórico guardado; si alguno depende de todo el histórico (Fibonacci, A/D, Parabolic SAR), se usa entero.
+        Se escriben en un bloque preasignado y el DataFrame se construye una sola vez al final, solo con las filas que
+        se devuelven. En modo normal el bloque y los precios son float64. En modo compacto (ver __init__) el bloque es
+        float32, los precios y el volumen float32, 'count' int32 y 'date' minutos epoch en int32 (minutos_a_fechas los
+        vuelve a convertir en fechas); cada valor difiere del modo normal en un error relativo de como mucho
+        COTA_ERROR_COMPACTO.
+        """
+        claves = self.resolver_indicadores(indicators)
+        calentamiento = self.calentamiento(claves, tolerancia)
+        if calentamiento is not None and filas is not None:
+            # También caben las 14 filas sin Momentum que se descartan al final
+            self.data = self.data.iloc[-(filas + max(calentamiento, 14)):]
+
+        guardado = None
+        if cache is not None:
+            precios = self.data[[columna for columna in COLUMNAS_PRECIOS if columna in self.data.columns]]
+            clave_cache = huella(precios, (tuple(claves), filas, tolerancia, self.compacto))
+            guardado = cache.get(clave_cache)
+        if guardado is not None:
+            self.data = guardado
+        else:
+            self.__calcular(claves, filas)
+            if cache is not None:
+                cache.guardar(clave_cache, self.data)
         print(self.data,self.data.columns)
         return self.data
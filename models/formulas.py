@@ -0,0 +1,208 @@
+# models/formulas.py
+"""
+Fórmulas de los indicadores técnicos, compartidas por Dataset (una Serie por campo de precios) y Panel (un DataFrame
+tiempo x pares por campo). Cada función recibe los precios y los intermedios que necesita (ver Dataset.INTERMEDIOS)
+y devuelve {columna de get_metrics(): valores}. Todas trabajan a lo largo del eje 0, así que valen igual para una
+Serie que para un DataFrame con una columna por par, salvo las que se indican como solo para Series.
+"""
+import numpy as np
+import pandas as pd
+
+from models.kernels import parabolic_sar as parabolic_sar_kernel, rolling_mean_abs_dev
+
+
+def sma(valores, period, columna):
+    """Media Móvil Simple de `period` periodos, guardada como `columna`."""
+    return {columna: valores.rolling(window=period).mean()}
+
+
+def bollinger_bands(close, sma_20, period=20):
+    """Bandas de Bollinger: la SMA ± 2 desviaciones estándar de `period` periodos."""
+    std = close.rolling(window=period).std()
+    return {'Banda_Superior': sma_20 + 2 * std, 'Banda_Inferior': sma_20 - 2 * std}
+
+
+def macd(close, short_window=12, long_window=26, signal_window=9):
+    """MACD: diferencia entre la EMA corta y la larga, su línea de señal y el histograma."""
+    ema_12 = close.ewm(span=short_window, adjust=False).mean()
+    ema_26 = close.ewm(span=long_window, adjust=False).mean()
+    macd_line = ema_12 - ema_26
+    signal_line = macd_line.ewm(span=signal_window, adjust=False).mean()
+    return {'EMA_12': ema_12, 'EMA_26': ema_26, 'MACD_Line': macd_line, 'Signal_Line': signal_line,
+            'Histograma': macd_line - signal_line}
+
+
+def rsi(gain, loss, period=14):
+    """RSI a partir de las ganancias y pérdidas de cada vela (medias simples de `period` periodos)."""
+    avg_gain = gain.rolling(window=period).mean()
+    avg_loss = loss.rolling(window=period).mean()
+    rs = avg_gain / avg_loss
+    return {'RSI': 100 - (100 / (1 + rs))}
+
+
+def adx(high, low, high_prev, low_prev, tr, period=14):
+    """ADX: media de `period` periodos del índice direccional, con el TR y los DM suavizados por EWM."""
+    up_move = high - high_prev
+    down_move = low_prev - low
+    dm_plus = up_move.clip(lower=0).where(up_move > down_move, 0)
+    dm_minus = down_move.clip(lower=0).where(down_move > up_move, 0)
+
+    tr_ema = tr.ewm(span=period, adjust=False).mean()
+    dm_plus_ema = dm_plus.ewm(span=period, adjust=False).mean()
+    dm_minus_ema = dm_minus.ewm(span=period, adjust=False).mean()
+
+    di_plus = 100 * (dm_plus_ema / tr_ema)
+    di_minus = 100 * (dm_minus_ema / tr_ema)
+    dx = 100 * np.abs(di_plus - di_minus) / (di_plus + di_minus)
+    return {'ADX': dx.rolling(window=period).mean()}
+
+
+def stochastic(close, low_min, high_max, smooth_k=3, smooth_d=3):
+    """Oscilador Estocástico: %K suavizado y su media %D."""
+    k = 100 * ((close - low_min) / (high_max - low_min))
+    k = k.rolling(window=smooth_k).mean()
+    return {'%K': k, '%D': k.rolling(window=smooth_d).mean()}
+
+
+def momentum(close, period=14):
+    """Momentum: diferencia con el cierre de hace `period` velas."""
+    return {'Momentum': close - close.shift(period)}
+
+
+def cci(typical_price, period=20):
+    """CCI: desviación del precio típico respecto a su media, en unidades de su desviación media absoluta."""
+    sma_pt = typical_price.rolling(window=period).mean()
+    mean_deviation = rolling_mean_abs_dev(typical_price.to_numpy(), period)
+    return {'CCI': (typical_price - sma_pt) / (0.015 * mean_deviation)}
+
+
+def roc(close, period=14):
+    """Rate of Change: cambio porcentual respecto al cierre de hace `period` velas."""
+    anterior = close.shift(period)
+    return {'ROC': ((close - anterior) / anterior) * 100}
+
+
+def williams_r(close, high_max, low_min):
+    """Williams %R, entre -100 y 0."""
+    return {'Williams_%R': ((high_max - close) / (high_max - low_min)) * -100}
+
+
+def vortex(high, low, high_prev, low_prev, tr, period=14):
+    """Vortex Indicator: movimientos vorticiales positivo y negativo sobre el TR de `period` periodos."""
+    vm_plus = np.abs(high - low_prev)
+    vm_minus = np.abs(low - high_prev)
+
+    tr_sum = tr.rolling(window=period).sum()
+    return {'VI+': vm_plus.rolling(window=period).sum() / tr_sum,
+            'VI-': vm_minus.rolling(window=period).sum() / tr_sum}
+
+
+def fibonacci_retracements(high, low):
+    """
+    Retrocesos de Fibonacci sobre el rango de todo el tramo recibido. Devuelve un valor por serie (un escalar con
+    Series, una Serie por par con DataFrames), que se repite en todas las filas.
+    """
+    maximo = high.max()
+    minimo = low.min()
+    diff = maximo - minimo
+    return {'Fibonacci_23.6': maximo - (0.236 * diff), 'Fibonacci_38.2': maximo - (0.382 * diff),
+            'Fibonacci_50.0': maximo - (0.500 * diff), 'Fibonacci_61.8': maximo - (0.618 * diff),
+            'Fibonacci_100.0': minimo}
+
+
+def pivot_points(high_prev, low_prev, close_prev):
+    """Pivot Points extendidos (PP, R1-R3, S1-S3) de la vela anterior."""
+    pp = (high_prev + low_prev + close_prev) / 3
+    return {'PP': pp, 'R1': (2 * pp) - low_prev, 'S1': (2 * pp) - high_prev,
+            'R2': pp + (high_prev - low_prev), 'S2': pp - (high_prev - low_prev),
+            'R3': high_prev + 2 * (pp - low_prev), 'S3': low_prev - 2 * (high_prev - pp)}
+
+
+def donchian_channels(high_max, low_min):
+    """Canales de Donchian: máximo, mínimo y punto medio del periodo."""
+    return {'Donchian_High': high_max, 'Donchian_Low': low_min, 'Donchian_Mid': (high_max + low_min) / 2}
+
+
+def gann_levels(high_max, low_min):
+    """Niveles de Gann: el rango del periodo dividido en 8 partes."""
+    rango = high_max - low_min
+    return {f'Gann_{octavo}/8': low_min + rango * octavo / 8 for octavo in range(1, 8)}
+
+
+def heikin_ashi(open_, high, low, close, open_prev, close_prev):
+    """Velas Heikin-Ashi. high/low son los extremos de high/low, open y close, sin contar los NaN."""
+    return {'HA_close': (open_ + high + low + close) / 4,
+            'HA_open': (open_prev + close_prev) / 2,
+            'HA_high': np.fmax(np.fmax(high, open_), close),
+            'HA_low': np.fmin(np.fmin(low, open_), close)}
+
+
+def parabolic_sar(open_, high, low, close, af_start=0.02, af_increment=0.02, af_max=0.2):
+    """Parabolic SAR (solo Series: es una recurrencia vela a vela, ver models.kernels.parabolic_sar)."""
+    return {'PSAR': parabolic_sar_kernel(open_.to_numpy(), high.to_numpy(), low.to_numpy(), close.to_numpy(),
+                                         af_start, af_increment, af_max)}
+
+
+def average_price(open_, high, low, close):
+    """Precio promedio de open, high, low y close."""
+    return {'Average_Price': (open_ + high + low + close) / 4}
+
+
+def atr(tr, period=14):
+    """ATR: media móvil simple del True Range."""
+    return {'ATR': tr.rolling(window=period).mean()}
+
+
+def keltner_channels(close, atr_, period=20, multiplier=2):
+    """Canales de Keltner: EMA del cierre ± `multiplier` veces el ATR."""
+    ema_keltner = close.ewm(span=period, adjust=False).mean()
+    return {'EMA_Keltner': ema_keltner, 'Keltner_Superior': ema_keltner + (multiplier * atr_),
+            'Keltner_Inferior': ema_keltner - (multiplier * atr_)}
+
+
+def mfi(typical_price, volume, period=14):
+    """Money Flow Index: RSI del flujo de dinero (precio típico por volumen)."""
+    money_flow = typical_price * volume
+    anterior = typical_price.shift(1)
+    positive_flow_sum = money_flow.where(typical_price > anterior, 0).rolling(window=period).sum()
+    negative_flow_sum = money_flow.where(typical_price < anterior, 0).rolling(window=period).sum()
+    money_flow_ratio = positive_flow_sum / negative_flow_sum
+    return {'MFI': 100 - (100 / (1 + money_flow_ratio))}
+
+
+def chaikin_volatility(high, low, period=10):
+    """Chaikin Volatility: cambio porcentual en `period` velas de la EMA del rango high - low."""
+    ema_range = (high - low).ewm(span=period, adjust=False).mean()
+    return {'Chaikin_Volatility': (ema_range.diff(period) / ema_range.shift(period)) * 100}
+
+
+def ad_line(high, low, close, volume):
+    """Línea de Acumulación/Distribución: flujo de dinero acumulado desde el inicio del tramo recibido."""
+    money_flow_multiplier = ((close - low) - (high - close)) / (high - low)
+    return {'A/D_Line': (money_flow_multiplier * volume).cumsum()}
+
+
+def eom(high, low, high_prev, low_prev, volume, period=14):
+    """Ease of Movement suavizado con una media móvil simple de `period` periodos."""
+    distance_moved = ((high + low) / 2) - ((high_prev + low_prev) / 2)
+    box_ratio = volume / (high - low)
+    return {'EOM_Smoothed': (distance_moved / box_ratio).rolling(window=period).mean()}
+
+
+def connors_rsi(close, gain, loss, delta, low_min, high_max, rsi_period=3, streak_rsi_period=2):
+    """
+    Connors RSI: media del RSI corto, el RSI de la racha y el porcentaje de retroceso (solo Series: la racha se
+    cuenta agrupando tramos consecutivos de la serie).
+    """
+    rsi_3 = rsi(gain, loss, rsi_period)['RSI']
+
+    # Longitud de la racha, con signo, de subidas o bajadas consecutivas
+    streak = pd.Series(np.where(delta > 0, 1, np.where(delta < 0, -1, 0)), index=delta.index)
+    streak_cumsum = streak.groupby((streak != streak.shift()).cumsum()).cumsum()
+
+    delta_streak = streak_cumsum.diff()
+    rsi_streak = rsi(delta_streak.where(delta_streak > 0, 0), -delta_streak.where(delta_streak < 0, 0),
+                     streak_rsi_period)['RSI']
+
+    pct_retracement = 100 * ((close - low_min) / (high_max - low_min))
+    return {'Connors_RSI': (rsi_3 + rsi_streak + pct_retracement) / 3}
@@ -3,8 +3,38 @@ from utils.symbol_mapping import mapped_ohlc_reverse
 import pandas as pd
 import matplotlib.pyplot as plt
 import matplotlib
-import seaborn as sns
+try:
+    import seaborn as sns  # Solo lo usan los gráficos clásicos; sin seaborn se dibujan con Axes.plot
+except ImportError:
+    sns = None
 import matplotlib.dates as mdates
+import numpy as np
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib.figure import Figure
+from PIL import Image
+from models.reduccion import reducir_velas
+
+def _linea(x, y, ax=None, **kwargs):
+    """Dibuja una línea con seaborn si está instalado o, si no, directamente con Axes.plot."""
+    ax = ax if ax is not None else plt.gca()
+    if sns is not None:
+        return sns.lineplot(x=x, y=y, ax=ax, **kwargs)
+    return ax.plot(x, y, **kwargs)
+
+
+def _rectangulos(x, inferior, superior, semiancho):
+    """Vértices (n, 4, 2) de n rectángulos centrados en x, entre `inferior` y `superior`, para una PolyCollection."""
+    izquierda, derecha = x - semiancho, x + semiancho
+    return np.stack([np.column_stack([izquierda, inferior]), np.column_stack([izquierda, superior]),
+                     np.column_stack([derecha, superior]), np.column_stack([derecha, inferior])], axis=1)
+
+
+# Renderizadores persistentes del proceso, por dpi (ver Grafico.candlestick_rapido)
+_renderizadores = {}
 
 
 class Grafico:
@@ -13,10 +43,14 @@ class Grafico:
     Ofrece varios tipos de gráficos: gráficos de línea, gráficos de velas, y combinaciones con volumen.
     """
 
+    # Indicadores de Dataset.get_metrics() que dibujan los gráficos
+    INDICADORES = ('SMA', 'SMA_50', 'SMA_200', 'Banda_Superior', 'Banda_Inferior', 'Volume_SMA')
+
     def __init__(self, df, pair):
         """Constructor de la clase. Recibe un DataFrame con los datos financieros."""
         self.df = df
         self.pair = mapped_ohlc_reverse.get(pair, 'No mapeado')
+        self.pair_kraken = pair
     
     def last_n_days(self):
         """
@@ -45,10 +79,10 @@ class Grafico:
         plt.figure(figsize=(24, 12))
 
         # Añadir líneas al gráfico con colores más brillantes
-        sns.lineplot(x=self.df.date, y=self.df['close'], color='#82CAFA', label='Precio de cierre')  # Azul claro
-        sns.lineplot(x=self.df.date, y=self.df.SMA, label='SMA', color='#FF6F61', linewidth=1, linestyle='--')  # Naranja claro, línea discontinua
-        sns.lineplot(x=self.df.date, y=self.df.SMA_50, label='SMA 50', color='#FFD700', linewidth=1, linestyle='--')  # Amarillo, línea discontinua
-        sns.lineplot(x=self.df.date, y=self.df.SMA_200, label='SMA 200', color='#FF69B4', linewidth=1, linestyle='--')  # Rosa, línea discontinua
+        _linea(self.df.date, self.df['close'], color='#82CAFA', label='Precio de cierre')  # Azul claro
+        _linea(self.df.date, self.df.SMA, label='SMA', color='#FF6F61', linewidth=1, linestyle='--')  # Naranja claro, línea discontinua
+        _linea(self.df.date, self.df.SMA_50, label='SMA 50', color='#FFD700', linewidth=1, linestyle='--')  # Amarillo, línea discontinua
+        _linea(self.df.date, self.df.SMA_200, label='SMA 200', color='#FF69B4', linewidth=1, linestyle='--')  # Rosa, línea discontinua
         #sns.lineplot(x=self.df.Date, y=self.df.Banda_Superior, label='Bandas de Bollinger superior e inferior', color='#FFD700', linewidth=2)  # Amarillo # Disponible en la versión v2
         #sns.lineplot(x=self.df.Date, y=self.df.Banda_Inferior, color='#FFD700', linewidth=2)  # Amarillo # Disponible en la versión v2
 
@@ -73,38 +107,60 @@ class Grafico:
     
 
 
-    def candlestick_with_volume(self):
-        # Asegurar que 'date' sea de tipo datetime y que esté como índice
-        self.df.set_index('date', inplace=True)
+    def candlestick_rapido(self, ruta='grafico.png', dpi=72):
+        """
+        Gráfico de velas con volumen dibujado con el RenderizadorVelas persistente del proceso (uno por dpi): mismo
+        contenido que candlestick_with_volume, pero sin crear una figura nueva en cada llamada.
+        """
+        if dpi not in _renderizadores:
+            _renderizadores[dpi] = RenderizadorVelas(dpi=dpi)
+        return _renderizadores[dpi].dibujar(self.df, self.pair_kraken, ruta)
+
+    def png_bytes(self, dpi=72):
+        """
+        Devuelve el gráfico de velas con volumen (candlestick_rapido) como bytes PNG, sin escribir ningún fichero.
+        """
+        buffer = io.BytesIO()
+        self.candlestick_rapido(buffer, dpi)
+        return buffer.getvalue()
+
+    def candlestick_with_volume(self, ruta='grafico.png', max_velas=4320):
+        # Con históricos largos, las velas se agrupan hasta el ancho en píxeles del gráfico (24 pulgadas a 200 dpi,
+        # sin márgenes): más velas caerían en el mismo píxel
+        # La fecha pasa a índice en una copia: reducir_velas devuelve el mismo DataFrame si no agrupa, y self.df
+        # no debe cambiar
+        df = reducir_velas(self.df, max_velas).set_index('date')
+        minutos = max(int((df.index[-1] - df.index[0]).total_seconds() // 60), 1)
+        minutos_por_vela = minutos / max(len(df) - 1, 1)
 
         plt.style.use("dark_background")
         fig, axs = plt.subplots(2, figsize=(24, 12), gridspec_kw={'height_ratios': [3, 1]})
 
         # Dibujar las velas en el subplot 1 usando plot_date
-        colors = ['#00FF7F' if close > open else '#FF6347' for open, close in zip(self.df['open'], self.df['close'])]
-        axs[0].vlines(self.df.index, self.df['low'], self.df['high'], colors=colors, linewidth=1)  # Líneas verticales para mechas
-        axs[0].vlines(self.df.index, self.df['open'], self.df['close'], colors=colors, linewidth=15)  # Líneas verticales para cuerpos
+        colors = ['#00FF7F' if close > open else '#FF6347' for open, close in zip(df['open'], df['close'])]
+        axs[0].vlines(df.index, df['low'], df['high'], colors=colors, linewidth=1)  # Líneas verticales para mechas
+        axs[0].vlines(df.index, df['open'], df['close'], colors=colors, linewidth=15)  # Líneas verticales para cuerpos
 
         # Añadir SMA y Bandas de Bollinger
-        sns.lineplot(data=self.df, x=self.df.index, y='SMA', label='SMA', color='#FFA07A', linewidth=2, ax=axs[0])
-        sns.lineplot(data=self.df, x=self.df.index, y='Banda_Superior', label='Banda de Bollinger Superior', color='#FFD700', linewidth=2, ax=axs[0])
-        sns.lineplot(data=self.df, x=self.df.index, y='Banda_Inferior', label='Banda Inferior', color='#FFD700', linewidth=2, ax=axs[0])
+        _linea(df.index, df['SMA'], label='SMA', color='#FFA07A', linewidth=2, ax=axs[0])
+        _linea(df.index, df['Banda_Superior'], label='Banda de Bollinger Superior', color='#FFD700', linewidth=2, ax=axs[0])
+        _linea(df.index, df['Banda_Inferior'], label='Banda Inferior', color='#FFD700', linewidth=2, ax=axs[0])
 
         # Calcular el precio mínimo y máximo
-        precio_minimo = self.df['low'].min()
-        precio_maximo = self.df['high'].max()
+        precio_minimo = df['low'].min()
+        precio_maximo = df['high'].max()
 
         # Dibujar líneas horizontales para el precio mínimo y máximo
-        axs[0].hlines(precio_minimo, xmin=self.df.index.min(), xmax=self.df.index.max(), colors='cyan', linestyles='dashed')
-        axs[0].hlines(precio_maximo, xmin=self.df.index.min(), xmax=self.df.index.max(), colors='magenta', linestyles='dashed')
+        axs[0].hlines(precio_minimo, xmin=df.index.min(), xmax=df.index.max(), colors='cyan', linestyles='dashed')
+        axs[0].hlines(precio_maximo, xmin=df.index.min(), xmax=df.index.max(), colors='magenta', linestyles='dashed')
 
         # Mostrar el precio mínimo y máximo sobre las líneas horizontales
-        axs[0].text(self.df.index[-1], precio_minimo, f'{precio_minimo:.2f}', color='cyan', ha='left', va='center', fontsize=10, backgroundcolor='#2E2E2E')
-        axs[0].text(self.df.index[-1], precio_maximo, f'{precio_maximo:.2f}', color='magenta', ha='left', va='center', fontsize=10, backgroundcolor='#2E2E2E')
+        axs[0].text(df.index[-1], precio_minimo, f'{precio_minimo:.2f}', color='cyan', ha='left', va='center', fontsize=10, backgroundcolor='#2E2E2E')
+        axs[0].text(df.index[-1], precio_maximo, f'{precio_maximo:.2f}', color='magenta', ha='left', va='center', fontsize=10, backgroundcolor='#2E2E2E')
 
         # Subplot 2: Volumen en gráfico de barras
-        axs[1].bar(self.df.index, self.df['volume'], color='#1E90FF', label='Volumen', width=0.0005)
-        axs[1].plot(self.df.index, self.df.Volume_SMA, color='red', label='Media móvil de volumen', linewidth=2)
+        axs[1].bar(df.index, df['volume'], color='#1E90FF', label='Volumen', width=0.0005 * minutos_por_vela)
+        axs[1].plot(df.index, df.Volume_SMA, color='red', label='Media móvil de volumen', linewidth=2)
 
         # Configuraciones adicionales
         axs[0].set_title(f'Evolución del precio de {self.pair} en Kraken', fontsize=20, color='white')
@@ -116,11 +172,159 @@ class Grafico:
         for ax in axs:
             ax.set_facecolor('#2E2E2E')
             ax.grid(True, color='grey')
-            ax.xaxis.set_major_locator(mdates.MinuteLocator(interval=1))  # Cada minuto como una marca mayor
+            ax.xaxis.set_major_locator(mdates.MinuteLocator(interval=max(minutos // 60, 1)))  # Cada minuto como marca mayor, hasta 60 marcas
             ax.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M'))  # Formato de hora y minuto
             ax.tick_params(axis='x', colors='white', rotation=45)
             ax.tick_params(axis='y', colors='white')
 
         plt.tight_layout()
-        plt.savefig('grafico.png', dpi=200)
+        plt.savefig(ruta, dpi=200)
         return fig
+
+
+class RenderizadorVelas:
+    """
+    Renderizador rápido del gráfico de velas con volumen.
+    La figura y sus artistas (segmentos para las mechas, rectángulos para cuerpos y volumen, líneas de SMA y Bollinger,
+    niveles mínimo y máximo) se crean una sola vez; en cada gráfico solo se actualizan sus datos y los límites de
+    los ejes, y se guarda con el backend Agg, sin pasar por pyplot ni seaborn.
+    """
+
+    def __init__(self, dpi=72, figsize=(24, 12), pixeles_por_vela=1):
+        """
+        Constructor de la clase RenderizadorVelas.
+        - dpi: Resolución de la imagen guardada (el gráfico clásico usa 200).
+        - figsize: Tamaño de la figura en pulgadas.
+        - pixeles_por_vela: Ancho mínimo en píxeles de cada vela dibujada; con más velas de las que caben, se agrupan
+          antes de dibujar (ver reducir_velas).
+        """
+        self.dpi = dpi
+        with plt.style.context('dark_background'):
+            self.fig = Figure(figsize=figsize, dpi=dpi)
+            FigureCanvasAgg(self.fig)
+            axs = self.fig.subplots(2, gridspec_kw={'height_ratios': [3, 1]})
+            self.axs = axs
+
+            # Subplot 1: velas, SMA, Bandas de Bollinger y niveles mínimo/máximo
+            self.mechas = LineCollection([], linewidths=1)
+            self.cuerpos = PolyCollection([], linewidths=0.5)  # El borde deja visibles las velas sin cuerpo
+            axs[0].add_collection(self.mechas)
+            axs[0].add_collection(self.cuerpos)
+            self.sma, = axs[0].plot([], [], color='#FFA07A', linewidth=2, label='SMA')
+            self.banda_superior, = axs[0].plot([], [], color='#FFD700', linewidth=2, label='Banda de Bollinger Superior')
+            self.banda_inferior, = axs[0].plot([], [], color='#FFD700', linewidth=2, label='Banda Inferior')
+            self.minimo, = axs[0].plot([], [], color='cyan', linestyle='dashed')
+            self.maximo, = axs[0].plot([], [], color='magenta', linestyle='dashed')
+            self.texto_minimo = axs[0].text(0, 0, '', color='cyan', ha='left', va='center', fontsize=10,
+                                            backgroundcolor='#2E2E2E')
+            self.texto_maximo = axs[0].text(0, 0, '', color='magenta', ha='left', va='center', fontsize=10,
+                                            backgroundcolor='#2E2E2E')
+
+            # Subplot 2: volumen como segmentos verticales y su media móvil
+            self.volumen = PolyCollection([], facecolors='#1E90FF', edgecolors='#1E90FF', linewidths=0.5,
+                                          label='Volumen')  # Con el borde, las barras de menos de un píxel no desaparecen
+            axs[1].add_collection(self.volumen)
+            self.volumen_sma, = axs[1].plot([], [], color='red', label='Media móvil de volumen', linewidth=2)
+
+            # Configuraciones adicionales
+            self.titulo = axs[0].set_title('', fontsize=20, color='white')
+            axs[1].set_title('Volumen de operaciones', fontsize=20, color='white')
+            axs[0].legend(handles=[self.sma, self.banda_superior, self.banda_inferior], loc='upper left', fontsize=10,
+                          facecolor='black', framealpha=0.8, edgecolor='white')
+            for ax in axs:
+                ax.set_facecolor('#2E2E2E')
+                ax.grid(True, color='grey')
+                ax.xaxis.set_major_locator(mdates.AutoDateLocator(minticks=6, maxticks=20))  # Unas pocas marcas, no una por minuto
+                ax.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M'))  # Formato de hora y minuto
+                ax.tick_params(axis='x', colors='white', rotation=45)
+                ax.tick_params(axis='y', colors='white')
+            # Márgenes fijos (tight_layout se calcularía con el título y las marcas todavía vacíos)
+            self.fig.subplots_adjust(left=0.04, right=0.95, top=0.95, bottom=0.07, hspace=0.3)
+
+        # Velas que caben en el ancho del eje: el tiempo de dibujo y la memoria no dependen de la longitud del histórico
+        ancho_pixeles = self.axs[0].get_position().width * figsize[0] * dpi
+        self.max_velas = max(int(ancho_pixeles / pixeles_por_vela), 2)
+
+    def dibujar(self, df, pair, ruta='grafico.png'):
+        """
+        Actualiza el gráfico con un DataFrame de métricas (columna o índice 'date', precios, SMA, Bandas de Bollinger y
+        Volume_SMA) y lo guarda en `ruta`. Devuelve la figura.
+        Si hay más velas que píxeles de ancho, se agrupan antes de dibujar.
+        """
+        df = reducir_velas(df, self.max_velas)
+        fechas = df['date'] if 'date' in df.columns else df.index
+        x = mdates.date2num(pd.DatetimeIndex(fechas))
+        apertura, cierre = df['open'].to_numpy(float), df['close'].to_numpy(float)
+        maximo, minimo = df['high'].to_numpy(float), df['low'].to_numpy(float)
+        volumen = df['volume'].to_numpy(float)
+
+        colores = np.where(cierre > apertura, '#00FF7F', '#FF6347')
+        self.mechas.set_segments(np.stack([np.column_stack([x, minimo]), np.column_stack([x, maximo])], axis=1))
+        self.mechas.set_colors(colores)
+        # Ancho de cuerpos y barras en unidades de fecha, según la separación entre velas
+        separacion = np.median(np.diff(x)) if len(x) > 1 else 1 / 1440
+        self.cuerpos.set_verts(_rectangulos(x, apertura, cierre, separacion * 0.35))
+        self.cuerpos.set_facecolors(colores)
+        self.cuerpos.set_edgecolors(colores)
+        self.volumen.set_verts(_rectangulos(x, np.zeros_like(volumen), volumen, separacion * 0.25))
+
+        self.sma.set_data(x, df['SMA'].to_numpy(float))
+        self.banda_superior.set_data(x, df['Banda_Superior'].to_numpy(float))
+        self.banda_inferior.set_data(x, df['Banda_Inferior'].to_numpy(float))
+        self.volumen_sma.set_data(x, df['Volume_SMA'].to_numpy(float))
+
+        # Precio mínimo y máximo, con su valor sobre la línea
+        precio_minimo, precio_maximo = np.nanmin(minimo), np.nanmax(maximo)
+        self.minimo.set_data([x[0], x[-1]], [precio_minimo, precio_minimo])
+        self.maximo.set_data([x[0], x[-1]], [precio_maximo, precio_maximo])
+        self.texto_minimo.set_position((x[-1], precio_minimo))
+        self.texto_minimo.set_text(f'{precio_minimo:.2f}')
+        self.texto_maximo.set_position((x[-1], precio_maximo))
+        self.texto_maximo.set_text(f'{precio_maximo:.2f}')
+
+        # Límites de los ejes (sin autoescalado, que recorrería todos los artistas)
+        margen_x = (x[-1] - x[0]) / max(len(x) - 1, 1)
+        precios = np.concatenate([minimo, maximo, df['Banda_Superior'].to_numpy(float),
+                                  df['Banda_Inferior'].to_numpy(float)])
+        bajo, alto = np.nanmin(precios), np.nanmax(precios)
+        margen_y = (alto - bajo) * 0.05 or 1.0
+        formato = mdates.DateFormatter('%d/%m %H:%M' if x[-1] - x[0] > 1 else '%H:%M')  # Con días, la fecha también
+        for ax in self.axs:
+            ax.set_xlim(x[0] - margen_x, x[-1] + margen_x)
+            ax.xaxis.set_major_formatter(formato)
+        self.axs[0].set_ylim(bajo - margen_y, alto + margen_y)
+        self.axs[1].set_ylim(0, max(np.nanmax(volumen), 1e-12) * 1.05)
+
+        self.titulo.set_text(f'Evolución del precio de {mapped_ohlc_reverse.get(pair, "No mapeado")} en Kraken')
+        # Se dibuja una sola vez sobre el lienzo Agg y se codifica el PNG en RGB con compresión mínima: savefig
+        # vuelve a dibujar la figura y la codificación con el nivel por defecto es la parte más lenta del guardado
+        self.fig.canvas.draw()
+        imagen = Image.fromarray(np.asarray(self.fig.canvas.buffer_rgba())[..., :3])
+        imagen.save(ruta, format='png', compress_level=1)
+        return self.fig
+
+
+def _png_par(pair, df, dpi):
+    """Proceso de trabajo de renderizar_pares: cada proceso dibuja sobre su propio lienzo Agg persistente."""
+    return Grafico(df, pair).png_bytes(dpi)
+
+
+def renderizar_pares(metricas, max_workers=None, dpi=72):
+    """
+    Dibuja el gráfico de velas de varios pares en paralelo, en un pool de procesos.
+    - metricas: {par: DataFrame de Dataset.get_metrics()}.
+    - max_workers: Número de procesos. Por defecto, el número de núcleos.
+    Devuelve {par: bytes PNG}. Los pares cuyo gráfico falla se informan por consola y no aparecen en el resultado.
+    """
+    if not metricas:
+        return {}
+    max_workers = min(max_workers or os.cpu_count() or 1, len(metricas))
+    imagenes = {}
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futuros = {pair: pool.submit(_png_par, pair, df, dpi) for pair, df in metricas.items()}
+        for pair, futuro in futuros.items():
+            try:
+                imagenes[pair] = futuro.result()
+            except Exception as e:
+                print(f"Error al dibujar el gráfico de {pair}: {e}")
+    return imagenes
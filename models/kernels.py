@@ -0,0 +1,97 @@
+# models/kernels.py
+"""
+Núcleos numéricos de los indicadores técnicos.
+Trabajan sobre arrays de NumPy planos (sin índices de pandas) para que los bucles que no se pueden
+vectorizar recorran los datos una sola vez. Si Numba está instalado, los bucles se compilan con él.
+"""
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # Numba es opcional
+    njit = None
+
+
+def _parabolic_sar_loop(high, low, psar, trend, ep, af_start, af_increment, af_max):
+    """
+    Recorre las velas aplicando la recurrencia del Parabolic SAR sobre `psar`, que llega con el valor de la primera
+    vela en psar[0] y se rellena en el sitio.
+    """
+    af = af_start
+    for i in range(1, len(psar)):
+        if trend == 1:
+            psar[i] = psar[i - 1] + af * (ep - psar[i - 1])
+            if low[i] < psar[i]:
+                trend = -1
+                psar[i] = ep
+                af = af_start
+                ep = low[i]
+            elif high[i] > ep:
+                ep = high[i]
+                af = min(af + af_increment, af_max)
+        else:
+            psar[i] = psar[i - 1] - af * (psar[i - 1] - ep)
+            if high[i] > psar[i]:
+                trend = 1
+                psar[i] = ep
+                af = af_start
+                ep = high[i]
+            elif low[i] < ep:
+                ep = low[i]
+                af = min(af + af_increment, af_max)
+    return psar
+
+
+if njit is not None:
+    _parabolic_sar_compiled = njit(cache=True)(_parabolic_sar_loop)
+
+
+def parabolic_sar(open_, high, low, close, af_start=0.02, af_increment=0.02, af_max=0.2):
+    """
+    Calcula el Parabolic SAR en una sola pasada sobre arrays de NumPy y devuelve un array float64.
+    La tendencia inicial la marca la primera vela (alcista si close > open) y la serie parte de su extremo contrario:
+    el mínimo si es alcista, el máximo si es bajista. (El cálculo original partía del cierre anterior, que en la
+    primera vela es NaN, y la recurrencia arrastraba ese NaN a toda la columna.)
+    """
+    open_ = np.asarray(open_, dtype=np.float64)
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+
+    psar = np.empty(len(close), dtype=np.float64)
+    if len(close) == 0:
+        return psar
+
+    alcista = close[0] > open_[0]
+    trend = 1 if alcista else -1
+    ep = high[0] if alcista else low[0]
+    psar[0] = low[0] if alcista else high[0]
+
+    if njit is not None:
+        return _parabolic_sar_compiled(high, low, psar, trend, ep, af_start, af_increment, af_max)
+
+    # Sin Numba, el bucle es más rápido sobre listas de floats de Python que indexando arrays escalar a escalar
+    resultado = _parabolic_sar_loop(high.tolist(), low.tolist(), psar.tolist(), trend, float(ep),
+                                    af_start, af_increment, af_max)
+    return np.asarray(resultado, dtype=np.float64)
+
+
+def rolling_mean_abs_dev(values, window, chunk=65536):
+    """
+    Desviación media absoluta móvil: para cada ventana de `window` valores, mean(|x - mean(x)|).
+    Equivale a rolling(window).apply(lambda x: np.mean(np.abs(x - np.mean(x)))) pero procesa todas las ventanas
+    de golpe con sliding_window_view, por bloques de `chunk` ventanas para acotar la memoria temporal.
+    - values: Array (n,) o (n, k); con varias columnas (p. ej. una por par), cada una se trata por separado.
+    Las primeras window - 1 posiciones, y las ventanas que contienen NaN, devuelven NaN.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    resultado = np.full(values.shape, np.nan)
+    if window <= 0 or len(values) < window:
+        return resultado
+
+    ventanas = np.lib.stride_tricks.sliding_window_view(values, window, axis=0)  # (n - window + 1, [k,] window)
+    for inicio in range(0, len(ventanas), chunk):
+        bloque = ventanas[inicio:inicio + chunk]
+        media = bloque.mean(axis=-1)
+        resultado[window - 1 + inicio:window - 1 + inicio + len(bloque)] = np.abs(bloque - media[..., None]).mean(axis=-1)
+    return resultado
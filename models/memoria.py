@@ -0,0 +1,37 @@
+# models/memoria.py
+"""
+Utilidades de memoria para históricos largos de muchos pares: apilar las métricas de varios pares en un solo
+DataFrame con el par como columna categórica e informar de lo que ocupa cada columna.
+"""
+import numpy as np
+import pandas as pd
+
+
+def apilar_pares(frames):
+    """
+    Apila las métricas de varios pares ({par: DataFrame}, p. ej. de Dataset(df, compacto=True).get_metrics()) en un
+    solo DataFrame con una columna 'pair' categórica: cada fila guarda un código de 1 o 2 bytes en lugar del texto.
+    """
+    pares = list(frames)
+    codigos = np.repeat(np.arange(len(pares), dtype=np.int16), [len(df) for df in frames.values()])
+    apilado = pd.concat(frames.values(), ignore_index=True)
+    apilado.insert(0, 'pair', pd.Categorical.from_codes(codigos, categories=pares))
+    return apilado
+
+
+def informe_memoria(df):
+    """
+    Devuelve los bytes que ocupa cada columna del DataFrame (incluido el contenido de las columnas de objetos), el
+    índice y el total, como {nombre: bytes}, más 'bytes_por_fila'.
+    """
+    uso = df.memory_usage(deep=True)
+    informe = {str(nombre): int(bytes_) for nombre, bytes_ in uso.items()}
+    informe['total'] = int(uso.sum())
+    informe['bytes_por_fila'] = informe['total'] / max(len(df), 1)
+    return informe
+
+
+def resumen_memoria(df):
+    """Devuelve informe_memoria(df) como texto de una línea, con el total en MB y los bytes por fila."""
+    informe = informe_memoria(df)
+    return f"{len(df)} filas, {informe['total'] / 1e6:.1f} MB ({informe['bytes_por_fila']:.0f} bytes por fila)"
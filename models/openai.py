@@ -1,9 +1,119 @@
+import sys
+import threading
+import time
+
+import numpy as np
 import openai
 
-def generar_comentario_openai(df_metrics):
+# Indicadores de Dataset.get_metrics() que se incluyen en el prompt
+INDICADORES_COMENTARIO = ('SMA_50', 'SMA_200', 'Banda_Superior', 'Banda_Inferior', 'MACD_Line', 'Signal_Line', 'RSI',
+                          'Momentum')
+
+# Límites de los tramos de RSI de la huella de mercado (sobreventa < 30, sobrecompra > 70)
+TRAMOS_RSI = (30, 45, 55, 70)
+
+# Límites del volumen medio de las 5 últimas velas respecto a la media de las 30 últimas (bajo, normal, alto).
+# El de una sola vela de 1 minuto cambia de tramo casi en cada vela
+TRAMOS_VOLUMEN = (0.5, 1.5)
+
+
+def huella_mercado(df_metrics):
+    '''
+    Resume el estado del mercado que describe el prompt en unos pocos valores discretos: tramo de RSI, MACD por encima
+    o por debajo de su señal, posición del cierre respecto a las Bandas de Bollinger, cruce de SMA 50 y SMA 200 y
+    régimen de volumen. Dos momentos con la misma huella darían lugar prácticamente al mismo comentario.
+    Los indicadores sin valor (NaN) cuentan como un tramo más.
+    '''
+    ultima = df_metrics.iloc[-1]
+
+    def tramo(valor, limites):
+        return -1 if np.isnan(valor) else int(np.searchsorted(limites, valor, side='right'))
+
+    def signo(a, b):
+        return 0 if np.isnan(a) or np.isnan(b) else (1 if a > b else -1)
+
+    close, inferior, superior = ultima['close'], ultima['Banda_Inferior'], ultima['Banda_Superior']
+    bandas = tramo(close, (inferior, (inferior + superior) / 2, superior)) if not np.isnan(inferior + superior) else -1
+    volumen = df_metrics['volume'].tail(30)
+    volumen_medio = volumen.mean()
+    return (
+        tramo(ultima['RSI'], TRAMOS_RSI),
+        signo(ultima['MACD_Line'], ultima['Signal_Line']),
+        bandas,
+        signo(ultima['SMA_50'], ultima['SMA_200']),
+        tramo(volumen.tail(5).mean() / volumen_medio if volumen_medio > 0 else np.nan, TRAMOS_VOLUMEN),
+    )
+
+
+class CacheComentarios:
+    '''
+    Comentarios generados por OpenAI por (par, huella de mercado). Mientras la huella no cambie y el comentario tenga
+    menos de `ttl` segundos, se reutiliza en lugar de volver a llamar a la API. Lleva la cuenta de aciertos y de la
+    latencia ahorrada (la que tardó en generarse cada comentario reutilizado), y de las llamadas a la API que fallaron,
+    que no se guardan.
+    '''
+
+    def __init__(self, ttl=900):
+        '''
+        Constructor de la clase CacheComentarios.
+        - ttl: Segundos durante los que un comentario se puede reutilizar.
+        '''
+        self.ttl = ttl
+        self.consultas = 0
+        self.aciertos = 0
+        self.latencia_ahorrada = 0.0
+        self.errores = 0
+        self.__comentarios = {}  # (par, huella) -> (comentario, instante de generación, segundos que tardó)
+        self.__cerrojo = threading.Lock()
+
+    def get(self, clave):
+        ''' Devuelve el comentario guardado para la clave si sigue vigente, o None '''
+        with self.__cerrojo:
+            self.consultas += 1
+            entrada = self.__comentarios.get(clave)
+            if entrada is None or time.monotonic() - entrada[1] > self.ttl:
+                self.__comentarios.pop(clave, None)
+                return None
+            self.aciertos += 1
+            self.latencia_ahorrada += entrada[2]
+            return entrada[0]
+
+    def guardar(self, clave, comentario, latencia):
+        ''' Guarda un comentario recién generado y lo que tardó en generarse, en segundos '''
+        with self.__cerrojo:
+            self.__comentarios[clave] = (comentario, time.monotonic(), latencia)
+
+    def registrar_error(self):
+        ''' Cuenta una llamada a la API que no devolvió comentario '''
+        with self.__cerrojo:
+            self.errores += 1
+
+    def resumen(self):
+        ''' Devuelve la tasa de aciertos, la latencia ahorrada y los errores de la API como texto '''
+        tasa = self.aciertos / self.consultas * 100 if self.consultas else 0.0
+        return (f'comentarios reutilizados: {self.aciertos}/{self.consultas} ({tasa:.0f} %), '
+                f'latencia ahorrada: {self.latencia_ahorrada:.1f} s, errores de la API: {self.errores}')
+
+
+def generar_comentario_openai(df_metrics, cache=None, pair=None):
+    '''
+    Genera el comentario técnico de las métricas con OpenAI.
+    - cache: CacheComentarios opcional; si el mercado tiene la misma huella (huella_mercado) que en un comentario
+      reciente del mismo par, se devuelve ese comentario sin llamar a la API.
+    - pair: Par de las métricas, para no mezclar comentarios de pares distintos en la caché.
+    Si la llamada a la API falla o no devuelve texto, se informa por stderr, se cuenta en la caché y se devuelve None;
+    los fallos nunca se guardan, así que el siguiente ciclo vuelve a llamar a la API.
+    '''
+    if cache is not None:
+        clave = (pair, huella_mercado(df_metrics))
+        comentario = cache.get(clave)
+        if comentario is not None:
+            return comentario
+
     # Convierte las últimas observaciones a un formato de texto
+    # (la fecha está en la columna 'date' o, si el gráfico clásico la ha pasado al índice, en el índice)
     observaciones = "\n".join([
-        f"{row.Index} - Precio cierre: {row.close:.2f}, Volumen: {row.volume:.2f}"
+        f"{getattr(row, 'date', row.Index)} - Precio cierre: {row.close:.2f}, Volumen: {row.volume:.2f}"
         for row in df_metrics.tail(30).itertuples()
     ])
 
@@ -37,6 +147,7 @@ def generar_comentario_openai(df_metrics):
     )
 
     # Llama a la API de OpenAI con gpt-3.5-turbo
+    inicio = time.perf_counter()
     try:
         response = openai.chat.completions.create(
         model="gpt-3.5-turbo",
@@ -46,13 +157,19 @@ def generar_comentario_openai(df_metrics):
          )
         # Extraer el contenido del mensaje
         content = response.choices[0].message.content
-
-
-        # Retornar el contenido
-        return content
-
     except Exception as e:
-            print(f"Error: {e}")
+        content = None
+        print(f"Error al generar el comentario de {pair or 'BTC/USD'} con OpenAI: {e}", file=sys.stderr)
+    else:
+        if content is None:
+            print(f"OpenAI no devolvió comentario para {pair or 'BTC/USD'}", file=sys.stderr)
+
+    if cache is not None:
+        if content is None:
+            cache.registrar_error()
+        else:
+            cache.guardar(clave, content, time.perf_counter() - inicio)
+    return content
 
 
 
@@ -0,0 +1,224 @@
+# models/panel.py
+"""
+Modo panel: indicadores de muchos pares a la vez.
+Cada campo de precios es una matriz (tiempo x pares) y los indicadores de Dataset se calculan a lo largo del eje 0 para
+todos los pares en una sola llamada, en lugar de crear un Dataset por par. Las fórmulas son las de models/formulas.py,
+las mismas que usa Dataset.
+"""
+import numpy as np
+import pandas as pd
+
+from models import formulas
+from models.dataset import Dataset
+
+
+class Panel:
+    """
+    Conjunto de precios de varios pares alineados en el tiempo.
+    Los indicadores se calculan con las mismas fórmulas (models/formulas.py) y los mismos intermedios que Dataset,
+    sobre DataFrames anchos con una columna por par, y se devuelven con los nombres de columna de Dataset.get_metrics().
+    """
+
+    def __init__(self, campos, pairs, index=None):
+        """
+        Constructor de la clase Panel.
+        - campos: {campo: matriz (tiempo x pares)} con al menos 'open', 'high', 'low', 'close' y 'volume'.
+        - pairs: Nombres de los pares, en el orden de las columnas de las matrices.
+        - index: Índice temporal común (opcional), p. ej. las fechas de las velas.
+        """
+        self.pairs = list(pairs)
+        self.data = {campo: pd.DataFrame(np.asarray(valores, dtype=np.float64), index=index, columns=self.pairs)
+                     for campo, valores in campos.items()}
+        self.__intermedios = {}
+        self.__resultado = {}
+
+    @classmethod
+    def from_frames(cls, frames):
+        """
+        Construye el panel a partir de {par: DataFrame OHLC} (como los de Kraken_API.get_OHCL_data), alineando las
+        velas por fecha. Las velas que faltan en un par quedan a NaN.
+        """
+        pairs = list(frames)
+        nombres = ['open', 'high', 'low', 'close', 'volume']
+        # Una sola alineación por fecha para todos los campos: columnas (campo, par)
+        ancho = pd.concat({pair: df[nombres].astype(np.float64).set_axis(pd.to_datetime(df['date']))
+                           for pair, df in frames.items()}, axis=1).sort_index()
+        ancho.columns = ancho.columns.swaplevel()
+        campos = {campo: ancho[campo][pairs].to_numpy() for campo in nombres}
+        return cls(campos, pairs, index=ancho.index)
+
+    def __intermedio(self, nombre, *params):
+        """
+        Devuelve un intermedio de Dataset.INTERMEDIOS calculado sobre el panel, solo la primera vez.
+        """
+        clave = (nombre,) + params
+        if clave not in self.__intermedios:
+            dependencias, funcion = Dataset.INTERMEDIOS[nombre]
+            argumentos = [self.__intermedio(d) if d in Dataset.INTERMEDIOS else self.data[d] for d in dependencias]
+            self.__intermedios[clave] = funcion(*argumentos, *params)
+        return self.__intermedios[clave]
+
+    def __guardar_columnas(self, columnas):
+        """
+        Guarda las columnas que devuelve una fórmula de models/formulas.py ({columna: DataFrame tiempo x pares}).
+        """
+        self.__resultado.update(columnas)
+
+    def __calculate_sma_20(self):
+        self.__guardar_columnas(formulas.sma(self.data['close'], 20, 'SMA'))
+
+    def __calculate_sma_50(self):
+        self.__guardar_columnas(formulas.sma(self.data['close'], 50, 'SMA_50'))
+
+    def __calculate_sma_200(self):
+        self.__guardar_columnas(formulas.sma(self.data['close'], 200, 'SMA_200'))
+
+    def __calculate_volume_sma_20(self):
+        self.__guardar_columnas(formulas.sma(self.data['volume'], 20, 'Volume_SMA'))
+
+    def __calculate_bollinger_bands(self):
+        self.__guardar_columnas(formulas.bollinger_bands(self.data['close'], self.__resultado['SMA']))
+
+    def __calculate_macd(self):
+        self.__guardar_columnas(formulas.macd(self.data['close']))
+
+    def __calculate_RSI(self, period=14):
+        self.__guardar_columnas(formulas.rsi(self.__intermedio('gain'), self.__intermedio('loss'), period))
+
+    def __calculate_adx(self, period=14):
+        self.__guardar_columnas(formulas.adx(self.data['high'], self.data['low'], self.__intermedio('high_prev'),
+                                             self.__intermedio('low_prev'), self.__intermedio('TR'), period))
+
+    def __calculate_stochastic(self, period=14):
+        self.__guardar_columnas(formulas.stochastic(self.data['close'], self.__intermedio('low_min', period),
+                                                    self.__intermedio('high_max', period)))
+
+    def __calculate_momentum(self, period=14):
+        self.__guardar_columnas(formulas.momentum(self.data['close'], period))
+
+    def __calculate_cci(self, period=20):
+        self.__guardar_columnas(formulas.cci(self.__intermedio('typical_price'), period))
+
+    def __calculate_roc(self, period=14):
+        self.__guardar_columnas(formulas.roc(self.data['close'], period))
+
+    def __calculate_williams_r(self, period=14):
+        self.__guardar_columnas(formulas.williams_r(self.data['close'], self.__intermedio('high_max', period),
+                                                    self.__intermedio('low_min', period)))
+
+    def __calculate_vortex(self, period=14):
+        self.__guardar_columnas(formulas.vortex(self.data['high'], self.data['low'], self.__intermedio('high_prev'),
+                                                self.__intermedio('low_prev'), self.__intermedio('TR'), period))
+
+    def __calculate_fibonacci_retracements(self):
+        # Un nivel por par, repetido en todas las filas como en Dataset
+        close = self.data['close']
+        niveles = formulas.fibonacci_retracements(self.data['high'], self.data['low'])
+        self.__guardar_columnas({columna: pd.DataFrame(np.broadcast_to(valores.to_numpy(), close.shape),
+                                                       index=close.index, columns=close.columns)
+                                 for columna, valores in niveles.items()})
+
+    def __calculate_pivot_points(self):
+        self.__guardar_columnas(formulas.pivot_points(self.__intermedio('high_prev'), self.__intermedio('low_prev'),
+                                                      self.__intermedio('close_prev')))
+
+    def __calculate_donchian_channels(self, period=20):
+        self.__guardar_columnas(formulas.donchian_channels(self.__intermedio('high_max', period),
+                                                           self.__intermedio('low_min', period)))
+
+    def __calculate_heikin_ashi(self):
+        self.__guardar_columnas(formulas.heikin_ashi(self.data['open'], self.data['high'], self.data['low'],
+                                                     self.data['close'], self.data['open'].shift(1),
+                                                     self.__intermedio('close_prev')))
+
+    def __calculate_average_price(self):
+        self.__guardar_columnas(formulas.average_price(self.data['open'], self.data['high'], self.data['low'],
+                                                       self.data['close']))
+
+    def __calculate_atr(self, period=14):
+        self.__guardar_columnas(formulas.atr(self.__intermedio('TR'), period))
+
+    def __calculate_keltner_channels(self, period=20):
+        self.__guardar_columnas(formulas.keltner_channels(self.data['close'], self.__resultado['ATR'], period))
+
+    def __calculate_mfi(self, period=14):
+        self.__guardar_columnas(formulas.mfi(self.__intermedio('typical_price'), self.data['volume'], period))
+
+    def __calculate_chaikin_volatility(self, period=10):
+        self.__guardar_columnas(formulas.chaikin_volatility(self.data['high'], self.data['low'], period))
+
+    def __calculate_ad_line(self):
+        self.__guardar_columnas(formulas.ad_line(self.data['high'], self.data['low'], self.data['close'],
+                                                 self.data['volume']))
+
+    def __calculate_eom(self, period=14):
+        self.__guardar_columnas(formulas.eom(self.data['high'], self.data['low'], self.__intermedio('high_prev'),
+                                             self.__intermedio('low_prev'), self.data['volume'], period))
+
+    def __calculate_gann_levels(self, period=20):
+        self.__guardar_columnas(formulas.gann_levels(self.__intermedio('high_max', period),
+                                                     self.__intermedio('low_min', period)))
+
+    # Indicadores de Dataset.INDICADORES disponibles en modo panel: nombre -> método. Faltan los dos que no se
+    # pueden calcular a la vez para todos los pares a lo largo del eje 0:
+    # - parabolic_sar: recurrencia vela a vela en la que cada valor depende del anterior y de la tendencia.
+    # - connors_rsi: la longitud de la racha se obtiene agrupando los tramos consecutivos de subidas/bajadas de
+    #   cada serie.
+    INDICADORES = {
+        'sma_20': __calculate_sma_20,
+        'sma_50': __calculate_sma_50,
+        'sma_200': __calculate_sma_200,
+        'bollinger_bands': __calculate_bollinger_bands,
+        'volume_sma_20': __calculate_volume_sma_20,
+        'macd': __calculate_macd,
+        'rsi': __calculate_RSI,
+        'adx': __calculate_adx,
+        'stochastic': __calculate_stochastic,
+        'momentum': __calculate_momentum,
+        'cci': __calculate_cci,
+        'roc': __calculate_roc,
+        'williams_r': __calculate_williams_r,
+        'vortex': __calculate_vortex,
+        'fibonacci_retracements': __calculate_fibonacci_retracements,
+        'pivot_points': __calculate_pivot_points,
+        'donchian_channels': __calculate_donchian_channels,
+        'heikin_ashi': __calculate_heikin_ashi,
+        'average_price': __calculate_average_price,
+        'atr': __calculate_atr,
+        'keltner_channels': __calculate_keltner_channels,
+        'mfi': __calculate_mfi,
+        'chaikin_volatility': __calculate_chaikin_volatility,
+        'ad_line': __calculate_ad_line,
+        'eom': __calculate_eom,
+        'gann_levels': __calculate_gann_levels,
+    }
+
+    def get_metrics(self, indicators=None):
+        """
+        Calcula los indicadores para todos los pares y devuelve {columna de Dataset: DataFrame (tiempo x pares)}.
+        - indicators: Indicadores o columnas que se necesitan, como en Dataset.get_metrics(). Por defecto, todos los
+          disponibles en modo panel. Pedir uno que no lo está (p. ej. 'PSAR') lanza ValueError.
+        A diferencia de Dataset.get_metrics(), se devuelven todas las filas, sin recortar el histórico inicial.
+        """
+        claves = list(self.INDICADORES) if indicators is None else Dataset.resolver_indicadores(indicators)
+        no_disponibles = [clave for clave in claves if clave not in self.INDICADORES]
+        if no_disponibles:
+            raise ValueError(f"Indicadores no disponibles en modo panel: {', '.join(no_disponibles)}")
+
+        self.__intermedios = {}
+        self.__resultado = {}
+        for clave in claves:
+            self.INDICADORES[clave](self)
+
+        # Mismo orden de columnas que Dataset.get_metrics()
+        return {columna: self.__resultado[columna] for columna in Dataset.COLUMNAS_METRICAS
+                if columna in self.__resultado}
+
+    def por_par(self, metricas, pair):
+        """
+        Devuelve un DataFrame con los precios y los indicadores de un par, con las columnas de Dataset.get_metrics().
+        - metricas: Resultado de get_metrics().
+        """
+        columnas = {campo: valores[pair] for campo, valores in self.data.items()}
+        columnas.update({columna: valores[pair] for columna, valores in metricas.items()})
+        return pd.DataFrame(columnas).rename_axis('date').reset_index()
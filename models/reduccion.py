@@ -0,0 +1,103 @@
+# models/reduccion.py
+"""
+Reducción de series largas antes de dibujarlas.
+Un gráfico no puede mostrar más velas que columnas de píxeles tiene el eje: con días de velas de 1 minuto, la mayoría
+de los segmentos caen en el mismo píxel y solo cuestan tiempo de dibujo y memoria. Aquí las velas se agrupan en tantos
+cubos consecutivos como píxeles de ancho (open/close de la primera/última vela, high/low extremos, volumen sumado) y
+las líneas de indicadores se reducen con LTTB (Largest-Triangle-Three-Buckets), que conserva picos y valles.
+"""
+import numpy as np
+import pandas as pd
+
+# Columnas de métricas que se dibujan como líneas y se reducen con LTTB
+COLUMNAS_LINEAS = ('SMA', 'SMA_50', 'SMA_200', 'Banda_Superior', 'Banda_Inferior', 'Volume_SMA')
+
+
+def cubos(n, max_cubos):
+    """
+    Posiciones de inicio de max_cubos cubos consecutivos de tamaño casi igual que cubren n elementos
+    (un cubo por elemento si n <= max_cubos).
+    """
+    if n <= max_cubos:
+        return np.arange(n)
+    return np.unique(np.linspace(0, n, max_cubos, endpoint=False).astype(np.int64))
+
+
+def lttb(y, inicios):
+    """
+    Selecciona un punto por cubo con LTTB: en cada cubo, el que forma el triángulo de mayor área con el punto
+    elegido en el cubo anterior y la media del cubo siguiente. Los puntos se toman equiespaciados en x (velas).
+    - y: Array (n,) o (n, k); con varias columnas, cada una se reduce por separado en la misma pasada.
+    - inicios: Posiciones de inicio de cada cubo (ver cubos()).
+    Devuelve las posiciones elegidas, con la forma (cubos,) o (cubos, k). Los NaN (p. ej. el arranque de una SMA)
+    no se eligen salvo que todo el cubo lo sea.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    unidimensional = y.ndim == 1
+    y = y.reshape(len(y), -1)
+    n, m = len(y), len(inicios)
+    finales = np.r_[inicios[1:], n]
+    x = np.arange(n, dtype=np.float64)
+
+    # Media de cada cubo, el tercer vértice del triángulo del cubo anterior (el último cubo usa el último punto)
+    tamanos = (finales - inicios)[:, None]
+    media_x = np.add.reduceat(x, inicios) / tamanos[:, 0]
+    media_y = np.add.reduceat(np.nan_to_num(y), inicios, axis=0) / tamanos
+    media_x, media_y = np.r_[media_x[1:], x[-1]], np.vstack([media_y[1:], y[-1:]])
+
+    columnas = np.arange(y.shape[1])
+    elegidos = np.empty((m, y.shape[1]), dtype=np.int64)
+    ax, ay = np.zeros(y.shape[1]), y[0].copy()
+    for i in range(m):
+        a, b = inicios[i], finales[i]
+        cx, cy = media_x[i], media_y[i]
+        area = np.abs((ax - cx) * (y[a:b] - ay) - (ax - x[a:b, None]) * (cy - ay))
+        elegidos[i] = a + np.argmax(np.where(np.isnan(area), -1.0, area), axis=0)
+        ax, ay = elegidos[i].astype(np.float64), y[elegidos[i], columnas]
+    return elegidos[:, 0] if unidimensional else elegidos
+
+
+def reducir_velas(df, max_velas, lineas=COLUMNAS_LINEAS):
+    """
+    Reduce un DataFrame de métricas (columna o índice 'date', open/high/low/close/volume y líneas de indicadores) a
+    como mucho max_velas velas. Cada vela resultante agrupa velas consecutivas: fecha y open de la primera, close de
+    la última, high/low extremos, volume y count sumados y vwap ponderado por volumen. Las columnas de `lineas`
+    toman el valor del punto que elige LTTB dentro del cubo, de modo que los picos se conservan (queda dibujado en
+    la fecha del cubo, a menos de un píxel de la suya); Volume_SMA se multiplica por el número de velas del cubo para
+    seguir en la escala del volumen. Si el DataFrame ya cabe, se devuelve tal cual.
+    """
+    n = len(df)
+    if n <= max_velas:
+        return df
+
+    inicios = cubos(n, max_velas)
+    finales = np.r_[inicios[1:], n]
+    en_indice = 'date' not in df.columns
+    fechas = df.index if en_indice else df['date']
+
+    reducido = {'date': pd.DatetimeIndex(fechas)[inicios]}
+    reducido['open'] = df['open'].to_numpy(float)[inicios]
+    reducido['high'] = np.maximum.reduceat(df['high'].to_numpy(float), inicios)
+    reducido['low'] = np.minimum.reduceat(df['low'].to_numpy(float), inicios)
+    reducido['close'] = df['close'].to_numpy(float)[finales - 1]
+    volumen = df['volume'].to_numpy(float)
+    reducido['volume'] = np.add.reduceat(volumen, inicios)
+    if 'vwap' in df.columns:
+        pv = np.add.reduceat(df['vwap'].to_numpy(float) * volumen, inicios)
+        reducido['vwap'] = np.divide(pv, reducido['volume'], out=reducido['close'].copy(),
+                                     where=reducido['volume'] > 0)
+    if 'count' in df.columns:
+        reducido['count'] = np.add.reduceat(df['count'].to_numpy(), inicios)
+
+    lineas = [columna for columna in lineas if columna in df.columns]
+    if lineas:
+        valores = df[lineas].to_numpy(float)
+        elegidos = lttb(valores, inicios)
+        for j, columna in enumerate(lineas):
+            reducido[columna] = valores[elegidos[:, j], j]
+    if 'Volume_SMA' in reducido:
+        # El volumen de cada vela agrupada es la suma de sus velas: su media móvil se escala igual
+        reducido['Volume_SMA'] = reducido['Volume_SMA'] * (finales - inicios)
+
+    resultado = pd.DataFrame(reducido)
+    return resultado.set_index('date') if en_indice else resultado
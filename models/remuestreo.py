@@ -0,0 +1,196 @@
+# models/remuestreo.py
+"""
+Temporalidades superiores (5m, 15m, 1h...) derivadas de la serie base de velas de 1 minuto.
+Con cada actualización de la base solo se convierten y agregan las velas de 1 minuto de las velas superiores afectadas
+(normalmente la última, que sigue abierta), y las series derivadas se guardan en una caché LRU por (par, intervalo).
+"""
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from api.kraken_api import COLUMNAS_OHLC
+
+
+# Columnas de las series en caché, como arrays: fechas en minutos epoch y el resto de COLUMNAS_OHLC
+COLUMNAS_SERIE = ('minuto', 'open', 'high', 'low', 'close', 'vwap', 'volume', 'count')
+
+
+def _a_arrays(velas):
+    """
+    Convierte un DataFrame de velas en {columna: array} (sin copiar las columnas que ya son float64).
+    """
+    arrays = {'minuto': velas['date'].to_numpy(dtype='datetime64[ns]').astype('datetime64[m]').astype(np.int64)}
+    for columna in ('open', 'high', 'low', 'close', 'vwap', 'volume'):
+        arrays[columna] = velas[columna].to_numpy(dtype=np.float64)
+    arrays['count'] = velas['count'].to_numpy(dtype=np.int64)
+    return arrays
+
+
+def _agregar(arrays, minutos):
+    """
+    Agrupa arrays de velas de 1 minuto en velas de `minutos` minutos, alineadas a múltiplos del intervalo.
+    """
+    cubos = arrays['minuto'] // minutos * minutos
+    if len(cubos) == 0:
+        return {columna: valores[:0] for columna, valores in arrays.items()}
+    inicios = np.flatnonzero(np.r_[True, cubos[1:] != cubos[:-1]])
+    finales = np.r_[inicios[1:], len(cubos)]
+
+    volumen = np.add.reduceat(arrays['volume'], inicios)
+    cierre = arrays['close'][finales - 1]
+    pv = np.add.reduceat(arrays['vwap'] * arrays['volume'], inicios)
+    return {
+        'minuto': cubos[inicios],
+        'open': arrays['open'][inicios],
+        'high': np.maximum.reduceat(arrays['high'], inicios),
+        'low': np.minimum.reduceat(arrays['low'], inicios),
+        'close': cierre,
+        'vwap': np.divide(pv, volumen, out=cierre.copy(), where=volumen > 0),
+        'volume': volumen,
+        'count': np.add.reduceat(arrays['count'], inicios),
+    }
+
+
+def _a_dataframe(arrays):
+    """
+    Construye el DataFrame de velas (columnas de Kraken_API.get_OHCL_data()) a partir de los arrays de una serie.
+    """
+    columnas = {'date': arrays['minuto'].astype('datetime64[m]').astype('datetime64[ns]')}
+    columnas.update((columna, arrays[columna]) for columna in COLUMNAS_OHLC[1:])
+    return pd.DataFrame(columnas, columns=COLUMNAS_OHLC)
+
+
+def agregar_velas(velas, minutos):
+    """
+    Agrupa velas de 1 minuto en velas de `minutos` minutos, alineadas a múltiplos del intervalo.
+    open/close de la primera/última vela, high/low extremos, volume y count sumados y vwap ponderado por volumen
+    (el cierre si el volumen es 0). Devuelve un DataFrame con las columnas de Kraken_API.get_OHCL_data().
+    """
+    return _a_dataframe(_agregar(_a_arrays(velas), minutos))
+
+
+class _Serie:
+    """
+    Velas de una serie derivada en arrays con holgura al final: sustituir la última vela y añadir las siguientes
+    cuesta O(velas nuevas) amortizado, y la serie se recorta a las últimas `max_velas`.
+    """
+
+    def __init__(self, max_velas=None):
+        self.max_velas = max_velas
+        self.arrays = None
+        self.inicio = self.fin = 0
+
+    def __len__(self):
+        return self.fin - self.inicio
+
+    def vistas(self):
+        """Devuelve la serie como {columna: array}, vistas sin copia válidas hasta la siguiente escritura."""
+        return {columna: valores[self.inicio:self.fin] for columna, valores in self.arrays.items()}
+
+    def ultimo_minuto(self):
+        return self.arrays['minuto'][self.fin - 1] if len(self) else None
+
+    def sustituir_ultima(self, nuevas):
+        """Sustituye la última vela (si hay alguna) por las velas de `nuevas` ({columna: array})."""
+        k = len(nuevas['minuto'])
+        if self.max_velas is not None and k > self.max_velas:
+            nuevas = {columna: valores[-self.max_velas:] for columna, valores in nuevas.items()}
+            k = self.max_velas
+        fin = self.fin - 1 if len(self) else self.fin
+
+        if self.arrays is None or fin + k > len(self.arrays['minuto']):
+            # Sin sitio al final: las velas que se conservan pasan al principio de arrays nuevos con el doble de sitio
+            conservar = fin - self.inicio
+            if self.max_velas is not None:
+                conservar = min(conservar, self.max_velas - k)
+            capacidad = 2 * max(conservar + k, self.max_velas or 0, 8)
+            arrays = {columna: np.empty(capacidad, dtype=valores.dtype) for columna, valores in nuevas.items()}
+            if self.arrays is not None:
+                for columna, valores in arrays.items():
+                    valores[:conservar] = self.arrays[columna][fin - conservar:fin]
+            self.arrays, self.inicio, fin = arrays, 0, conservar
+
+        for columna, valores in self.arrays.items():
+            valores[fin:fin + k] = nuevas[columna]
+        self.fin = fin + k
+        if self.max_velas is not None:
+            self.inicio = max(self.inicio, self.fin - self.max_velas)
+
+
+class Remuestreador:
+    """
+    Mantiene, por par, la serie base de 1 minuto y las series derivadas de cada intervalo en una caché LRU.
+    Con una sola descarga de velas de 1 minuto por par se obtienen todas las temporalidades, listas para Dataset.
+    Cada serie derivada agrega todas las velas de 1 minuto recibidas (también las que ya no están en la base que se
+    pasa a actualizar()), hasta un máximo de `max_velas` velas.
+    """
+
+    def __init__(self, intervalos=(1, 5, 15, 60), max_entradas=128, max_velas=720):
+        """
+        Constructor de la clase Remuestreador.
+        - intervalos: Intervalos en minutos que se derivan en cada actualización (1 es la propia base).
+        - max_entradas: Número máximo de series (par, intervalo) en la caché; se descartan las menos usadas.
+        - max_velas: Número máximo de velas que se conservan de cada serie derivada (None para no limitarlas).
+        """
+        self.intervalos = tuple(intervalos)
+        self.max_entradas = max_entradas
+        self.max_velas = max_velas
+        # (par, intervalo) -> [_Serie, DataFrame o None si no se ha pedido, velas de 1 minuto de la última vela]
+        self.__cache = OrderedDict()
+
+    def __guardar(self, clave, entrada):
+        self.__cache[clave] = entrada
+        self.__cache.move_to_end(clave)
+        while len(self.__cache) > self.max_entradas:
+            self.__cache.popitem(last=False)
+
+    def actualizar(self, pair, base):
+        """
+        Actualiza las series del par a partir de su serie base de 1 minuto (p. ej. la de AlmacenVelas.fusionar o
+        Kraken_API.get_OHCL_data). Las series se leen después con get().
+        Si el par ya estaba en caché, solo se convierten y agregan las velas de la base desde el inicio de la última
+        vela superior guardada, que es la que podía estar incompleta. Sus velas de 1 minuto se guardan aparte, así que
+        si la base nueva empieza después (p. ej. tras un corte), la vela se completa sin perder las que ya tenía.
+        """
+        fechas = base['date'].to_numpy(dtype='datetime64[ns]')
+        for minutos in self.intervalos:
+            clave = (pair, minutos)
+            if minutos == 1:
+                self.__guardar(clave, [None, base[COLUMNAS_OHLC].reset_index(drop=True), None])
+                continue
+
+            if clave in self.__cache and len(self.__cache[clave][0]):
+                serie, _, pendientes = self.__cache[clave]
+                # Velas de 1 minuto de la base desde el inicio de la última vela superior guardada
+                desde = np.datetime64(int(serie.ultimo_minuto()), 'm').astype('datetime64[ns]')
+                cola = _a_arrays(base.iloc[int(np.searchsorted(fechas, desde)):])
+                if len(cola['minuto']) == 0:
+                    self.__cache.move_to_end(clave)
+                    continue
+                # Minutos de la última vela que ya no están en la base
+                previos = pendientes['minuto'] < cola['minuto'][0]
+                cola = {columna: np.concatenate([pendientes[columna][previos], cola[columna]]) for columna in COLUMNAS_SERIE}
+            else:
+                serie = _Serie(self.max_velas)
+                cola = _a_arrays(base)
+                if len(cola['minuto']) == 0:
+                    continue
+
+            nuevas = _agregar(cola, minutos)
+            serie.sustituir_ultima(nuevas)
+            ultima = cola['minuto'] // minutos * minutos == nuevas['minuto'][-1]
+            self.__guardar(clave, [serie, None, {columna: valores[ultima] for columna, valores in cola.items()}])
+
+    def get(self, pair, minutos):
+        """
+        Devuelve la serie del par para el intervalo (en minutos) como DataFrame de velas, o None si no está en caché.
+        """
+        clave = (pair, minutos)
+        if clave not in self.__cache:
+            return None
+        self.__cache.move_to_end(clave)
+        entrada = self.__cache[clave]
+        if entrada[1] is None:
+            entrada[1] = _a_dataframe(entrada[0].vistas())
+        return entrada[1]
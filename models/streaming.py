@@ -0,0 +1,565 @@
+# models/streaming.py
+"""
+Cálculo incremental de los indicadores de Dataset: cada vela nueva actualiza un estado acotado por indicador
+(sumas móviles, EMAs, colas monótonas para máximos/mínimos, estado del Parabolic SAR...) en lugar de recalcular
+todo el histórico. Las actualizaciones reproducen los algoritmos de pandas (sumas con compensación de Kahan,
+varianza de Welford, EWM con adjust=False), así que la fila resultante coincide con la última fila de get_metrics().
+"""
+from collections import deque
+import math
+
+import numpy as np
+import pandas as pd
+
+nan = float('nan')
+
+
+def _dividir(a, b):
+    """
+    División con la semántica IEEE de NumPy/pandas (x/0 = ±inf, 0/0 = NaN) en lugar de ZeroDivisionError.
+    """
+    if b == 0:
+        if a == 0 or a != a:
+            return nan
+        return math.copysign(math.inf, a) * math.copysign(1.0, b)
+    return a / b
+
+
+class SumaMovil:
+    """
+    Suma y media móviles de `window` valores. Ignora los NaN y solo devuelve resultado con la ventana completa,
+    como rolling(window).sum()/.mean().
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.valores = deque()
+        self.validos = 0
+        self.suma = 0.0
+        self.compensacion = 0.0
+
+    def _sumar(self, x):
+        y = x - self.compensacion
+        t = self.suma + y
+        self.compensacion = t - self.suma - y
+        self.suma = t
+
+    def add(self, x):
+        """Añade un valor y devuelve la suma de la ventana (NaN si la ventana no está completa)."""
+        if len(self.valores) == self.window:
+            viejo = self.valores.popleft()
+            if viejo == viejo:
+                self.validos -= 1
+                if self.validos:
+                    self._sumar(-viejo)
+                else:
+                    self.suma = self.compensacion = 0.0
+        self.valores.append(x)
+        if x == x:
+            self.validos += 1
+            self._sumar(x)
+        return self.suma if self.validos == self.window else nan
+
+    def media(self):
+        return self.suma / self.validos if self.validos == self.window else nan
+
+
+class VarianzaMovil:
+    """
+    Varianza móvil muestral (ddof=1) con el algoritmo de Welford con altas y bajas, como rolling(window).var().
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.valores = deque()
+        self.validos = 0
+        self.media = 0.0
+        self.ssqdm = 0.0
+        self.compensacion = 0.0
+
+    def add(self, x):
+        """Añade un valor y devuelve la varianza de la ventana (NaN si la ventana no está completa)."""
+        if len(self.valores) == self.window:
+            viejo = self.valores.popleft()
+            if viejo == viejo:
+                self.validos -= 1
+                if self.validos:
+                    media_previa = self.media - self.compensacion
+                    y = viejo - self.compensacion
+                    t = y - self.media
+                    self.compensacion = t + self.media - y
+                    self.media -= t / self.validos
+                    self.ssqdm -= (viejo - media_previa) * (viejo - self.media)
+                else:
+                    self.media = self.ssqdm = self.compensacion = 0.0
+        self.valores.append(x)
+        if x == x:
+            self.validos += 1
+            media_previa = self.media - self.compensacion
+            y = x - self.compensacion
+            t = y - self.media
+            self.compensacion = t + self.media - y
+            self.media += t / self.validos
+            self.ssqdm += (x - media_previa) * (x - self.media)
+        if self.validos < self.window or self.validos < 2:
+            return nan
+        return max(self.ssqdm / (self.validos - 1), 0.0)
+
+
+class ExtremoMovil:
+    """
+    Máximo (o mínimo) móvil de `window` valores con una cola monótona: O(1) amortizado por valor.
+    """
+
+    def __init__(self, window, maximo=True):
+        self.window = window
+        self.maximo = maximo
+        self.cola = deque()  # (posición, valor), valores monótonos desde el extremo actual
+        self.ventana = deque()  # 1 si el valor de esa posición es válido
+        self.validos = 0
+        self.n = 0
+
+    def add(self, x):
+        """Añade un valor y devuelve el extremo de la ventana (NaN si la ventana no está completa)."""
+        if len(self.ventana) == self.window:
+            self.validos -= self.ventana.popleft()
+        while self.cola and self.cola[0][0] <= self.n - self.window:
+            self.cola.popleft()
+        valido = x == x
+        self.ventana.append(int(valido))
+        if valido:
+            self.validos += 1
+            if self.maximo:
+                while self.cola and self.cola[-1][1] <= x:
+                    self.cola.pop()
+            else:
+                while self.cola and self.cola[-1][1] >= x:
+                    self.cola.pop()
+            self.cola.append((self.n, x))
+        self.n += 1
+        return self.cola[0][1] if self.validos == self.window else nan
+
+
+class EMA:
+    """
+    Media móvil exponencial equivalente a ewm(span=span, adjust=False).mean(), incluidos los NaN iniciales.
+    """
+
+    def __init__(self, span):
+        self.alpha = 2.0 / (span + 1.0)
+        self.valor = nan
+        self.peso = 1.0
+
+    def add(self, x):
+        """Añade un valor y devuelve la EMA actualizada."""
+        if self.valor == self.valor:
+            self.peso *= 1.0 - self.alpha
+            if x == x:
+                if self.valor != x:
+                    self.valor = (self.peso * self.valor + self.alpha * x) / (self.peso + self.alpha)
+                self.peso = 1.0
+        elif x == x:
+            self.valor = x
+        return self.valor
+
+
+class Retardo:
+    """
+    Devuelve el valor de hace `periodos` llamadas (NaN mientras no haya suficiente historia), como shift(periodos).
+    """
+
+    def __init__(self, periodos=1):
+        self.valores = deque([nan] * periodos, maxlen=periodos)
+
+    def add(self, x):
+        anterior = self.valores[0]
+        self.valores.append(x)
+        return anterior
+
+
+class ParabolicSAR:
+    """
+    Estado del Parabolic SAR: misma recurrencia que models.kernels.parabolic_sar, vela a vela.
+    """
+
+    def __init__(self, af_start=0.02, af_increment=0.02, af_max=0.2):
+        self.af_start = af_start
+        self.af_increment = af_increment
+        self.af_max = af_max
+        self.psar = None
+
+    def add(self, open_, high, low, close):
+        if self.psar is None:
+            # Primera vela: fija la tendencia inicial y el punto extremo; la serie parte de su extremo contrario
+            alcista = close > open_
+            self.trend = 1 if alcista else -1
+            self.ep = high if alcista else low
+            self.af = self.af_start
+            self.psar = low if alcista else high
+            return self.psar
+
+        if self.trend == 1:
+            self.psar = self.psar + self.af * (self.ep - self.psar)
+            if low < self.psar:
+                self.trend, self.psar, self.af, self.ep = -1, self.ep, self.af_start, low
+            elif high > self.ep:
+                self.ep = high
+                self.af = min(self.af + self.af_increment, self.af_max)
+        else:
+            self.psar = self.psar - self.af * (self.psar - self.ep)
+            if high > self.psar:
+                self.trend, self.psar, self.af, self.ep = 1, self.ep, self.af_start, high
+            elif low < self.ep:
+                self.ep = low
+                self.af = min(self.af + self.af_increment, self.af_max)
+        return self.psar
+
+
+class IndicadoresIncrementales:
+    """
+    Mantiene el estado de todos los indicadores de Dataset.get_metrics() (con sus parámetros por defecto)
+    y calcula los de cada vela nueva en tiempo constante.
+    El CCI recorre su ventana de 20 valores para la desviación media absoluta, que no admite bajas en O(1).
+    Fibonacci usa el rango de todo el histórico visto hasta la vela, igual que get_metrics() para su última fila.
+    """
+
+    def __init__(self):
+        # Retardos de una vela
+        self.open_prev = Retardo()
+        self.high_prev = Retardo()
+        self.low_prev = Retardo()
+        self.close_prev = Retardo()
+        self.tp_prev = Retardo()
+
+        # Medias y bandas
+        self.sma_20 = SumaMovil(20)
+        self.sma_50 = SumaMovil(50)
+        self.sma_200 = SumaMovil(200)
+        self.var_20 = VarianzaMovil(20)
+        self.volume_sma = SumaMovil(20)
+
+        # MACD
+        self.ema_12 = EMA(12)
+        self.ema_26 = EMA(26)
+        self.signal = EMA(9)
+
+        # RSI
+        self.rsi_gain = SumaMovil(14)
+        self.rsi_loss = SumaMovil(14)
+
+        # ADX
+        self.tr_ema = EMA(14)
+        self.dm_plus_ema = EMA(14)
+        self.dm_minus_ema = EMA(14)
+        self.dx_sma = SumaMovil(14)
+
+        # Extremos móviles compartidos (Estocástico, Williams %R, Donchian, Gann, Connors)
+        self.high_max_14 = ExtremoMovil(14)
+        self.low_min_14 = ExtremoMovil(14, maximo=False)
+        self.high_max_20 = ExtremoMovil(20)
+        self.low_min_20 = ExtremoMovil(20, maximo=False)
+        self.high_max_100 = ExtremoMovil(100)
+        self.low_min_100 = ExtremoMovil(100, maximo=False)
+
+        # Estocástico
+        self.k_sma = SumaMovil(3)
+        self.d_sma = SumaMovil(3)
+
+        # Momentum y ROC
+        self.close_lag_14 = Retardo(14)
+
+        # CCI
+        self.pt_sma = SumaMovil(20)
+        self.pt_ventana = deque(maxlen=20)
+
+        # Vortex
+        self.tr_sum = SumaMovil(14)
+        self.vm_plus_sum = SumaMovil(14)
+        self.vm_minus_sum = SumaMovil(14)
+
+        # Fibonacci (rango de todo el histórico)
+        self.high_total = nan
+        self.low_total = nan
+
+        # Parabolic SAR
+        self.psar = ParabolicSAR()
+
+        # ATR y Keltner
+        self.atr_sma = SumaMovil(14)
+        self.ema_keltner = EMA(20)
+
+        # MFI
+        self.positive_flow = SumaMovil(14)
+        self.negative_flow = SumaMovil(14)
+
+        # Chaikin Volatility
+        self.ema_range = EMA(10)
+        self.ema_range_lag = Retardo(10)
+
+        # A/D Line
+        self.ad_line = 0.0
+
+        # EOM
+        self.eom_sma = SumaMovil(14)
+
+        # Connors RSI
+        self.rsi_3_gain = SumaMovil(3)
+        self.rsi_3_loss = SumaMovil(3)
+        self.streak_prev = None
+        self.streak_cumsum = Retardo()
+        self.streak_acumulado = 0
+        self.streak_gain = SumaMovil(2)
+        self.streak_loss = SumaMovil(2)
+
+    @staticmethod
+    def _rsi(avg_gain, avg_loss):
+        return 100 - (100 / (1 + _dividir(avg_gain, avg_loss)))
+
+    def actualizar(self, vela):
+        """
+        Procesa una vela (mapeo con 'open', 'high', 'low', 'close' y 'volume') y devuelve un diccionario
+        {columna: valor} con los indicadores de Dataset.COLUMNAS_METRICAS para esa vela.
+        """
+        return self.procesar(float(vela['open']), float(vela['high']), float(vela['low']),
+                             float(vela['close']), float(vela['volume']))
+
+    def procesar(self, o, h, l, c, v):
+        """
+        Igual que actualizar(), pero recibe directamente los floats open, high, low, close y volume.
+        """
+        o_prev = self.open_prev.add(o)
+        h_prev = self.high_prev.add(h)
+        l_prev = self.low_prev.add(l)
+        c_prev = self.close_prev.add(c)
+        fila = {}
+
+        # Medias móviles y Bandas de Bollinger
+        self.sma_20.add(c)
+        sma = self.sma_20.media()
+        self.sma_50.add(c)
+        self.sma_200.add(c)
+        std = math.sqrt(self.var_20.add(c))
+        self.volume_sma.add(v)
+        fila['SMA'] = sma
+        fila['SMA_50'] = self.sma_50.media()
+        fila['SMA_200'] = self.sma_200.media()
+        fila['Banda_Superior'] = sma + 2 * std
+        fila['Banda_Inferior'] = sma - 2 * std
+        fila['Volume_SMA'] = self.volume_sma.media()
+
+        # MACD
+        ema_12 = self.ema_12.add(c)
+        ema_26 = self.ema_26.add(c)
+        macd_line = ema_12 - ema_26
+        signal_line = self.signal.add(macd_line)
+        fila['EMA_12'] = ema_12
+        fila['EMA_26'] = ema_26
+        fila['MACD_Line'] = macd_line
+        fila['Signal_Line'] = signal_line
+        fila['Histograma'] = macd_line - signal_line
+
+        # RSI (los NaN de la primera diferencia cuentan como 0, igual que delta.where(...))
+        delta = c - c_prev
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else -0.0
+        self.rsi_gain.add(gain)
+        self.rsi_loss.add(loss)
+        fila['RSI'] = self._rsi(self.rsi_gain.media(), self.rsi_loss.media())
+
+        # ADX
+        tr = max(h - l, abs(h - c_prev), abs(l - c_prev)) if c_prev == c_prev else nan
+        up_move = h - h_prev
+        down_move = l_prev - l
+        dm_plus = max(up_move, 0.0) if up_move > down_move else 0.0
+        dm_minus = max(down_move, 0.0) if down_move > up_move else 0.0
+        tr_ema = self.tr_ema.add(tr)
+        di_plus = 100 * _dividir(self.dm_plus_ema.add(dm_plus), tr_ema)
+        di_minus = 100 * _dividir(self.dm_minus_ema.add(dm_minus), tr_ema)
+        self.dx_sma.add(_dividir(100 * abs(di_plus - di_minus), di_plus + di_minus))
+        fila['ADX'] = self.dx_sma.media()
+
+        # Estocástico
+        high_max_14 = self.high_max_14.add(h)
+        low_min_14 = self.low_min_14.add(l)
+        self.k_sma.add(100 * _dividir(c - low_min_14, high_max_14 - low_min_14))
+        k = self.k_sma.media()
+        self.d_sma.add(k)
+        fila['%K'] = k
+        fila['%D'] = self.d_sma.media()
+
+        # Momentum
+        close_lag = self.close_lag_14.add(c)
+        fila['Momentum'] = c - close_lag
+
+        # CCI
+        pt = (h + l + c) / 3
+        self.pt_sma.add(pt)
+        sma_pt = self.pt_sma.media()
+        self.pt_ventana.append(pt)
+        if len(self.pt_ventana) == self.pt_ventana.maxlen:
+            media = sum(self.pt_ventana) / len(self.pt_ventana)
+            mean_deviation = sum(abs(x - media) for x in self.pt_ventana) / len(self.pt_ventana)
+        else:
+            mean_deviation = nan
+        fila['CCI'] = _dividir(pt - sma_pt, 0.015 * mean_deviation)
+
+        # ROC
+        fila['ROC'] = _dividir(c - close_lag, close_lag) * 100
+
+        # Williams %R
+        fila['Williams_%R'] = _dividir(high_max_14 - c, high_max_14 - low_min_14) * -100
+
+        # Vortex
+        tr_sum = self.tr_sum.add(tr)
+        fila['VI+'] = _dividir(self.vm_plus_sum.add(abs(h - l_prev)), tr_sum)
+        fila['VI-'] = _dividir(self.vm_minus_sum.add(abs(l - h_prev)), tr_sum)
+
+        # Fibonacci
+        self.high_total = h if math.isnan(self.high_total) else max(self.high_total, h)
+        self.low_total = l if math.isnan(self.low_total) else min(self.low_total, l)
+        diff = self.high_total - self.low_total
+        fila['Fibonacci_23.6'] = self.high_total - (0.236 * diff)
+        fila['Fibonacci_38.2'] = self.high_total - (0.382 * diff)
+        fila['Fibonacci_50.0'] = self.high_total - (0.500 * diff)
+        fila['Fibonacci_61.8'] = self.high_total - (0.618 * diff)
+        fila['Fibonacci_100.0'] = self.low_total
+
+        # Pivot Points
+        pp = (h_prev + l_prev + c_prev) / 3
+        fila['PP'] = pp
+        fila['R1'] = (2 * pp) - l_prev
+        fila['S1'] = (2 * pp) - h_prev
+        fila['R2'] = pp + (h_prev - l_prev)
+        fila['S2'] = pp - (h_prev - l_prev)
+        fila['R3'] = h_prev + 2 * (pp - l_prev)
+        fila['S3'] = l_prev - 2 * (h_prev - pp)
+
+        # Donchian y Gann
+        high_max_20 = self.high_max_20.add(h)
+        low_min_20 = self.low_min_20.add(l)
+        fila['Donchian_High'] = high_max_20
+        fila['Donchian_Low'] = low_min_20
+        fila['Donchian_Mid'] = (high_max_20 + low_min_20) / 2
+
+        # Heikin-Ashi
+        fila['HA_close'] = (o + h + l + c) / 4
+        fila['HA_open'] = (o_prev + c_prev) / 2
+        fila['HA_high'] = max(h, o, c)
+        fila['HA_low'] = min(l, o, c)
+
+        # Parabolic SAR y precio promedio
+        fila['PSAR'] = self.psar.add(o, h, l, c)
+        fila['Average_Price'] = (o + h + l + c) / 4
+
+        # ATR y Keltner
+        self.atr_sma.add(tr)
+        atr = self.atr_sma.media()
+        ema_keltner = self.ema_keltner.add(c)
+        fila['ATR'] = atr
+        fila['EMA_Keltner'] = ema_keltner
+        fila['Keltner_Superior'] = ema_keltner + (2 * atr)
+        fila['Keltner_Inferior'] = ema_keltner - (2 * atr)
+
+        # MFI
+        tp_prev = self.tp_prev.add(pt)
+        money_flow = pt * v
+        positive_flow_sum = self.positive_flow.add(money_flow if pt > tp_prev else 0.0)
+        negative_flow_sum = self.negative_flow.add(money_flow if pt < tp_prev else 0.0)
+        fila['MFI'] = 100 - (100 / (1 + _dividir(positive_flow_sum, negative_flow_sum)))
+
+        # Chaikin Volatility
+        ema_range = self.ema_range.add(h - l)
+        ema_range_lag = self.ema_range_lag.add(ema_range)
+        fila['Chaikin_Volatility'] = _dividir(ema_range - ema_range_lag, ema_range_lag) * 100
+
+        # A/D Line (cumsum de pandas: los NaN no acumulan)
+        money_flow_volume = _dividir((c - l) - (h - c), h - l) * v
+        if money_flow_volume == money_flow_volume:
+            self.ad_line += money_flow_volume
+            fila['A/D_Line'] = self.ad_line
+        else:
+            fila['A/D_Line'] = nan
+
+        # EOM
+        distance_moved = ((h + l) / 2) - ((h_prev + l_prev) / 2)
+        self.eom_sma.add(_dividir(distance_moved, _dividir(v, h - l)))
+        fila['EOM_Smoothed'] = self.eom_sma.media()
+
+        # Connors RSI
+        self.rsi_3_gain.add(gain)
+        self.rsi_3_loss.add(loss)
+        rsi_3 = self._rsi(self.rsi_3_gain.media(), self.rsi_3_loss.media())
+        streak = 1 if delta > 0 else (-1 if delta < 0 else 0)
+        self.streak_acumulado = self.streak_acumulado + streak if streak == self.streak_prev else streak
+        self.streak_prev = streak
+        delta_streak = self.streak_acumulado - self.streak_cumsum.add(self.streak_acumulado)
+        self.streak_gain.add(delta_streak if delta_streak > 0 else 0.0)
+        self.streak_loss.add(-delta_streak if delta_streak < 0 else -0.0)
+        rsi_streak = self._rsi(self.streak_gain.media(), self.streak_loss.media())
+        high_max_100 = self.high_max_100.add(h)
+        low_min_100 = self.low_min_100.add(l)
+        pct_retracement = 100 * _dividir(c - low_min_100, high_max_100 - low_min_100)
+        fila['Connors_RSI'] = (rsi_3 + rsi_streak + pct_retracement) / 3
+
+        # Niveles de Gann
+        rango = high_max_20 - low_min_20
+        for octavo in range(1, 8):
+            fila[f'Gann_{octavo}/8'] = low_min_20 + rango * octavo / 8
+
+        return fila
+
+
+class VentanaFilas:
+    """
+    Últimas `capacidad` filas de una tabla, en bloques preasignados con una fila contigua por columna (un bloque por
+    tipo de columna de la plantilla). Como en AnilloVelas, cada fila se escribe en i y en i + capacidad, así que las
+    filas guardadas forman siempre un tramo contiguo: agregar() cuesta lo mismo sea cual sea la capacidad y
+    dataframe() solo copia ese tramo.
+    """
+
+    def __init__(self, plantilla, capacidad):
+        """
+        Constructor de la clase VentanaFilas.
+        - plantilla: DataFrame con las columnas (y sus tipos) de la ventana; sus últimas `capacidad` filas son las
+          filas iniciales.
+        - capacidad: Número de filas que se conservan (al menos 1).
+        """
+        if capacidad < 1:
+            raise ValueError("La capacidad de la ventana debe ser al menos 1")
+        self.capacidad = capacidad
+        self.columnas = list(plantilla.columns)
+        iniciales = plantilla.iloc[-capacidad:]
+        self.__n = len(iniciales)
+        self.__posicion = self.__n % capacidad  # Posición donde se escribe la siguiente fila
+
+        tipos = {}
+        for columna in self.columnas:
+            tipos.setdefault(iniciales[columna].to_numpy().dtype, []).append(columna)
+        self.__bloques = []  # (columnas, bloque columnas x 2 * capacidad)
+        for tipo, columnas in tipos.items():
+            bloque = np.empty((len(columnas), 2 * capacidad), dtype=tipo)
+            for j, columna in enumerate(columnas):
+                bloque[j, :self.__n] = bloque[j, capacidad:capacidad + self.__n] = iniciales[columna].to_numpy()
+            self.__bloques.append((columnas, bloque))
+
+    def __len__(self):
+        return self.__n
+
+    def agregar(self, fila):
+        """
+        Añade una fila ({columna: valor}) al final, sustituyendo a la más antigua si la ventana está llena.
+        Las columnas que no están en la fila quedan a NaN; las que no son de la ventana se ignoran.
+        """
+        i = self.__posicion
+        for columnas, bloque in self.__bloques:
+            valores = np.array([fila.get(columna, nan) for columna in columnas], dtype=bloque.dtype)
+            bloque[:, i] = bloque[:, i + self.capacidad] = valores
+        self.__posicion = (i + 1) % self.capacidad
+        self.__n = min(self.__n + 1, self.capacidad)
+
+    def dataframe(self):
+        """Devuelve las filas guardadas, de la más antigua a la más reciente, como DataFrame nuevo (copia)."""
+        fin = self.__posicion + self.capacidad
+        tramo = slice(fin - self.__n, fin)
+        valores = {columna: bloque[j, tramo] for columnas, bloque in self.__bloques for j, columna in enumerate(columnas)}
+        return pd.DataFrame(valores, columns=self.columnas)
@@ -0,0 +1,13 @@
+# tests/conftest.py
+"""
+Fixtures compartidas por las pruebas.
+"""
+import pytest
+
+from utilidades import velas_sinteticas
+
+
+@pytest.fixture(scope='session')
+def velas():
+    """3000 velas sintéticas de 1 minuto. Se comparten entre pruebas: no deben modificarse."""
+    return velas_sinteticas(3000, semilla=5)
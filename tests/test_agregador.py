@@ -0,0 +1,64 @@
+# tests/test_agregador.py
+"""
+Velas construidas con AgregadorTrades frente a las velas OHLC de Kraken del mismo tramo.
+tests/datos tiene una respuesta Trades y la respuesta OHLC de 1 minuto del mismo tramo de XBTUSD, en el formato de
+Kraken: 8 minutos, sin operaciones en el tercero, el cuarto y el séptimo, y el último todavía abierto.
+"""
+import json
+import os
+
+import numpy as np
+import pytest
+
+from api.kraken_api import Kraken_API, trades_a_arrays
+from models.agregador import AgregadorTrades
+
+DATOS = os.path.join(os.path.dirname(__file__), 'datos')
+
+
+def respuesta(nombre):
+    with open(os.path.join(DATOS, nombre)) as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def api():
+    """Kraken_API que responde con las respuestas grabadas en lugar de consultar Kraken."""
+    respuestas = {'Trades': respuesta('kraken_trades_XBTUSD.json'), 'OHLC': respuesta('kraken_ohlc_XBTUSD.json')}
+    api = Kraken_API()
+    api.api.query_public = lambda metodo, parametros: respuestas[metodo]
+    return api
+
+
+def comparar(velas, ohlc):
+    assert (velas['date'].to_numpy() == ohlc['date'].to_numpy()).all()
+    for columna in ('open', 'high', 'low', 'close', 'count'):
+        np.testing.assert_array_equal(velas[columna].to_numpy(), ohlc[columna].to_numpy(), err_msg=columna)
+    np.testing.assert_allclose(velas['volume'], ohlc['volume'], rtol=1e-12, atol=1e-12)
+
+    # Kraken redondea el vwap a la precisión del precio (1 decimal en XBTUSD). En los minutos sin operaciones no se
+    # compara: el agregador usa el cierre anterior y la convención de Kraken no está comprobada con datos reales
+    operados = ohlc['volume'].to_numpy() > 0
+    np.testing.assert_allclose(velas['vwap'][operados], ohlc['vwap'][operados], rtol=0, atol=0.05)
+
+
+def test_velas_de_trades_coinciden_con_ohlc(api):
+    agregador = AgregadorTrades('1min')
+    velas = api.get_OHCL_data_trades('XBTUSD', [agregador])[60]
+    ohlc, _ = api.get_OHCL_data('XBTUSD')
+
+    # La última vela de la respuesta OHLC es la que se está formando
+    cerradas = ohlc.iloc[:-1].reset_index(drop=True)
+    assert (cerradas['volume'] == 0).sum() == 3
+    comparar(velas, cerradas)
+    comparar(agregador.velas(incluir_actual=True), ohlc)
+
+
+def test_velas_de_trades_por_lotes(api):
+    precios, volumenes, tiempos = trades_a_arrays(respuesta('kraken_trades_XBTUSD.json')['result']['XXBTZUSD'])
+    ohlc, _ = api.get_OHCL_data('XBTUSD')
+
+    agregador = AgregadorTrades('1min')
+    for lote in np.array_split(np.arange(len(precios)), 4):
+        agregador.procesar(precios[lote], volumenes[lote], tiempos[lote])
+    comparar(agregador.velas(incluir_actual=True), ohlc)
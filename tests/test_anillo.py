@@ -0,0 +1,114 @@
+# tests/test_anillo.py
+"""
+AnilloVelas frente a la cola de un DataFrame con todas las velas recibidas, con varias vueltas al anillo y
+sustituyendo la vela que seguía abierta.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from api.kraken_api import Kraken_API, ohlc_a_arrays, ohlc_a_dataframe
+from models.anillo import AnilloVelas
+
+INICIO = 1700000040
+
+
+def filas_kraken(tiempos, semilla):
+    """Velas en el formato de la respuesta OHLC de Kraken (precios como texto) para los tiempos dados."""
+    rng = np.random.default_rng(semilla)
+    filas = []
+    for tiempo in tiempos:
+        o, h, l, c, vwap = np.round(37000 + rng.normal(0, 50, 5), 1)
+        filas.append([int(tiempo), str(o), str(h), str(l), str(c), str(vwap), f'{rng.exponential(2):.8f}',
+                      int(rng.integers(1, 50))])
+    return filas
+
+
+def consultas(n_consultas, semilla=0):
+    """
+    Secuencia de respuestas como las de Kraken con `since`: cada una repite la última vela de la anterior (que seguía
+    abierta, ahora con otros valores) y añade entre 0 y 9 velas nuevas.
+    """
+    rng = np.random.default_rng(semilla)
+    ultimo = INICIO
+    respuestas = []
+    for i in range(n_consultas):
+        nuevas = int(rng.integers(0, 10))
+        tiempos = ultimo + 60 * np.arange(nuevas + 1)
+        respuestas.append(filas_kraken(tiempos, semilla=1000 * semilla + i))
+        ultimo = int(tiempos[-1])
+    return respuestas
+
+
+def referencia(recibidas, capacidad):
+    """Cola de `capacidad` velas del DataFrame con todas las velas recibidas (la última versión de cada minuto)."""
+    por_tiempo = {}
+    for fila in recibidas:
+        por_tiempo[fila[0]] = fila
+    return ohlc_a_dataframe([por_tiempo[t] for t in sorted(por_tiempo)]).tail(capacidad).reset_index(drop=True)
+
+
+def comparar(anillo, esperado):
+    assert len(anillo) == len(esperado)
+    pd.testing.assert_frame_equal(anillo.dataframe(), esperado)
+    # Las vistas de las n últimas son la cola de las de todas
+    vistas = anillo.vistas(3)
+    for columna, valores in vistas.items():
+        np.testing.assert_array_equal(valores, esperado[columna].to_numpy()[-3:])
+
+
+@pytest.mark.parametrize('capacidad', [1, 2, 7, 50])
+def test_extender_coincide_con_la_cola_del_dataframe(capacidad):
+    anillo = AnilloVelas(capacidad)
+    recibidas = []
+    for respuesta in consultas(60, semilla=capacidad):
+        anillo.extender(ohlc_a_arrays(respuesta))
+        recibidas.extend(respuesta)
+        comparar(anillo, referencia(recibidas, capacidad))
+    # Más de una vuelta completa al anillo
+    assert len({fila[0] for fila in recibidas}) > 2 * capacidad
+
+
+@pytest.mark.parametrize('capacidad', [1, 2, 7])
+def test_agregar_coincide_con_la_cola_del_dataframe(capacidad):
+    anillo = AnilloVelas(capacidad)
+    recibidas = []
+    for respuesta in consultas(40, semilla=capacidad + 100):
+        for fila in respuesta:
+            anillo.agregar(fila[0], *map(float, fila[1:7]), fila[7])
+        recibidas.extend(respuesta)
+        comparar(anillo, referencia(recibidas, capacidad))
+
+
+def test_velas_anteriores_a_la_ultima_se_ignoran():
+    anillo = AnilloVelas(5)
+    filas = filas_kraken(INICIO + 60 * np.arange(4), semilla=1)
+    anillo.extender(ohlc_a_arrays(filas))
+    anillo.extender(ohlc_a_arrays(filas[:2]))
+    anillo.agregar(filas[0][0], *map(float, filas[0][1:7]), filas[0][7])
+    comparar(anillo, referencia(filas, 5))
+
+
+def test_get_OHCL_data_anillo_sustituye_la_vela_abierta():
+    respuestas = consultas(30, semilla=7)
+    peticiones = []
+
+    def query_public(metodo, parametros):
+        peticiones.append(dict(parametros))
+        filas = respuestas[len(peticiones) - 1]
+        return {'error': [], 'result': {'XXBTZUSD': filas, 'last': filas[-1][0]}}
+
+    api = Kraken_API()
+    api.api.query_public = query_public
+    anillo = AnilloVelas(20)
+    recibidas = []
+    for respuesta in respuestas:
+        df, pair = api.get_OHCL_data_anillo('XBTUSD', anillo)
+        recibidas.extend(respuesta)
+        assert pair == 'XBTUSD'
+        pd.testing.assert_frame_equal(df, referencia(recibidas, 20))
+        # La última vela es la versión más reciente de la que seguía abierta
+        assert df['close'].iloc[-1] == float(respuesta[-1][4])
+
+    assert 'since' not in peticiones[0]
+    assert [p['since'] for p in peticiones[1:]] == [r[-1][0] for r in respuestas[:-1]]
@@ -0,0 +1,69 @@
+# tests/test_archivo.py
+"""
+Pruebas de ArchivoVelas sobre un directorio temporal: ida y vuelta, filtrado por fechas, fusión con una partición
+existente y pares sin velas.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from models.archivo import ESQUEMA, ArchivoVelas
+from utilidades import velas_sinteticas
+
+
+def velas_de_dos_dias():
+    """3000 velas de 1 minuto desde el 1 de enero a las 00:00: el 1 y el 2 de enero completos y parte del 3."""
+    return velas_sinteticas(3000, semilla=4)
+
+
+def test_guardar_y_cargar_ida_y_vuelta(tmp_path):
+    velas = velas_de_dos_dias()
+    archivo = ArchivoVelas(str(tmp_path))
+    archivo.guardar('XBTUSD', velas)
+
+    assert sorted(os.listdir(tmp_path / 'pair=XBTUSD')) == ['dia=2024-01-01', 'dia=2024-01-02', 'dia=2024-01-03']
+    pd.testing.assert_frame_equal(archivo.cargar('XBTUSD'), velas)
+    assert archivo.pares() == ['XBTUSD']
+
+
+def test_cargar_filtra_por_rango_de_fechas(tmp_path):
+    velas = velas_de_dos_dias()
+    archivo = ArchivoVelas(str(tmp_path))
+    archivo.guardar('XBTUSD', velas)
+
+    desde, hasta = pd.Timestamp('2024-01-01 22:30'), pd.Timestamp('2024-01-02 01:15')
+    esperadas = velas[(velas['date'] >= desde) & (velas['date'] <= hasta)].reset_index(drop=True)
+    pd.testing.assert_frame_equal(archivo.cargar('XBTUSD', desde=desde, hasta=hasta), esperadas)
+
+    assert len(archivo.cargar('XBTUSD', desde='2024-01-02 23:59')) == len(velas) - 2 * 1440 + 1
+    assert len(archivo.cargar('XBTUSD', hasta='2024-01-01 00:09')) == 10
+
+
+def test_guardar_en_una_particion_existente_no_duplica(tmp_path):
+    velas = velas_de_dos_dias().iloc[:1500]
+    archivo = ArchivoVelas(str(tmp_path))
+    archivo.guardar('XBTUSD', velas.iloc[:1000])
+
+    # La segunda tanda repite 100 velas con otro cierre: gana la más reciente
+    segunda = velas.iloc[900:].copy()
+    segunda.loc[segunda.index[:100], 'close'] += 1.0
+    archivo.guardar('XBTUSD', segunda)
+
+    esperadas = pd.concat([velas.iloc[:900], segunda], ignore_index=True)
+    cargadas = archivo.cargar('XBTUSD')
+    assert cargadas['date'].is_unique
+    pd.testing.assert_frame_equal(cargadas, esperadas)
+    assert len(os.listdir(tmp_path / 'pair=XBTUSD' / 'dia=2024-01-01')) == 1
+
+
+def test_cargar_un_par_sin_velas_devuelve_un_dataframe_vacio(tmp_path):
+    archivo = ArchivoVelas(str(tmp_path))
+    archivo.guardar('XBTUSD', velas_de_dos_dias().iloc[:10])
+    archivo.guardar('ETHUSD', velas_de_dos_dias().iloc[:0])
+
+    df = archivo.cargar('ETHUSD')
+    assert df.empty
+    assert list(df.columns) == ESQUEMA.names
+    assert df['close'].dtype == np.float64
+    assert archivo.pares() == ['XBTUSD']
@@ -0,0 +1,60 @@
+# tests/test_batch.py
+"""
+calcular_metricas_pares con 2 procesos frente a Dataset.get_metrics() par a par, y liberación de la memoria
+compartida cuando los procesos fallan.
+"""
+from multiprocessing import shared_memory
+
+import pandas as pd
+import pytest
+
+from models import batch
+from models.batch import calcular_metricas_pares
+from models.dataset import Dataset
+from utilidades import velas_sinteticas
+
+INDICADORES = ['RSI', 'MACD_Line', 'SMA_200', 'ATR']
+
+
+@pytest.fixture
+def bloques(monkeypatch):
+    """Registra los bloques de memoria compartida que crea calcular_metricas_pares."""
+    nombres = []
+    empaquetar = batch._empaquetar
+
+    def registrar(frames):
+        memoria, total, posiciones = empaquetar(frames)
+        nombres.append(memoria.name)
+        return memoria, total, posiciones
+
+    monkeypatch.setattr(batch, '_empaquetar', registrar)
+    return nombres
+
+
+def liberado(nombre):
+    try:
+        shared_memory.SharedMemory(name=nombre).close()
+    except FileNotFoundError:
+        return True
+    return False
+
+
+def test_coincide_con_dataset_par_a_par(bloques):
+    frames = {f'PAR{i}USD': velas_sinteticas(400 + 50 * i, semilla=20 + i) for i in range(3)}
+    frames['VACIOUSD'] = pd.DataFrame()
+    metricas, tiempos = calcular_metricas_pares(frames, INDICADORES, max_workers=2)
+
+    assert set(metricas) == set(tiempos) == {'PAR0USD', 'PAR1USD', 'PAR2USD'}
+    for pair, df in metricas.items():
+        pd.testing.assert_frame_equal(df, Dataset(frames[pair]).get_metrics(INDICADORES), obj=pair)
+    assert all(segundos > 0 for segundos in tiempos.values())
+    assert len(bloques) == 1 and liberado(bloques[0])
+
+
+def test_libera_la_memoria_compartida_si_los_procesos_fallan(bloques, capsys):
+    frames = {f'PAR{i}USD': velas_sinteticas(300, semilla=i) for i in range(2)}
+    metricas, tiempos = calcular_metricas_pares(frames, ['indicador_inexistente'], max_workers=2)
+
+    assert metricas == {} and tiempos == {}
+    assert capsys.readouterr().out.count('Error al calcular las métricas de') == 2
+    assert len(bloques) == 1 and liberado(bloques[0])
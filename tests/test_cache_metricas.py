@@ -0,0 +1,98 @@
+# tests/test_cache_metricas.py
+"""
+Pruebas de CacheMetricas: nivel en disco entre instancias, expulsión por tamaño en memoria y por fecha de
+modificación en disco, y entradas de otra VERSION.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from models import cache_metricas
+from models.cache_metricas import CacheMetricas, huella
+from models.dataset import Dataset
+
+
+def resultado(n, valor=0.0):
+    return pd.DataFrame({'date': pd.date_range('2024-01-01', periods=n, freq='min'), 'RSI': np.full(n, valor)})
+
+
+def tamano(df):
+    return int(df.memory_usage(deep=True).sum())
+
+
+def test_nivel_en_disco_sobrevive_a_una_instancia_nueva(tmp_path):
+    df = resultado(60, 1.5)
+    CacheMetricas(directorio=str(tmp_path)).guardar('a', df)
+
+    cache = CacheMetricas(directorio=str(tmp_path))
+    leido = cache.get('a')
+    pd.testing.assert_frame_equal(leido, df)
+    assert (cache.aciertos_disco, cache.aciertos_memoria, cache.fallos) == (1, 0, 0)
+
+    # El acierto en disco sube la entrada a memoria
+    cache.get('a')
+    assert cache.aciertos_memoria == 1
+
+
+def test_memoria_expulsa_la_menos_usada_por_bytes():
+    df = resultado(100)
+    cache = CacheMetricas(max_bytes=2 * tamano(df))
+    cache.guardar('a', df)
+    cache.guardar('b', df)
+    cache.get('a')  # 'b' pasa a ser la menos usada
+    cache.guardar('c', df)
+
+    assert cache.get('b') is None
+    assert cache.get('a') is not None and cache.get('c') is not None
+
+    # Un resultado mayor que max_bytes no se guarda en memoria
+    cache.guardar('grande', resultado(1000))
+    assert cache.get('grande') is None
+
+
+def test_disco_expulsa_el_fichero_con_la_fecha_de_modificacion_mas_antigua(tmp_path):
+    cache = CacheMetricas(directorio=str(tmp_path))
+    cache.guardar('a', resultado(60))
+    cache.guardar('b', resultado(60))
+    os.utime(tmp_path / 'a.arrow', (1, 1))
+    os.utime(tmp_path / 'b.arrow', (2, 2))
+
+    tamano_fichero = os.path.getsize(tmp_path / 'a.arrow')
+    cache = CacheMetricas(directorio=str(tmp_path), max_bytes_disco=int(2.5 * tamano_fichero))
+    cache.guardar('c', resultado(60))
+
+    assert sorted(os.listdir(tmp_path)) == ['b.arrow', 'c.arrow']
+
+
+def test_entradas_de_otra_version_se_ignoran(tmp_path, velas, monkeypatch):
+    velas = velas.iloc[:400]
+    cache = CacheMetricas(directorio=str(tmp_path))
+    Dataset(velas).get_metrics(['RSI'], cache=cache)
+    assert len(os.listdir(tmp_path)) == 1
+
+    monkeypatch.setattr(cache_metricas, 'VERSION', cache_metricas.VERSION + 1)
+    cache = CacheMetricas(directorio=str(tmp_path))
+    Dataset(velas).get_metrics(['RSI'], cache=cache)
+    assert (cache.aciertos_disco, cache.fallos) == (0, 1)
+    assert len(os.listdir(tmp_path)) == 2
+
+
+def test_huella_solo_coincide_con_ventanas_identicas(velas):
+    configuracion = (('rsi',), 60)
+    ventana = velas.iloc[:300]
+    assert huella(ventana, configuracion) == huella(ventana.copy(), configuracion)
+    # Una vela nueva cambia la huella aunque el resto de la ventana no cambie
+    assert huella(velas.iloc[:301], configuracion) != huella(ventana, configuracion)
+    assert huella(ventana, configuracion) != huella(ventana, (('rsi',), None))
+
+
+def test_get_metrics_con_cache_comparte_el_resultado_e_imprime_una_vez(velas, capsys):
+    cache = CacheMetricas()
+    primera = Dataset(velas.copy()).get_metrics(cache=cache)
+    salida = capsys.readouterr().out
+    segunda = Dataset(velas.copy()).get_metrics(cache=cache)
+
+    assert cache.aciertos_memoria == 1 and cache.fallos == 1
+    pd.testing.assert_frame_equal(segunda, primera)
+    assert capsys.readouterr().out == salida
@@ -0,0 +1,47 @@
+# tests/test_compacto.py
+"""
+Modo compacto de Dataset (float32, fechas en minutos epoch int32) frente al modo normal: error relativo por debajo
+de COTA_ERROR_COMPACTO y fechas recuperables con minutos_a_fechas, tanto en get_metrics() como en update().
+"""
+import contextlib
+import io
+
+import numpy as np
+import pytest
+
+from models.dataset import COTA_ERROR_COMPACTO, Dataset, minutos_a_fechas
+from utilidades import error_relativo
+
+
+def comprobar_compacto(compactas, normales):
+    assert compactas['date'].dtype == np.int32
+    assert (minutos_a_fechas(compactas['date']) == normales['date'].to_numpy()).all()
+    flotantes = [columna for columna in normales.columns if normales[columna].dtype == np.float64]
+    assert all(compactas[columna].dtype == np.float32 for columna in flotantes)
+    errores = error_relativo(compactas, normales)
+    assert max(errores.values()) <= COTA_ERROR_COMPACTO, {c: e for c, e in errores.items() if e > COTA_ERROR_COMPACTO}
+
+
+def test_get_metrics_compacto_dentro_de_la_cota(velas):
+    with contextlib.redirect_stdout(io.StringIO()):  # get_metrics() imprime el resultado
+        normales = Dataset(velas).get_metrics(filas=None)
+        compactas = Dataset(velas, compacto=True).get_metrics(filas=None)
+    comprobar_compacto(compactas, normales)
+
+
+@pytest.mark.parametrize('antes', [True, False], ids=['tras_get_metrics', 'sin_get_metrics'])
+def test_update_compacto_conserva_los_tipos(velas, antes):
+    historico, nuevas = velas.iloc[:720], velas.iloc[720:]
+    normal, compacto = Dataset(historico), Dataset(historico, compacto=True)
+    if antes:
+        with contextlib.redirect_stdout(io.StringIO()):
+            normal.get_metrics(filas=None)
+            compacto.get_metrics(filas=None)
+
+    for vela in nuevas.to_dict('records'):
+        fila_normal = normal.update(vela)
+        fila = compacto.update(vela)
+    assert fila['date'] == np.int32(fila_normal['date'].value // 60_000_000_000)
+    assert isinstance(fila['close'], np.float32)
+
+    comprobar_compacto(compacto.data, normal.data)
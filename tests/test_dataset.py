@@ -0,0 +1,72 @@
+# tests/test_dataset.py
+"""
+Pruebas de Dataset: update() incremental frente a get_metrics().
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from models.dataset import Dataset
+
+# Fibonacci usa el rango de todo el DataFrame: en get_metrics() todas las filas comparten el de la última vela, y en
+# update() cada fila lleva el rango visto hasta su vela. Solo coinciden en la última fila
+COLUMNAS_FIBONACCI = [columna for columna in Dataset.COLUMNAS_METRICAS if columna.startswith('Fibonacci')]
+
+
+def metricas(df, **kwargs):
+    return Dataset(df).get_metrics(filas=None, **kwargs)
+
+
+def comparar(obtenidas, esperadas, columnas):
+    for columna in columnas:
+        np.testing.assert_allclose(obtenidas[columna].to_numpy(np.float64), esperadas[columna].to_numpy(np.float64),
+                                   rtol=1e-9, atol=1e-9, equal_nan=True, err_msg=columna)
+
+
+@pytest.mark.parametrize('antes', [True, False], ids=['tras_get_metrics', 'sin_get_metrics'])
+def test_update_coincide_con_get_metrics(velas, antes):
+    velas = velas.iloc[:900]  # Menos velas nuevas que filas del histórico: self.data las conserva todas
+    historico, nuevas = velas.iloc[:720], velas.iloc[720:]
+    dataset = Dataset(historico)
+    if antes:
+        dataset.get_metrics(filas=None)
+    filas = len(dataset.data)
+
+    devueltas = pd.DataFrame([dataset.update(vela) for vela in nuevas.to_dict('records')])
+    esperadas = metricas(velas).iloc[-len(nuevas):].reset_index(drop=True)
+    guardadas = dataset.data.iloc[-len(nuevas):].reset_index(drop=True)
+
+    assert len(dataset.data) == filas
+    assert list(dataset.data.columns[-len(Dataset.COLUMNAS_METRICAS):]) == list(Dataset.COLUMNAS_METRICAS)
+    sin_fibonacci = [columna for columna in Dataset.COLUMNAS_METRICAS if columna not in COLUMNAS_FIBONACCI]
+    comparar(devueltas, esperadas, sin_fibonacci)
+    comparar(guardadas, esperadas, sin_fibonacci)
+    comparar(guardadas.iloc[-1:], esperadas.iloc[-1:], COLUMNAS_FIBONACCI)
+    assert (guardadas['date'] == esperadas['date']).all()
+
+
+def test_update_sin_get_metrics_conserva_las_metricas_del_historico(velas):
+    historico = velas.iloc[:720]
+    dataset = Dataset(historico)
+    dataset.update(velas.iloc[720].to_dict())
+
+    esperadas = metricas(velas.iloc[:721])
+    obtenidas = dataset.data.iloc[-len(esperadas):].reset_index(drop=True)
+    comparar(obtenidas, esperadas, ['SMA_200', 'RSI', 'MACD_Line', 'ADX', 'PSAR'])
+
+
+def test_update_con_subconjunto_de_indicadores(velas):
+    dataset = Dataset(velas.iloc[:720])
+    dataset.get_metrics(['RSI'], filas=None)
+    columnas = list(dataset.data.columns)
+
+    fila = dataset.update(velas.iloc[720].to_dict())
+    assert list(dataset.data.columns) == columnas
+    assert dataset.data['RSI'].iloc[-1] == pytest.approx(fila['RSI'])
+
+
+def test_update_rechaza_velas_fuera_de_orden(velas):
+    dataset = Dataset(velas.iloc[:720])
+    with pytest.raises(ValueError):
+        dataset.update(velas.iloc[719].to_dict())
+
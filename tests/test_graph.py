@@ -0,0 +1,25 @@
+# tests/test_graph.py
+"""
+Grafico.candlestick_with_volume no modifica el DataFrame recibido, agrupe o no las velas.
+"""
+import io
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import pytest
+
+from models.graph import Grafico
+from utilidades import velas_con_metricas_de_grafico
+
+
+@pytest.mark.parametrize('max_velas', [4320, 100], ids=['sin_agrupar', 'agrupando'])
+def test_candlestick_with_volume_no_modifica_el_dataframe(max_velas):
+    df = velas_con_metricas_de_grafico(300)
+    original = df.copy()
+
+    grafico = Grafico(df, 'XBTUSD')
+    plt.close(grafico.candlestick_with_volume(io.BytesIO(), max_velas=max_velas))
+
+    assert grafico.df is df
+    assert df.equals(original)
@@ -0,0 +1,75 @@
+# tests/test_kernels.py
+"""
+Paridad de los núcleos de models/kernels.py con los cálculos que sustituyen.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from models.kernels import parabolic_sar, rolling_mean_abs_dev
+from models.streaming import ParabolicSAR
+from utilidades import velas_sinteticas
+
+
+def test_parabolic_sar_parte_del_extremo_de_la_primera_vela():
+    df = velas_sinteticas(500)
+    psar = parabolic_sar(df['open'], df['high'], df['low'], df['close'])
+
+    alcista = df['close'].iloc[0] > df['open'].iloc[0]
+    assert psar[0] == (df['low'].iloc[0] if alcista else df['high'].iloc[0])
+    assert not np.isnan(psar).any()
+
+
+def test_parabolic_sar_bajista_parte_del_maximo():
+    psar = parabolic_sar([10.0, 9.5], [10.5, 9.8], [9.0, 9.1], [9.5, 9.2])
+    assert psar[0] == 10.5
+
+
+def test_parabolic_sar_coincide_con_el_estado_incremental():
+    df = velas_sinteticas(2000, semilla=3)
+    psar = parabolic_sar(df['open'], df['high'], df['low'], df['close'])
+
+    estado = ParabolicSAR()
+    incremental = [estado.add(o, h, l, c) for o, h, l, c in
+                   zip(df['open'], df['high'], df['low'], df['close'])]
+    np.testing.assert_array_equal(psar, incremental)
+
+
+def test_parabolic_sar_vacio():
+    assert len(parabolic_sar([], [], [], [])) == 0
+
+
+def mean_abs_dev_pandas(valores, window):
+    """Cálculo que sustituye rolling_mean_abs_dev (el del CCI original)."""
+    return pd.Series(valores).rolling(window=window).apply(lambda x: np.mean(np.abs(x - x.mean()))).to_numpy()
+
+
+@pytest.mark.parametrize('window', [1, 2, 20, 100])
+def test_rolling_mean_abs_dev_coincide_con_rolling_apply(window):
+    df = velas_sinteticas(1000, semilla=1)
+    valores = ((df['high'] + df['low'] + df['close']) / 3).to_numpy()
+
+    resultado = rolling_mean_abs_dev(valores, window)
+    esperado = mean_abs_dev_pandas(valores, window)
+    assert np.isnan(resultado[:window - 1]).all()
+    np.testing.assert_allclose(resultado, esperado, rtol=1e-12, atol=1e-9, equal_nan=True)
+
+
+def test_rolling_mean_abs_dev_por_bloques():
+    valores = velas_sinteticas(1000, semilla=2)['close'].to_numpy()
+    np.testing.assert_array_equal(rolling_mean_abs_dev(valores, 20, chunk=7), rolling_mean_abs_dev(valores, 20))
+
+
+def test_rolling_mean_abs_dev_con_nan():
+    valores = np.arange(50, dtype=np.float64)
+    valores[30] = np.nan
+    np.testing.assert_allclose(rolling_mean_abs_dev(valores, 5), mean_abs_dev_pandas(valores, 5), equal_nan=True)
+
+
+@pytest.mark.parametrize('n', [0, 1, 19])
+def test_rolling_mean_abs_dev_entrada_mas_corta_que_la_ventana(n):
+    valores = np.linspace(1.0, 2.0, n)
+    resultado = rolling_mean_abs_dev(valores, 20)
+    assert len(resultado) == n
+    assert np.isnan(resultado).all()
+    np.testing.assert_array_equal(resultado, mean_abs_dev_pandas(valores, 20))
@@ -0,0 +1,132 @@
+# tests/test_kraken_async.py
+"""
+Pruebas de Kraken_Async contra un servidor simulado (httpx.MockTransport), sin salir a la red.
+"""
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from api.kraken_async import Kraken_Async
+from models.almacen import AlmacenVelas
+
+# Velas de la respuesta OHLC de Kraken: [time, open, high, low, close, vwap, volume, count], precios como texto
+VELAS = [
+    [1700000000, '37000.0', '37010.5', '36990.0', '37005.2', '37001.1', '1.25', 12],
+    [1700000060, '37005.2', '37020.0', '37000.0', '37018.7', '37010.3', '0.75', 8],
+    [1700000120, '37018.7', '37018.7', '36980.4', '36985.0', '36999.9', '2.10', 20],
+]
+CLAVES = {'XBTUSD': 'XXBTZUSD', 'ETHUSD': 'XETHZUSD'}
+
+
+class ServidorOHLC:
+    """Servidor simulado del endpoint OHLC: responde con VELAS (desde `since`) y registra las peticiones."""
+
+    def __init__(self, limites=0, fallan=()):
+        self.limites = limites  # Respuestas 'Rate limit exceeded' antes de la primera correcta
+        self.fallan = set(fallan)  # Pares que responden con un error HTTP 500
+        self.peticiones = []
+
+    def __call__(self, peticion):
+        parametros = dict(peticion.url.params)
+        self.peticiones.append(parametros)
+        pair = parametros['pair']
+        if pair in self.fallan:
+            return httpx.Response(500)
+        if self.limites:
+            self.limites -= 1
+            return httpx.Response(200, json={'error': ['EAPI:Rate limit exceeded'], 'result': {}})
+        since = int(parametros.get('since', 0))
+        velas = [vela for vela in VELAS if vela[0] >= since]
+        return httpx.Response(200, content=json.dumps(
+            {'error': [], 'result': {CLAVES[pair]: velas, 'last': velas[-1][0] if velas else since}}))
+
+
+def cliente(servidor, **kwargs):
+    return Kraken_Async(base_url='https://kraken.test', transport=httpx.MockTransport(servidor), **kwargs)
+
+
+async def en_sesion(kraken, corrutina):
+    async with kraken:
+        return await corrutina(kraken)
+
+
+@pytest.fixture
+def sin_esperas(monkeypatch):
+    esperas = []
+
+    async def sleep(segundos):
+        esperas.append(segundos)
+
+    monkeypatch.setattr(asyncio, 'sleep', sleep)
+    return esperas
+
+
+def test_get_OHCL_data_convierte_la_respuesta():
+    servidor = ServidorOHLC()
+    kraken = cliente(servidor)
+    df = asyncio.run(en_sesion(kraken, lambda k: k.get_OHCL_data('XBTUSD')))
+
+    assert list(df.columns) == ['date', 'open', 'high', 'low', 'close', 'vwap', 'volume', 'count']
+    assert len(df) == len(VELAS)
+    assert df['close'].tolist() == [float(vela[4]) for vela in VELAS]
+    assert str(df['date'].iloc[0]) == '2023-11-14 23:13:20'  # Hora UTC de Kraken + 1 hora
+    assert kraken.last['XBTUSD'] == VELAS[-1][0]
+    assert servidor.peticiones == [{'pair': 'XBTUSD', 'interval': '1'}]
+
+
+def test_get_OHCL_data_con_since_pide_solo_las_velas_nuevas():
+    servidor = ServidorOHLC()
+    df = asyncio.run(en_sesion(cliente(servidor), lambda k: k.get_OHCL_data('XBTUSD', since=VELAS[1][0])))
+
+    assert servidor.peticiones[0]['since'] == str(VELAS[1][0])
+    assert len(df) == 2
+
+
+def test_get_OHCL_data_reintenta_tras_el_limite_de_peticiones(sin_esperas):
+    servidor = ServidorOHLC(limites=2)
+    df = asyncio.run(en_sesion(cliente(servidor, reintentos=3), lambda k: k.get_OHCL_data('XBTUSD')))
+
+    assert len(df) == len(VELAS)
+    assert len(servidor.peticiones) == 3
+    assert sin_esperas == [1, 2]
+
+
+def test_get_OHCL_data_agota_los_reintentos(sin_esperas):
+    servidor = ServidorOHLC(limites=5)
+    df = asyncio.run(en_sesion(cliente(servidor, reintentos=2), lambda k: k.get_OHCL_data('XBTUSD')))
+
+    assert df.empty
+    assert len(servidor.peticiones) == 2
+
+
+def test_get_OHCL_data_error_http_devuelve_dataframe_vacio():
+    df = asyncio.run(en_sesion(cliente(ServidorOHLC(fallan={'XBTUSD'})), lambda k: k.get_OHCL_data('XBTUSD')))
+    assert df.empty
+
+
+def test_get_OHCL_data_pares_descarta_los_que_fallan():
+    servidor = ServidorOHLC(fallan={'ETHUSD'})
+    frames = asyncio.run(cliente(servidor).get_OHCL_data_pares(['XBTUSD', 'ETHUSD']))
+
+    assert list(frames) == ['XBTUSD']
+    assert len(frames['XBTUSD']) == len(VELAS)
+
+
+def test_get_OHCL_data_incremental_pares_usa_el_cursor_del_almacen(tmp_path):
+    servidor = ServidorOHLC()
+    almacen = AlmacenVelas(directorio=str(tmp_path))
+    kraken = cliente(servidor)
+
+    primera = asyncio.run(kraken.get_OHCL_data_incremental_pares(['XBTUSD'], almacen))
+    segunda = asyncio.run(kraken.get_OHCL_data_incremental_pares(['XBTUSD'], almacen))
+
+    assert 'since' not in servidor.peticiones[0]
+    assert servidor.peticiones[1]['since'] == str(VELAS[-1][0])
+    assert len(primera['XBTUSD']) == len(segunda['XBTUSD']) == len(VELAS)
+
+
+def test_reintentos_debe_ser_al_menos_uno():
+    with pytest.raises(ValueError):
+        Kraken_Async(reintentos=0)
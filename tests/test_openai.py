@@ -0,0 +1,120 @@
+# tests/test_openai.py
+"""
+Pruebas de la huella de mercado y de CacheComentarios con la API de OpenAI simulada (sin red).
+"""
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from models import openai as modulo
+from models.dataset import Dataset
+from models.openai import CacheComentarios, INDICADORES_COMENTARIO, generar_comentario_openai, huella_mercado
+
+
+class OpenAISimulado:
+    """Sustituye a openai.chat.completions.create: cuenta las llamadas y responde 'comentario N' o falla."""
+
+    def __init__(self, falla=False):
+        self.falla = falla
+        self.llamadas = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        self.llamadas += 1
+        if self.falla:
+            raise RuntimeError('servicio no disponible')
+        mensaje = SimpleNamespace(content=f'comentario {self.llamadas}')
+        return SimpleNamespace(choices=[SimpleNamespace(message=mensaje)])
+
+
+class Reloj:
+    """Sustituye a time.monotonic en models.openai para avanzar el tiempo sin esperar."""
+
+    def __init__(self):
+        self.ahora = 1000.0
+
+    def __call__(self):
+        return self.ahora
+
+
+@pytest.fixture
+def api(monkeypatch):
+    api = OpenAISimulado()
+    monkeypatch.setattr(modulo, 'openai', api)
+    return api
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    reloj = Reloj()
+    monkeypatch.setattr(modulo.time, 'monotonic', reloj)
+    return reloj
+
+
+@pytest.fixture(scope='module')
+def df_metrics(velas):
+    return Dataset(velas.iloc[:400]).get_metrics(list(INDICADORES_COMENTARIO))
+
+
+def test_misma_huella_dentro_del_ttl_no_llama_a_la_api(api, reloj, df_metrics):
+    cache = CacheComentarios(ttl=900)
+    primero = generar_comentario_openai(df_metrics, cache=cache, pair='XBTUSD')
+    reloj.ahora += 899
+    segundo = generar_comentario_openai(df_metrics.copy(), cache=cache, pair='XBTUSD')
+
+    assert primero == segundo == 'comentario 1'
+    assert api.llamadas == 1
+    assert (cache.consultas, cache.aciertos) == (2, 1)
+
+
+def test_ttl_vencido_huella_o_par_distintos_regeneran(api, reloj, df_metrics):
+    cache = CacheComentarios(ttl=900)
+    generar_comentario_openai(df_metrics, cache=cache, pair='XBTUSD')
+
+    reloj.ahora += 901
+    assert generar_comentario_openai(df_metrics, cache=cache, pair='XBTUSD') == 'comentario 2'
+    assert generar_comentario_openai(df_metrics, cache=cache, pair='ETHUSD') == 'comentario 3'
+
+    otro_mercado = df_metrics.copy()
+    otro_mercado.loc[otro_mercado.index[-1], 'RSI'] = 90.0 if df_metrics['RSI'].iloc[-1] < 70 else 10.0
+    assert huella_mercado(otro_mercado) != huella_mercado(df_metrics)
+    assert generar_comentario_openai(otro_mercado, cache=cache, pair='XBTUSD') == 'comentario 4'
+    assert api.llamadas == 4 and cache.aciertos == 0
+
+
+def test_huella_con_indicadores_nan_usa_el_tramo_menos_uno(df_metrics):
+    sin_valores = df_metrics.copy()
+    sin_valores.loc[sin_valores.index[-1], ['RSI', 'MACD_Line', 'Banda_Superior', 'SMA_200']] = np.nan
+    sin_valores['volume'] = 0.0
+
+    rsi, macd, bandas, cruce, volumen = huella_mercado(sin_valores)
+    assert (rsi, bandas, volumen) == (-1, -1, -1)
+    assert (macd, cruce) == (0, 0)  # Sin uno de los dos valores no hay cruce
+
+
+def test_resumen_informa_de_aciertos_y_latencia_ahorrada(reloj):
+    cache = CacheComentarios()
+    cache.guardar(('XBTUSD', (1, 1, 1, 1, 1)), 'comentario', latencia=2.5)
+    cache.get(('XBTUSD', (1, 1, 1, 1, 1)))
+    cache.get(('XBTUSD', (1, 1, 1, 1, 1)))
+    cache.get(('XBTUSD', (2, 1, 1, 1, 1)))
+    cache.get(('ETHUSD', (1, 1, 1, 1, 1)))
+
+    assert cache.resumen() == 'comentarios reutilizados: 2/4 (50 %), latencia ahorrada: 5.0 s, errores de la API: 0'
+
+
+def test_error_de_la_api_se_informa_y_no_se_guarda(monkeypatch, reloj, df_metrics, capsys):
+    api = OpenAISimulado(falla=True)
+    monkeypatch.setattr(modulo, 'openai', api)
+    cache = CacheComentarios()
+
+    assert generar_comentario_openai(df_metrics, cache=cache, pair='XBTUSD') is None
+    assert 'servicio no disponible' in capsys.readouterr().err
+    assert cache.errores == 1
+    assert 'errores de la API: 1' in cache.resumen()
+
+    # El fallo no queda en la caché: la siguiente llamada vuelve a la API
+    api.falla = False
+    assert generar_comentario_openai(df_metrics, cache=cache, pair='XBTUSD') == 'comentario 2'
+    assert cache.aciertos == 0
@@ -0,0 +1,36 @@
+# tests/test_panel.py
+"""
+Paridad del modo panel con Dataset.get_metrics() par a par.
+"""
+import numpy as np
+import pytest
+
+from models.dataset import Dataset
+from models.panel import Panel
+from utilidades import velas_sinteticas
+
+
+@pytest.fixture(scope='module')
+def frames():
+    return {f'PAR{i}USD': velas_sinteticas(600, semilla=10 + i) for i in range(3)}
+
+
+def test_panel_coincide_con_dataset(frames):
+    panel = Panel.from_frames(frames)
+    metricas = panel.get_metrics()
+    assert set(metricas) == {columna for clave in Panel.INDICADORES for columna in Dataset.INDICADORES[clave][1]}
+
+    for pair, df in frames.items():
+        esperadas = Dataset(df).get_metrics(list(Panel.INDICADORES), filas=None)
+        obtenidas = panel.por_par(metricas, pair)
+        obtenidas = obtenidas[obtenidas['date'].isin(esperadas['date'])].reset_index(drop=True)
+        assert len(obtenidas) == len(esperadas)
+        for columna in metricas:
+            np.testing.assert_allclose(obtenidas[columna].to_numpy(), esperadas[columna].to_numpy(),
+                                       rtol=1e-12, atol=1e-9, equal_nan=True, err_msg=f'{pair} {columna}')
+
+
+@pytest.mark.parametrize('indicador', ['parabolic_sar', 'PSAR', 'Connors_RSI'])
+def test_panel_rechaza_indicadores_no_disponibles(frames, indicador):
+    with pytest.raises(ValueError):
+        Panel.from_frames(frames).get_metrics([indicador])
@@ -0,0 +1,82 @@
+# tests/test_pipeline.py
+"""
+Pruebas del Pipeline con funciones de etapa triviales y de main.ciclo_pares con la API, OpenAI y Twitter simulados.
+"""
+import time
+
+import pandas as pd
+
+import main
+from utils.pipeline import EnProceso, Etapa, Pipeline
+from utilidades import velas_sinteticas
+
+
+def cuadrado(x):
+    """A nivel de módulo para poder enviarse al pool de procesos."""
+    return x * x
+
+
+def test_las_etapas_se_aplican_en_orden_y_conservan_el_orden_de_entrada():
+    def etapa(nombre):
+        return Etapa(nombre, lambda elemento: elemento + (nombre,))  # Cada etapa deja su nombre en el elemento
+
+    pipeline = Pipeline([etapa('descarga'), etapa('metricas'), etapa('publicacion')], procesos=1)
+    assert pipeline.ejecutar([(i,) for i in range(6)]) == [(i, 'descarga', 'metricas', 'publicacion') for i in range(6)]
+    assert {nombre: len(t) for nombre, t in pipeline.tiempos.items()} == {'descarga': 6, 'metricas': 6, 'publicacion': 6}
+
+
+def test_varias_funciones_en_una_etapa_producen_una_tupla():
+    pipeline = Pipeline([Etapa('paralela', EnProceso(cuadrado), lambda x: -x)], procesos=2)
+    assert pipeline.ejecutar([1, 2, 3]) == [(1, -1), (4, -2), (9, -3)]
+
+
+def test_etapa_con_varios_hilos_procesa_todos_los_elementos():
+    def lenta(x):
+        time.sleep(0.01 * (5 - x))  # Los primeros tardan más
+        return x
+
+    pipeline = Pipeline([Etapa('descarga', lenta, hilos=3), Etapa('identidad', lambda x: x)], procesos=1)
+    resultados = pipeline.ejecutar(range(5))
+    assert sorted(resultados) == list(range(5))
+
+
+def test_un_error_en_una_etapa_descarta_solo_ese_elemento(capsys):
+    def falla_con_el_dos(x):
+        if x == 2:
+            raise ValueError('par sin datos')
+        return x
+
+    pipeline = Pipeline([Etapa('descarga', falla_con_el_dos), Etapa('publicacion', lambda x: x * 10)], procesos=1)
+    assert pipeline.ejecutar(range(4)) == [0, 10, 30]
+    assert 'Error en la etapa descarga: par sin datos' in capsys.readouterr().out
+    assert len(pipeline.tiempos['descarga']) == 4 and len(pipeline.tiempos['publicacion']) == 3
+
+
+class APISimulada:
+    """Sustituye a Kraken_API en ciclo_pares: devuelve velas sintéticas, o un DataFrame vacío para 'FALLAUSD'."""
+
+    def get_OHCL_data(self, pair):
+        if pair == 'FALLAUSD':
+            return pd.DataFrame(), pair
+        return velas_sinteticas(400, semilla=len(pair)), pair
+
+
+class TwitterSimulado:
+    def __init__(self):
+        self.publicados = []
+
+    def post_tweet(self, texto, imagen=None):
+        self.publicados.append((texto, imagen))
+
+
+def test_ciclo_pares_sin_red(monkeypatch, capsys):
+    monkeypatch.setattr(main, 'generar_comentario_openai', lambda df, cache=None, pair=None: f'comentario de {pair}')
+    twitter = TwitterSimulado()
+    pares = ['XBTUSD', 'ETHUSD', 'FALLAUSD', 'SOLUSD']
+
+    pipeline = main.ciclo_pares(APISimulada(), pares, twitter=twitter)
+
+    assert sorted(texto for texto, _ in twitter.publicados) == sorted(f'comentario de {p}' for p in pares if p != 'FALLAUSD')
+    assert all(imagen.startswith(b'\x89PNG') for _, imagen in twitter.publicados)
+    assert 'Error en la etapa metricas' in capsys.readouterr().out
+    assert len(pipeline.tiempos['descarga']) == 4 and len(pipeline.tiempos['publicacion']) == 3
@@ -0,0 +1,39 @@
+# tests/test_programador.py
+"""
+Pruebas del Programador sin esperas reales: alineación al cierre de vela e historial de tiempos acotado.
+"""
+from utils import programador
+from utils.programador import Programador
+
+
+def test_proximo_cierre_se_alinea_al_intervalo():
+    p = Programador(intervalo=60, retardo=2.0)
+    assert p.proximo_cierre(ahora=119.0) == 122.0
+    assert p.proximo_cierre(ahora=121.9) == 122.0
+    assert p.proximo_cierre(ahora=122.0) == 182.0
+
+
+def test_historial_conserva_solo_los_ultimos_ciclos(monkeypatch):
+    monkeypatch.setattr(programador.time, 'sleep', lambda segundos: None)
+    p = Programador(max_historial=3)
+    ciclos = iter(range(10))
+
+    def ciclo(cronometro):
+        with cronometro.etapa(f'etapa_{next(ciclos)}'):
+            pass
+
+    p.ejecutar(ciclo, max_ciclos=10)
+    assert len(p.historial) == 3
+    assert [list(tiempos) for tiempos in p.historial] == [['etapa_7'], ['etapa_8'], ['etapa_9']]
+
+
+def test_un_error_en_el_ciclo_no_detiene_el_programador(monkeypatch, capsys):
+    monkeypatch.setattr(programador.time, 'sleep', lambda segundos: None)
+    p = Programador()
+
+    def ciclo(cronometro):
+        raise RuntimeError('sin conexión')
+
+    p.ejecutar(ciclo, max_ciclos=2)
+    assert len(p.historial) == 2
+    assert capsys.readouterr().out.count('Error en el ciclo: sin conexión') == 2
@@ -0,0 +1,56 @@
+# tests/test_remuestreo.py
+"""
+Remuestreador.actualizar() incremental frente a agregar_velas() sobre todo el histórico recibido.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from models.remuestreo import Remuestreador, agregar_velas
+
+
+@pytest.fixture(scope='module')
+def velas(velas):
+    # Empieza a mitad de una hora para que la primera vela de 15 y 60 minutos quede incompleta
+    return velas.iloc[37:].reset_index(drop=True)
+
+
+def comparar(obtenidas, esperadas):
+    assert len(obtenidas) == len(esperadas)
+    assert (obtenidas['date'].to_numpy() == esperadas['date'].to_numpy()).all()
+    for columna in esperadas.columns[1:]:
+        np.testing.assert_allclose(obtenidas[columna].to_numpy(), esperadas[columna].to_numpy(),
+                                   rtol=1e-12, err_msg=columna)
+
+
+@pytest.mark.parametrize('minutos', [5, 15, 60])
+def test_actualizar_con_ventana_deslizante_coincide_con_agregar_velas(velas, minutos):
+    remuestreador = Remuestreador(intervalos=(1, minutos), max_velas=50)
+    for fin in range(720, len(velas), 97):
+        remuestreador.actualizar('XBTUSD', velas.iloc[fin - 720:fin])
+        serie = remuestreador.get('XBTUSD', minutos)
+
+        esperadas = agregar_velas(velas.iloc[:fin], minutos)
+        assert len(serie) == min(len(esperadas), 50)
+        comparar(serie, esperadas.iloc[-len(serie):])
+
+    # La serie de 1 minuto es la propia base
+    assert remuestreador.get('XBTUSD', 1)['date'].iloc[-1] == velas['date'].iloc[fin - 1]
+
+
+@pytest.mark.parametrize('hueco', [2, 40])
+def test_actualizar_tras_un_hueco_conserva_la_ultima_vela(velas, hueco):
+    remuestreador = Remuestreador(intervalos=(15,), max_velas=None)
+    remuestreador.actualizar('XBTUSD', velas.iloc[:100])
+    remuestreador.actualizar('XBTUSD', velas.iloc[100 + hueco:400])
+
+    recibidas = pd.concat([velas.iloc[:100], velas.iloc[100 + hueco:400]])
+    comparar(remuestreador.get('XBTUSD', 15), agregar_velas(recibidas, 15))
+
+
+def test_actualizar_sin_velas_nuevas_no_cambia_la_serie(velas):
+    remuestreador = Remuestreador(intervalos=(15,))
+    remuestreador.actualizar('XBTUSD', velas.iloc[:300])
+    antes = remuestreador.get('XBTUSD', 15).copy()
+    remuestreador.actualizar('XBTUSD', velas.iloc[:300])
+    comparar(remuestreador.get('XBTUSD', 15), antes)
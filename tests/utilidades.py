@@ -0,0 +1,55 @@
+# tests/utilidades.py
+"""
+Datos sintéticos y comprobaciones compartidas por las pruebas. Son independientes de benchmarks/, que tiene sus
+propios generadores.
+"""
+import numpy as np
+import pandas as pd
+
+
+def velas_sinteticas(n, semilla=0):
+    """Genera n velas de 1 minuto con un paseo aleatorio, con las columnas de Kraken_API.get_OHCL_data()."""
+    rng = np.random.default_rng(semilla)
+    cierre = 60000 + np.cumsum(rng.normal(0, 15, n))
+    apertura = np.r_[cierre[0], cierre[:-1]]
+    amplitud = np.abs(rng.normal(0, 10, n))
+    return pd.DataFrame({
+        'date': pd.date_range('2024-01-01', periods=n, freq='min'),
+        'open': apertura,
+        'high': np.maximum(apertura, cierre) + amplitud,
+        'low': np.minimum(apertura, cierre) - amplitud,
+        'close': cierre,
+        'vwap': (apertura + cierre) / 2,
+        'volume': rng.exponential(2, n),
+        'count': rng.integers(1, 100, n),
+    })
+
+
+def velas_con_metricas_de_grafico(n, semilla=0):
+    """Velas con las columnas que dibuja Grafico (SMA, Bandas de Bollinger y Volume_SMA) en todas las filas."""
+    df = velas_sinteticas(n + 20, semilla)
+    sma = df['close'].rolling(20).mean()
+    std = df['close'].rolling(20).std()
+    df['SMA'] = sma
+    df['Banda_Superior'] = sma + 2 * std
+    df['Banda_Inferior'] = sma - 2 * std
+    df['Volume_SMA'] = df['volume'].rolling(20).mean()
+    return df.tail(n).reset_index(drop=True)
+
+
+def error_relativo(obtenidas, esperadas):
+    """Error relativo máximo por columna numérica, sin contar las posiciones NaN/inf (que deben coincidir)."""
+    errores = {}
+    for columna in esperadas.columns:
+        if columna == 'date':
+            continue
+        a = obtenidas[columna].to_numpy(np.float64)
+        b = esperadas[columna].to_numpy(np.float64)
+        finitos = np.isfinite(b)
+        if not np.array_equal(finitos, np.isfinite(a)):
+            errores[columna] = np.inf
+            continue
+        diferencia = np.abs(a[finitos] - b[finitos])
+        errores[columna] = float(np.max(diferencia / np.maximum(np.abs(b[finitos]), np.finfo(np.float64).tiny),
+                                        initial=0.0))
+    return errores
@@ -0,0 +1,130 @@
+# utils/pipeline.py
+"""
+Pipeline por etapas con colas acotadas.
+Cada etapa tiene sus propios hilos y recibe los elementos de la anterior por una cola con capacidad limitada, de modo
+que mientras un par se publica el siguiente ya se está descargando. Las etapas de E/S (Kraken, OpenAI, Twitter) se
+ejecutan en los hilos; las de CPU (indicadores, gráficos) se envían a un pool de procesos compartido.
+"""
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+_FIN = object()  # Marca de fin de la entrada, se propaga de etapa en etapa
+
+
+class EnProceso:
+    """
+    Marca una función de etapa para ejecutarla en el pool de procesos (tiene que poder serializarse con pickle,
+    es decir, estar definida a nivel de módulo).
+    """
+
+    def __init__(self, funcion):
+        self.funcion = funcion
+        self.__name__ = getattr(funcion, '__name__', 'funcion')
+
+
+class Etapa:
+    """
+    Etapa del pipeline.
+    - nombre: Nombre con el que se informan sus tiempos.
+    - funciones: Una o varias funciones que reciben el elemento de la etapa anterior. Con varias, todas se ejecutan
+      a la vez sobre el mismo elemento y la etapa produce la tupla de sus resultados (p. ej. gráfico y comentario,
+      que solo dependen de las métricas). Las marcadas con EnProceso se ejecutan en el pool de procesos.
+    - hilos: Número de elementos que la etapa procesa a la vez.
+    """
+
+    def __init__(self, nombre, *funciones, hilos=1):
+        self.nombre = nombre
+        self.funciones = funciones
+        self.hilos = hilos
+
+
+class Pipeline:
+    """
+    Encadena etapas con colas acotadas y procesa una secuencia de elementos (p. ej. pares).
+    Un elemento cuya etapa falla se informa por consola y no continúa.
+    """
+
+    def __init__(self, etapas, capacidad=2, procesos=None):
+        """
+        Constructor de la clase Pipeline.
+        - etapas: Lista de Etapa, en orden.
+        - capacidad: Tamaño máximo de cada cola entre etapas.
+        - procesos: Tamaño del pool de procesos (por defecto, el número de núcleos).
+        """
+        self.etapas = etapas
+        self.capacidad = capacidad
+        self.procesos = procesos or os.cpu_count() or 1
+        self.tiempos = {etapa.nombre: [] for etapa in etapas}  # Duración de cada elemento en cada etapa
+
+    def __aplicar(self, etapa, elemento, pool, hilos):
+        funciones = etapa.funciones
+        if len(funciones) == 1 and not isinstance(funciones[0], EnProceso):
+            return funciones[0](elemento)
+
+        futuros = [pool.submit(f.funcion, elemento) if isinstance(f, EnProceso) else hilos.submit(f, elemento)
+                   for f in funciones]
+        resultados = tuple(futuro.result() for futuro in futuros)
+        return resultados[0] if len(resultados) == 1 else resultados
+
+    def __trabajador(self, etapa, entrada, salida, pool, hilos, pendientes, cerrojo):
+        while True:
+            elemento = entrada.get()
+            if elemento is _FIN:
+                entrada.put(_FIN)  # Para el resto de hilos de la etapa
+                with cerrojo:
+                    pendientes[0] -= 1
+                    if pendientes[0] == 0:
+                        salida.put(_FIN)
+                return
+
+            inicio = time.perf_counter()
+            try:
+                resultado = self.__aplicar(etapa, elemento, pool, hilos)
+            except Exception as e:
+                print(f'Error en la etapa {etapa.nombre}: {e}')
+                continue
+            finally:
+                self.tiempos[etapa.nombre].append(time.perf_counter() - inicio)
+            salida.put(resultado)
+
+    def ejecutar(self, elementos):
+        """
+        Pasa cada elemento por todas las etapas y devuelve la lista de resultados de la última, en orden de
+        finalización.
+        """
+        colas = [queue.Queue(maxsize=self.capacidad) for _ in range(len(self.etapas) + 1)]
+        resultados = []
+        with ProcessPoolExecutor(max_workers=self.procesos) as pool, \
+                ThreadPoolExecutor(max_workers=sum(len(e.funciones) * e.hilos for e in self.etapas)) as hilos:
+            # Los procesos del pool se crean con la primera tarea. Se crean ya, antes que los hilos de las etapas: con
+            # 'fork', un proceso creado mientras otro hilo tiene un cerrojo (stdout, importaciones...) se bloquea
+            if any(isinstance(f, EnProceso) for etapa in self.etapas for f in etapa.funciones):
+                pool.submit(int).result()
+            trabajadores = []
+            for etapa, entrada, salida in zip(self.etapas, colas, colas[1:]):
+                pendientes, cerrojo = [etapa.hilos], threading.Lock()
+                for _ in range(etapa.hilos):
+                    trabajador = threading.Thread(target=self.__trabajador, daemon=True,
+                                                  args=(etapa, entrada, salida, pool, hilos, pendientes, cerrojo))
+                    trabajador.start()
+                    trabajadores.append(trabajador)
+
+            # La entrada se alimenta desde otro hilo para poder ir leyendo la salida a la vez
+            def alimentar():
+                for elemento in elementos:
+                    colas[0].put(elemento)
+                colas[0].put(_FIN)
+            threading.Thread(target=alimentar, daemon=True).start()
+
+            while (resultado := colas[-1].get()) is not _FIN:
+                resultados.append(resultado)
+            for trabajador in trabajadores:
+                trabajador.join()
+        return resultados
+
+    def resumen(self):
+        """Devuelve el tiempo medio por elemento de cada etapa como texto, en milisegundos."""
+        return ', '.join(f'{nombre}: {sum(t) / len(t) * 1000:.1f} ms' for nombre, t in self.tiempos.items() if t)
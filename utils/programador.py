@@ -0,0 +1,76 @@
+# utils/programador.py
+"""
+Programador de ciclos alineados al cierre de vela, para ejecutar el bot como proceso residente.
+"""
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class Cronometro:
+    """
+    Mide la duración de cada etapa de un ciclo (descarga, métricas, gráfico...).
+    """
+
+    def __init__(self):
+        self.tiempos = {}
+
+    @contextmanager
+    def etapa(self, nombre):
+        """Mide el bloque `with` y acumula su duración (en segundos) en tiempos[nombre]."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.tiempos[nombre] = self.tiempos.get(nombre, 0.0) + time.perf_counter() - inicio
+
+    def resumen(self):
+        """Devuelve las duraciones del ciclo como texto, en milisegundos."""
+        total = sum(self.tiempos.values())
+        etapas = ', '.join(f'{nombre}: {segundos * 1000:.1f} ms' for nombre, segundos in self.tiempos.items())
+        return f'{etapas} (total {total * 1000:.1f} ms)'
+
+
+class Programador:
+    """
+    Ejecuta una función en cada cierre de vela: si el intervalo es de 60 s, a las hh:mm:00 más un pequeño retardo
+    para que Kraken haya cerrado la vela. Si un ciclo dura más que el intervalo, se salta al siguiente cierre.
+    """
+
+    def __init__(self, intervalo=60, retardo=2.0, max_historial=1440):
+        """
+        Constructor de la clase Programador.
+        - intervalo: Duración de la vela en segundos.
+        - retardo: Segundos que se esperan tras el cierre antes de ejecutar el ciclo.
+        - max_historial: Número de ciclos cuyos tiempos se conservan (por defecto, un día de velas de 1 minuto).
+        """
+        self.intervalo = intervalo
+        self.retardo = retardo
+        self.historial = deque(maxlen=max_historial)  # Tiempos por etapa de los últimos ciclos ejecutados
+
+    def proximo_cierre(self, ahora=None):
+        """Devuelve el instante (segundos epoch) del próximo cierre de vela más el retardo."""
+        ahora = time.time() if ahora is None else ahora
+        cierre = (ahora - self.retardo) // self.intervalo * self.intervalo + self.intervalo
+        return cierre + self.retardo
+
+    def ejecutar(self, ciclo, max_ciclos=None):
+        """
+        Llama a ciclo(cronometro) en cada cierre de vela hasta Ctrl+C o hasta completar max_ciclos.
+        Los errores de un ciclo se informan y no detienen el programador.
+        """
+        ciclos = 0
+        try:
+            while max_ciclos is None or ciclos < max_ciclos:
+                time.sleep(max(0.0, self.proximo_cierre() - time.time()))
+
+                cronometro = Cronometro()
+                try:
+                    ciclo(cronometro)
+                except Exception as e:
+                    print(f'Error en el ciclo: {e}')
+                self.historial.append(cronometro.tiempos)
+                print(f'Ciclo {ciclos + 1}: {cronometro.resumen()}')
+                ciclos += 1
+        except KeyboardInterrupt:
+            print('Programador detenido')